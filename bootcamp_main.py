@@ -4,8 +4,8 @@ Bootcamp F2025
 Main process to setup and manage all the other working processes
 """
 
-import multiprocessing as mp
-import queue
+import math
+import pathlib
 import time
 
 from pymavlink import mavutil
@@ -14,11 +14,22 @@ from modules.common.modules.logger import logger
 from modules.common.modules.logger import logger_main_setup
 from modules.common.modules.read_yaml import read_yaml
 from modules.command import command
+from modules.command import command_ack_tracker
+from modules.command import command_tracker
 from modules.command import command_worker
+from modules.fleet import fleet_worker
 from modules.heartbeat import heartbeat_receiver_worker
 from modules.heartbeat import heartbeat_sender_worker
+from modules.router import mavlink_endpoint
+from modules.router import router_worker
+from modules.runtime import async_runtime_worker
+from modules.telemetry import telemetry
+from modules.telemetry import telemetry_fusion
 from modules.telemetry import telemetry_worker
 from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_selector
+from utilities.workers import shared_memory_blackboard
+from utilities.workers import shutdown_protocol
 from utilities.workers import worker_controller
 from utilities.workers import worker_manager
 
@@ -33,21 +44,97 @@ CONNECTION_STRING = "tcp:localhost:12345"
 HEARTBEAT_RECEIVER_QUEUE_MAX_SIZE = 5
 TELEMETRY_TO_COMMAND_QUEUE_MAX_SIZE = 5
 COMMAND_OUTPUT_QUEUE_MAX_SIZE = 5
+ROUTER_OUTBOUND_QUEUE_MAX_SIZE = 16
+ROUTER_INBOUND_QUEUE_MAX_SIZE = 16
+
+# Set queue backends (shared memory requires max size > 0)
+HEARTBEAT_RECEIVER_QUEUE_BACKEND = queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+TELEMETRY_TO_COMMAND_QUEUE_BACKEND = queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+COMMAND_OUTPUT_QUEUE_BACKEND = queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+
+# Set what producers do when a queue is full
+# Telemetry keeps the newest data flowing instead of stalling the MAVLink reads
+HEARTBEAT_RECEIVER_QUEUE_OVERFLOW_POLICY = queue_proxy_wrapper.OverflowPolicy.BLOCK
+TELEMETRY_TO_COMMAND_QUEUE_OVERFLOW_POLICY = queue_proxy_wrapper.OverflowPolicy.DROP_OLDEST
+COMMAND_OUTPUT_QUEUE_OVERFLOW_POLICY = queue_proxy_wrapper.OverflowPolicy.BLOCK
+
+# Record queue depth and latency, and how often to log it
+QUEUE_INSTRUMENTATION_ENABLED = True
+QUEUE_STATISTICS_LOG_PERIOD = 5.0  # seconds
+
+# Command reads the latest telemetry from a blackboard instead of the telemetry queue
+TELEMETRY_BLACKBOARD_ENABLED = True
+
+# Record all MAVLink traffic for replay, None to not record. For example:
+# pathlib.Path("logs", f"flight_{time.strftime('%Y-%m-%d_%H-%M-%S')}.mavrec")
+FLIGHT_RECORDING_PATH: pathlib.Path | None = None
+
+# Run the router, both heartbeat workers, and telemetry as coroutines in one process
+# instead of a process each
+ASYNC_RUNTIME_ENABLED = True
+
+# Command every vehicle on the link, by MAVLink system ID, with one fleet worker
+# instead of the single vehicle command worker
+FLEET_ENABLED = False
+FLEET_INBOUND_QUEUE_MAX_SIZE = 256
+FLEET_MAX_VEHICLES = 100
 
 # Set worker counts
+# Only one router may own the connection
+ROUTER_WORKER_COUNT = 1
+ASYNC_RUNTIME_WORKER_COUNT = 1
 HEARTBEAT_SENDER_WORKER_COUNT = 1
 HEARTBEAT_RECEIVER_WORKER_COUNT = 1
 TELEMETRY_WORKER_COUNT = 1
 COMMAND_WORKER_COUNT = 1
+FLEET_WORKER_COUNT = 1
 
 # Any other constants
 HEARTBEAT_SEND_PERIOD = 1.0
-HEARTBEAT_DISCONNECT_THRESHOLD = 5
+# Disconnected as soon as no heartbeat arrives for this long
+HEARTBEAT_DISCONNECT_TIMEOUT = 5.0  # seconds
+# Longest time between checks of the deadline and for exit
+HEARTBEAT_CHECK_PERIOD = 0.5  # seconds
 TELEMETRY_PERIOD = 0.5
+# Send telemetry at the combined message rate, only combining messages up to this old
+TELEMETRY_STREAMING_ENABLED = True
+TELEMETRY_MAX_AGE = 1.0  # seconds
+# Align position and attitude to the same time when streaming
+TELEMETRY_FUSION_ENABLED = True
+TELEMETRY_FUSION_BUFFER_SIZE = 16
+TELEMETRY_MAX_EXTRAPOLATION = 0.1  # seconds
 TARGET_POSITION = command.Position(10.0, 20.0, 30.0)
 HEIGHT_TOLERANCE = 0.5
 ANGLE_TOLERANCE = 5.0
+# Only resend a command when its target changes, it times out, or the drone stops converging
+# None sends a command for every sample out of tolerance
+COMMAND_LIMITS = {
+    mavutil.mavlink.MAV_CMD_CONDITION_CHANGE_ALT: command_tracker.CommandLimits(
+        min_interval=0.5,  # seconds
+        timeout=5.0,  # seconds
+        target_tolerance=0.1,  # m
+        min_progress=0.05,  # m
+    ),
+    mavutil.mavlink.MAV_CMD_CONDITION_YAW: command_tracker.CommandLimits(
+        min_interval=0.5,  # seconds
+        timeout=5.0,  # seconds
+        target_tolerance=math.radians(1.0),
+        min_progress=math.radians(1.0),
+    ),
+}
+# Wait for COMMAND_ACK without blocking decisions, sending again on timeout
+# None sends every command once
+COMMAND_ACK_LIMITS = command_ack_tracker.AckLimits(
+    window=2,
+    timeout=1.0,  # seconds
+    max_retries=3,
+)
+# Hold off commands while the drone's climb or turn reaches tolerance within the expected
+# command latency, None reacts to the current altitude and heading only
+COMMAND_PREDICTION_HORIZON = 0.5  # seconds
 RUN_DURATION = 100.0
+# Time allowed for workers to exit before they are terminated
+SHUTDOWN_DEADLINE = 0.2  # seconds
 # =================================================================================================
 #                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
 # =================================================================================================
@@ -90,147 +177,388 @@ def main() -> int:
     controller = worker_controller.WorkerController()
 
     # Create a multiprocess manager for synchronized queues
-    mp_manager = mp.Manager()
+    # Queues created by this manager also support bulk operations
+    mp_manager = queue_proxy_wrapper.QueueManager()
+    # Manager lives until the end of main
+    # pylint: disable-next=consider-using-with
+    mp_manager.start()
 
     # Create queues
     heartbeat_receiver_queue = queue_proxy_wrapper.QueueProxyWrapper(
         mp_manager,
         HEARTBEAT_RECEIVER_QUEUE_MAX_SIZE,
+        HEARTBEAT_RECEIVER_QUEUE_BACKEND,
+        instrumented=QUEUE_INSTRUMENTATION_ENABLED,
+        overflow_policy=HEARTBEAT_RECEIVER_QUEUE_OVERFLOW_POLICY,
     )
     telemetry_to_command_queue = queue_proxy_wrapper.QueueProxyWrapper(
         mp_manager,
         TELEMETRY_TO_COMMAND_QUEUE_MAX_SIZE,
+        TELEMETRY_TO_COMMAND_QUEUE_BACKEND,
+        instrumented=QUEUE_INSTRUMENTATION_ENABLED,
+        overflow_policy=TELEMETRY_TO_COMMAND_QUEUE_OVERFLOW_POLICY,
     )
     command_output_queue = queue_proxy_wrapper.QueueProxyWrapper(
         mp_manager,
         COMMAND_OUTPUT_QUEUE_MAX_SIZE,
+        COMMAND_OUTPUT_QUEUE_BACKEND,
+        instrumented=QUEUE_INSTRUMENTATION_ENABLED,
+        overflow_policy=COMMAND_OUTPUT_QUEUE_OVERFLOW_POLICY,
     )
 
-    # Create worker properties for each worker type (what inputs it takes, how many workers)
-    # Heartbeat sender
-    result, heartbeat_sender_properties = worker_manager.WorkerProperties.create(
-        count=HEARTBEAT_SENDER_WORKER_COUNT,
-        target=heartbeat_sender_worker.heartbeat_sender_worker,
-        work_arguments=(
-            HEARTBEAT_SEND_PERIOD,
-            connection,
-        ),
-        input_queues=[],
-        output_queues=[],
-        controller=controller,
-        local_logger=main_logger,
-    )
-    if not result:
-        main_logger.error("Failed to create arguments for Heartbeat Sender")
-        return -1
-
-    assert heartbeat_sender_properties is not None
-
-    # Heartbeat receiver
-    result, heartbeat_receiver_properties = worker_manager.WorkerProperties.create(
-        count=HEARTBEAT_RECEIVER_WORKER_COUNT,
-        target=heartbeat_receiver_worker.heartbeat_receiver_worker,
-        work_arguments=(
-            HEARTBEAT_DISCONNECT_THRESHOLD,
-            connection,
-        ),
-        input_queues=[],
-        output_queues=[heartbeat_receiver_queue],
-        controller=controller,
-        local_logger=main_logger,
+    # Only the router uses the connection, the other workers use endpoints
+    # Frames to send, from all endpoints
+    router_outbound_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager,
+        ROUTER_OUTBOUND_QUEUE_MAX_SIZE,
+        queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        instrumented=QUEUE_INSTRUMENTATION_ENABLED,
     )
-    if not result:
-        main_logger.error("Failed to create arguments for Heartbeat Receiver")
-        return -1
-
-    assert heartbeat_receiver_properties is not None
-
-    # Telemetry
-    result, telemetry_properties = worker_manager.WorkerProperties.create(
-        count=TELEMETRY_WORKER_COUNT,
-        target=telemetry_worker.telemetry_worker,
-        work_arguments=(
-            TELEMETRY_PERIOD,
-            connection,
-        ),
-        input_queues=[],
-        output_queues=[telemetry_to_command_queue],
-        controller=controller,
-        local_logger=main_logger,
+    # Received messages, only the latest matter so the router never waits for a slow worker
+    heartbeat_inbound_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager,
+        ROUTER_INBOUND_QUEUE_MAX_SIZE,
+        queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        instrumented=QUEUE_INSTRUMENTATION_ENABLED,
+        overflow_policy=queue_proxy_wrapper.OverflowPolicy.DROP_OLDEST,
     )
-    if not result:
-        main_logger.error("Failed to create arguments for Telemetry")
-        return -1
-
-    assert telemetry_properties is not None
-
-    # Command
-    result, command_properties = worker_manager.WorkerProperties.create(
-        count=COMMAND_WORKER_COUNT,
-        target=command_worker.command_worker,
-        work_arguments=(
-            TARGET_POSITION,
-            HEIGHT_TOLERANCE,
-            ANGLE_TOLERANCE,
-            connection,
-        ),
-        input_queues=[telemetry_to_command_queue],
-        output_queues=[command_output_queue],
-        controller=controller,
-        local_logger=main_logger,
+    telemetry_inbound_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager,
+        ROUTER_INBOUND_QUEUE_MAX_SIZE,
+        queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        instrumented=QUEUE_INSTRUMENTATION_ENABLED,
+        overflow_policy=queue_proxy_wrapper.OverflowPolicy.DROP_OLDEST,
     )
-    if not result:
-        main_logger.error("Failed to create arguments for Command")
-        return -1
-
-    assert command_properties is not None
 
-    # Create the workers (processes) and obtain their managers
-    worker_managers: list[worker_manager.WorkerManager] = []
-
-    result, heartbeat_sender_manager = worker_manager.WorkerManager.create(
-        worker_properties=heartbeat_sender_properties,
-        local_logger=main_logger,
+    heartbeat_sender_endpoint = mavlink_endpoint.MavlinkEndpoint(
+        [], None, router_outbound_queue, connection.source_system, connection.source_component
     )
-    if not result:
-        main_logger.error("Failed to create manager for Heartbeat Sender")
-        return -1
-
-    assert heartbeat_sender_manager is not None
-    worker_managers.append(heartbeat_sender_manager)
-
-    result, heartbeat_receiver_manager = worker_manager.WorkerManager.create(
-        worker_properties=heartbeat_receiver_properties,
-        local_logger=main_logger,
+    heartbeat_receiver_endpoint = mavlink_endpoint.MavlinkEndpoint(
+        ["HEARTBEAT"],
+        heartbeat_inbound_queue,
+        router_outbound_queue,
+        connection.source_system,
+        connection.source_component,
     )
-    if not result:
-        main_logger.error("Failed to create manager for Heartbeat Receiver")
-        return -1
-
-    assert heartbeat_receiver_manager is not None
-    worker_managers.append(heartbeat_receiver_manager)
-
-    result, telemetry_manager = worker_manager.WorkerManager.create(
-        worker_properties=telemetry_properties,
-        local_logger=main_logger,
+    telemetry_endpoint = mavlink_endpoint.MavlinkEndpoint(
+        ["LOCAL_POSITION_NED", "ATTITUDE"],
+        telemetry_inbound_queue,
+        router_outbound_queue,
+        connection.source_system,
+        connection.source_component,
     )
-    if not result:
-        main_logger.error("Failed to create manager for Telemetry")
-        return -1
-
-    assert telemetry_manager is not None
-    worker_managers.append(telemetry_manager)
-
-    result, command_manager = worker_manager.WorkerManager.create(
-        worker_properties=command_properties,
-        local_logger=main_logger,
+    command_inbound_queue = None
+    command_message_types = []
+    if COMMAND_ACK_LIMITS is not None:
+        command_inbound_queue = queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager,
+            ROUTER_INBOUND_QUEUE_MAX_SIZE,
+            queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+            instrumented=QUEUE_INSTRUMENTATION_ENABLED,
+            overflow_policy=queue_proxy_wrapper.OverflowPolicy.DROP_OLDEST,
+        )
+        command_message_types = ["COMMAND_ACK"]
+
+    command_endpoint = mavlink_endpoint.MavlinkEndpoint(
+        command_message_types,
+        command_inbound_queue,
+        router_outbound_queue,
+        connection.source_system,
+        connection.source_component,
     )
-    if not result:
-        main_logger.error("Failed to create manager for Command")
-        return -1
+    endpoints = [
+        heartbeat_sender_endpoint,
+        heartbeat_receiver_endpoint,
+        telemetry_endpoint,
+        command_endpoint,
+    ]
+    # Endpoints of the workers outside the async runtime
+    async_runtime_endpoints = [command_endpoint]
+
+    # Messages of every vehicle, told apart by system ID
+    fleet_inbound_queue = None
+    fleet_endpoint = None
+    if FLEET_ENABLED:
+        fleet_inbound_queue = queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager,
+            FLEET_INBOUND_QUEUE_MAX_SIZE,
+            queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+            instrumented=QUEUE_INSTRUMENTATION_ENABLED,
+            overflow_policy=queue_proxy_wrapper.OverflowPolicy.DROP_OLDEST,
+        )
+        fleet_endpoint = mavlink_endpoint.MavlinkEndpoint(
+            ["HEARTBEAT", "LOCAL_POSITION_NED", "ATTITUDE"],
+            fleet_inbound_queue,
+            router_outbound_queue,
+            connection.source_system,
+            connection.source_component,
+        )
+        endpoints.append(fleet_endpoint)
+        async_runtime_endpoints.append(fleet_endpoint)
+
+    # Create the blackboard holding the latest telemetry
+    telemetry_blackboard = None
+    if TELEMETRY_BLACKBOARD_ENABLED:
+        telemetry_blackboard = shared_memory_blackboard.SharedMemoryBlackboard(
+            telemetry.TelemetryData.PACKED_SIZE,
+        )
+
+    # Create the buffers aligning telemetry
+    telemetry_fusion_buffers = None
+    if TELEMETRY_FUSION_ENABLED:
+        result, telemetry_fusion_buffers = telemetry_fusion.TelemetryFusion.create(
+            TELEMETRY_FUSION_BUFFER_SIZE,
+            TELEMETRY_MAX_EXTRAPOLATION,
+        )
+        if not result:
+            main_logger.error("Failed to create TelemetryFusion")
+            return -1
+
+    # Create worker properties (what inputs each takes, how many workers) and the workers
+    # (processes) with their managers, only for the workers that are started
+    worker_managers: list[worker_manager.WorkerManager] = []
 
-    assert command_manager is not None
-    worker_managers.append(command_manager)
+    if ASYNC_RUNTIME_ENABLED:
+        # Router, heartbeat sender, heartbeat receiver, and telemetry in one process
+        result, async_runtime_properties = worker_manager.WorkerProperties.create(
+            count=ASYNC_RUNTIME_WORKER_COUNT,
+            target=async_runtime_worker.async_runtime_worker,
+            work_arguments=(
+                connection,
+                # The other endpoints are replaced by coroutines
+                async_runtime_endpoints,
+                FLIGHT_RECORDING_PATH,
+                HEARTBEAT_SEND_PERIOD,
+                HEARTBEAT_DISCONNECT_TIMEOUT,
+                HEARTBEAT_CHECK_PERIOD,
+                TELEMETRY_PERIOD,
+                TELEMETRY_STREAMING_ENABLED,
+                TELEMETRY_MAX_AGE,
+                telemetry_fusion_buffers,
+                telemetry_blackboard,
+            ),
+            input_queues=[router_outbound_queue],
+            output_queues=[heartbeat_receiver_queue, telemetry_to_command_queue],
+            controller=controller,
+            local_logger=main_logger,
+        )
+        if not result:
+            main_logger.error("Failed to create arguments for Async Runtime")
+            return -1
+
+        assert async_runtime_properties is not None
+
+        result, async_runtime_manager = worker_manager.WorkerManager.create(
+            worker_properties=async_runtime_properties,
+            local_logger=main_logger,
+        )
+        if not result:
+            main_logger.error("Failed to create manager for Async Runtime")
+            return -1
+
+        assert async_runtime_manager is not None
+        worker_managers.append(async_runtime_manager)
+    else:
+        # Router
+        result, router_properties = worker_manager.WorkerProperties.create(
+            count=ROUTER_WORKER_COUNT,
+            target=router_worker.router_worker,
+            work_arguments=(
+                connection,
+                endpoints,
+                FLIGHT_RECORDING_PATH,
+            ),
+            input_queues=[router_outbound_queue],
+            output_queues=[],
+            controller=controller,
+            local_logger=main_logger,
+        )
+        if not result:
+            main_logger.error("Failed to create arguments for Router")
+            return -1
+
+        assert router_properties is not None
+
+        result, router_manager = worker_manager.WorkerManager.create(
+            worker_properties=router_properties,
+            local_logger=main_logger,
+        )
+        if not result:
+            main_logger.error("Failed to create manager for Router")
+            return -1
+
+        assert router_manager is not None
+        worker_managers.append(router_manager)
+
+        # Heartbeat sender
+        result, heartbeat_sender_properties = worker_manager.WorkerProperties.create(
+            count=HEARTBEAT_SENDER_WORKER_COUNT,
+            target=heartbeat_sender_worker.heartbeat_sender_worker,
+            work_arguments=(
+                HEARTBEAT_SEND_PERIOD,
+                heartbeat_sender_endpoint,
+            ),
+            input_queues=[],
+            output_queues=[],
+            controller=controller,
+            local_logger=main_logger,
+        )
+        if not result:
+            main_logger.error("Failed to create arguments for Heartbeat Sender")
+            return -1
+
+        assert heartbeat_sender_properties is not None
+
+        result, heartbeat_sender_manager = worker_manager.WorkerManager.create(
+            worker_properties=heartbeat_sender_properties,
+            local_logger=main_logger,
+        )
+        if not result:
+            main_logger.error("Failed to create manager for Heartbeat Sender")
+            return -1
+
+        assert heartbeat_sender_manager is not None
+        worker_managers.append(heartbeat_sender_manager)
+
+        # Heartbeat receiver
+        result, heartbeat_receiver_properties = worker_manager.WorkerProperties.create(
+            count=HEARTBEAT_RECEIVER_WORKER_COUNT,
+            target=heartbeat_receiver_worker.heartbeat_receiver_worker,
+            work_arguments=(
+                HEARTBEAT_DISCONNECT_TIMEOUT,
+                HEARTBEAT_CHECK_PERIOD,
+                heartbeat_receiver_endpoint,
+            ),
+            input_queues=[],
+            output_queues=[heartbeat_receiver_queue],
+            controller=controller,
+            local_logger=main_logger,
+        )
+        if not result:
+            main_logger.error("Failed to create arguments for Heartbeat Receiver")
+            return -1
+
+        assert heartbeat_receiver_properties is not None
+
+        result, heartbeat_receiver_manager = worker_manager.WorkerManager.create(
+            worker_properties=heartbeat_receiver_properties,
+            local_logger=main_logger,
+        )
+        if not result:
+            main_logger.error("Failed to create manager for Heartbeat Receiver")
+            return -1
+
+        assert heartbeat_receiver_manager is not None
+        worker_managers.append(heartbeat_receiver_manager)
+
+        # Telemetry
+        result, telemetry_properties = worker_manager.WorkerProperties.create(
+            count=TELEMETRY_WORKER_COUNT,
+            target=telemetry_worker.telemetry_worker,
+            work_arguments=(
+                TELEMETRY_PERIOD,
+                TELEMETRY_STREAMING_ENABLED,
+                TELEMETRY_MAX_AGE,
+                telemetry_fusion_buffers,
+                telemetry_endpoint,
+                telemetry_blackboard,
+            ),
+            input_queues=[],
+            output_queues=[telemetry_to_command_queue],
+            controller=controller,
+            local_logger=main_logger,
+        )
+        if not result:
+            main_logger.error("Failed to create arguments for Telemetry")
+            return -1
+
+        assert telemetry_properties is not None
+
+        result, telemetry_manager = worker_manager.WorkerManager.create(
+            worker_properties=telemetry_properties,
+            local_logger=main_logger,
+        )
+        if not result:
+            main_logger.error("Failed to create manager for Telemetry")
+            return -1
+
+        assert telemetry_manager is not None
+        worker_managers.append(telemetry_manager)
+
+    if FLEET_ENABLED:
+        # Fleet
+        result, fleet_properties = worker_manager.WorkerProperties.create(
+            count=FLEET_WORKER_COUNT,
+            target=fleet_worker.fleet_worker,
+            work_arguments=(
+                TARGET_POSITION,
+                HEIGHT_TOLERANCE,
+                ANGLE_TOLERANCE,
+                COMMAND_LIMITS,
+                TELEMETRY_MAX_AGE,
+                HEARTBEAT_DISCONNECT_TIMEOUT,
+                HEARTBEAT_CHECK_PERIOD,
+                FLEET_MAX_VEHICLES,
+                # Every vehicle is reached through the single connection
+                [fleet_endpoint],
+            ),
+            input_queues=[],
+            output_queues=[command_output_queue],
+            controller=controller,
+            local_logger=main_logger,
+        )
+        if not result:
+            main_logger.error("Failed to create arguments for Fleet")
+            return -1
+
+        assert fleet_properties is not None
+
+        result, fleet_manager = worker_manager.WorkerManager.create(
+            worker_properties=fleet_properties,
+            local_logger=main_logger,
+        )
+        if not result:
+            main_logger.error("Failed to create manager for Fleet")
+            return -1
+
+        assert fleet_manager is not None
+        worker_managers.append(fleet_manager)
+    else:
+        # Command
+        result, command_properties = worker_manager.WorkerProperties.create(
+            count=COMMAND_WORKER_COUNT,
+            target=command_worker.command_worker,
+            work_arguments=(
+                TARGET_POSITION,
+                HEIGHT_TOLERANCE,
+                ANGLE_TOLERANCE,
+                COMMAND_LIMITS,
+                COMMAND_ACK_LIMITS,
+                COMMAND_PREDICTION_HORIZON,
+                command_endpoint,
+                telemetry_blackboard,
+            ),
+            input_queues=[telemetry_to_command_queue],
+            output_queues=[command_output_queue],
+            controller=controller,
+            local_logger=main_logger,
+        )
+        if not result:
+            main_logger.error("Failed to create arguments for Command")
+            return -1
+
+        assert command_properties is not None
+
+        result, command_manager = worker_manager.WorkerManager.create(
+            worker_properties=command_properties,
+            local_logger=main_logger,
+        )
+        if not result:
+            main_logger.error("Failed to create manager for Command")
+            return -1
+
+        assert command_manager is not None
+        worker_managers.append(command_manager)
 
     # Start worker processes
     for manager in worker_managers:
@@ -240,45 +568,89 @@ def main() -> int:
 
     # Main's work: read from all queues that output to main, and log any commands that we make
     # Continue running for 100 seconds or until the drone disconnects
-    start_time = time.time()
-    is_connected = True
-    while (time.time() - start_time < RUN_DURATION) and is_connected:
-        # Check heartbeat receiver queue for connection status
-        try:
-            status = heartbeat_receiver_queue.queue.get_nowait()
-            main_logger.info(f"Heartbeat status: {status}")
-            if status == "Disconnected":
-                is_connected = False
-        except queue.Empty:
-            pass
-
-        # Check command output queue
-        try:
-            output = command_output_queue.queue.get_nowait()
-            main_logger.info(f"Command output: {output}")
-        except queue.Empty:
-            pass
-
-        time.sleep(0.1)
-
-    # Stop the processes
-    controller.request_exit()
-
-    main_logger.info("Requested exit")
-
-    # Fill and drain queues from END TO START
-    command_output_queue.fill_and_drain_queue()
-    telemetry_to_command_queue.fill_and_drain_queue()
-    heartbeat_receiver_queue.fill_and_drain_queue()
-
-    main_logger.info("Queues cleared")
-
-    # Clean up worker processes
-    for manager in worker_managers:
-        manager.join_workers()
+    # Wake up as soon as either queue has data instead of polling
+    selector = queue_selector.QueueSelector([heartbeat_receiver_queue, command_output_queue])
+
+    queues = {
+        "Heartbeat receiver": heartbeat_receiver_queue,
+        "Telemetry to command": telemetry_to_command_queue,
+        "Command output": command_output_queue,
+        "Router outbound": router_outbound_queue,
+        "Heartbeat inbound": heartbeat_inbound_queue,
+        "Telemetry inbound": telemetry_inbound_queue,
+    }
+    if command_inbound_queue is not None:
+        queues["Command inbound"] = command_inbound_queue
+    if fleet_inbound_queue is not None:
+        queues["Fleet inbound"] = fleet_inbound_queue
+
+    start_time = time.monotonic()
+    next_statistics_time = start_time + QUEUE_STATISTICS_LOG_PERIOD
+    disconnect_time = None
+    while disconnect_time is None:
+        current_time = time.monotonic()
+        remaining_time = RUN_DURATION - (current_time - start_time)
+        if remaining_time <= 0.0:
+            break
+
+        # Periodically log queue instrumentation
+        if current_time >= next_statistics_time:
+            for name, instrumented_queue in queues.items():
+                statistics = instrumented_queue.get_statistics()
+                if statistics is not None:
+                    main_logger.info(f"{name} queue: {statistics}")
+
+            next_statistics_time += QUEUE_STATISTICS_LOG_PERIOD
+
+        timeout = min(remaining_time, next_statistics_time - current_time)
+        for source, item in selector.select(timeout):
+            if source is heartbeat_receiver_queue:
+                # Connection status
+                main_logger.info(f"Heartbeat status: {item}")
+                if item == "Disconnected" and disconnect_time is None:
+                    disconnect_time = time.monotonic()
+            else:
+                main_logger.info(f"Command output: {item}")
+
+    selector.close()
+
+    # Stop the processes, terminating any that miss the deadline
+    # Not the inbound queues, the router never waits on them and wakes up their readers
+    drained_queues = [
+        heartbeat_receiver_queue,
+        telemetry_to_command_queue,
+        command_output_queue,
+        router_outbound_queue,
+    ]
+    report = shutdown_protocol.shutdown(
+        controller, worker_managers, drained_queues, SHUTDOWN_DEADLINE
+    )
+
+    main_logger.info(f"Shutdown: {report}")
+    if not report.is_clean():
+        main_logger.warning("Workers were terminated after the shutdown deadline")
+    if len(report.stuck_queues) > 0:
+        main_logger.warning(f"{len(report.stuck_queues)} queue drains did not stop, not closing")
 
     main_logger.info("Stopped")
 
+    if disconnect_time is not None:
+        shutdown_latency = (time.monotonic() - disconnect_time) * 1000.0
+        main_logger.info(f"Disconnect to shutdown: {shutdown_latency:.1f} ms")
+
+    # Release queue resources now that no worker or drain is using them
+    for drained_queue in drained_queues:
+        if drained_queue not in report.stuck_queues:
+            drained_queue.close()
+    heartbeat_inbound_queue.close()
+    telemetry_inbound_queue.close()
+    if command_inbound_queue is not None:
+        command_inbound_queue.close()
+    if fleet_inbound_queue is not None:
+        fleet_inbound_queue.close()
+    if telemetry_blackboard is not None:
+        telemetry_blackboard.close()
+
     # We can reset controller in case we want to reuse it
     # Alternatively, create a new WorkerController instance
     controller.clear_exit()
@@ -3,9 +3,13 @@ Decision-making logic.
 """
 
 import math
+import time
 
+import numpy as np
 from pymavlink import mavutil
 
+from . import command_ack_tracker
+from . import command_tracker
 from ..common.modules.logger import logger
 from ..telemetry import telemetry
 
@@ -24,6 +28,35 @@ class Position:
 # =================================================================================================
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
+# Decisions of run_batch()
+ACTION_NONE = 0
+ACTION_CHANGE_ALTITUDE = 1
+ACTION_CHANGE_YAW = 2
+
+# Same layout as TelemetryData.to_bytes(), for decoding many records at once
+TELEMETRY_DTYPE = np.dtype(
+    [("mask", "<u2"), ("time_since_boot", "<i8")]
+    + [(name, "<f8") for name in telemetry.TelemetryData.__slots__[1:]]
+)
+
+
+def unpack_telemetry_arrays(data: "bytes | bytearray | memoryview") -> "dict[str, np.ndarray]":
+    """
+    Decodes records encoded with `TelemetryData.pack_many()` into one array per field for
+    `Command.run_batch()` , in one pass without creating a TelemetryData per record.
+
+    Returns float arrays by field name, NaN where the field is None.
+    """
+    records = np.frombuffer(data, dtype=TELEMETRY_DTYPE)
+    arrays = {}
+    for i, name in enumerate(telemetry.TelemetryData.__slots__):
+        values = records[name].astype(np.float64)
+        values[(records["mask"] & (1 << i)) == 0] = np.nan
+        arrays[name] = values
+
+    return arrays
+
+
 class Command:  # pylint: disable=too-many-instance-attributes
     """
     Command class to make a decision based on recieved telemetry,
@@ -40,12 +73,37 @@ class Command:  # pylint: disable=too-many-instance-attributes
         height_tolerance: float,
         angle_tolerance: float,
         local_logger: logger.Logger,
+        tracker: command_tracker.CommandTracker | None = None,
+        target_system: int = 1,
+        ack_tracker: command_ack_tracker.CommandAckTracker | None = None,
+        prediction_horizon: float | None = None,
     ) -> "tuple[True, Command] | tuple[False, None]":
         """
         Falliable create (instantiation) method to create a Command object.
+
+        tracker: Suppresses redundant commands, None to send a command for every sample
+        out of tolerance.
+        target_system: MAVLink system ID of the vehicle commanded.
+        ack_tracker: Waits for COMMAND_ACK and sends again on timeout, None to not wait.
+        prediction_horizon: Expected command latency in seconds. Holds off a command while
+        the current climb or turn reaches tolerance within it, None to only react to the
+        current altitude and heading.
         """
+        if prediction_horizon is not None and prediction_horizon < 0.0:
+            local_logger.error("Prediction horizon must not be negative", True)
+            return False, None
+
         return True, Command(
-            cls.__private_key, connection, target, height_tolerance, angle_tolerance, local_logger
+            cls.__private_key,
+            connection,
+            target,
+            height_tolerance,
+            angle_tolerance,
+            local_logger,
+            tracker,
+            target_system,
+            ack_tracker,
+            prediction_horizon,
         )
 
     def __init__(
@@ -56,12 +114,22 @@ class Command:  # pylint: disable=too-many-instance-attributes
         height_tolerance: float,
         angle_tolerance: float,
         local_logger: logger.Logger,
+        tracker: command_tracker.CommandTracker | None,
+        target_system: int,
+        ack_tracker: command_ack_tracker.CommandAckTracker | None,
+        prediction_horizon: float | None,
     ) -> None:
         assert key is Command.__private_key, "Use create() method"
 
         self.connection = connection
         self.target = target
         self.local_logger = local_logger
+        self.tracker = tracker
+        self.target_system = target_system
+        self.ack_tracker = ack_tracker
+        self.prediction_horizon = prediction_horizon
+        # Commands not sent because the vehicle was already moving into tolerance
+        self.held_count = 0
 
         # Thresholds
         # pylint: disable=invalid-name
@@ -69,13 +137,17 @@ class Command:  # pylint: disable=too-many-instance-attributes
         self.ANGLE_TOLERANCE = math.radians(angle_tolerance)  # Convert degrees to radians
 
     def run(
-        self, telemetry_data: telemetry.TelemetryData
+        self, telemetry_data: telemetry.TelemetryData, current_time: float | None = None
     ) -> "tuple[True, str] | tuple[False, None]":
         """
         Make a decision based on received telemetry data.
 
+        current_time: Monotonic time in seconds, None for now. Recorded time when replaying.
+
         Returns (True, action_string) if a command was sent, (False, None) otherwise.
         """
+        if current_time is None:
+            current_time = time.monotonic()
 
         # Check altitude
         if (
@@ -84,25 +156,56 @@ class Command:  # pylint: disable=too-many-instance-attributes
         ):
             delta_z = self.target.z - telemetry_data.z
 
+            # Already climbing or descending into tolerance
+            if self.__will_reach(delta_z, telemetry_data.z_velocity, self.HEIGHT_TOLERANCE):
+                self.held_count += 1
+                return False, None
+
+            # Same altitude command still in progress
+            if self.tracker is not None and not self.tracker.should_send(
+                mavutil.mavlink.MAV_CMD_CONDITION_CHANGE_ALT,
+                self.target.z,
+                delta_z,
+                current_time,
+                False,
+            ):
+                return False, None
+
+            # Too many commands waiting for acknowledgement
+            if self.ack_tracker is not None and not self.ack_tracker.can_send(
+                mavutil.mavlink.MAV_CMD_CONDITION_CHANGE_ALT
+            ):
+                return False, None
+
             # Send altitude change command
-            self.connection.mav.command_long_send(
-                1,  # target_system
-                0,  # target_component
+            self.__send(
                 mavutil.mavlink.MAV_CMD_CONDITION_CHANGE_ALT,  # command (113)
-                0,  # confirmation
-                1.0,  # param1 (descent/climb rate in m/s), change from 0
-                0,  # param2
-                0,  # param3
-                0,  # param4
-                0,  # param5
-                0,  # param6
-                self.target.z,  # param7 (target altitude)
+                (
+                    1.0,  # param1 (descent/climb rate in m/s), change from 0
+                    0,  # param2
+                    0,  # param3
+                    0,  # param4
+                    0,  # param5
+                    0,  # param6
+                    self.target.z,  # param7 (target altitude)
+                ),
+                current_time,
             )
+            if self.tracker is not None:
+                self.tracker.record_sent(
+                    mavutil.mavlink.MAV_CMD_CONDITION_CHANGE_ALT,
+                    self.target.z,
+                    delta_z,
+                    current_time,
+                )
 
             action = f"CHANGE ALTITUDE: {delta_z:.2f}"
             # self.local_logger.info(action, True)
             return True, action
 
+        if self.tracker is not None:
+            self.tracker.clear(mavutil.mavlink.MAV_CMD_CONDITION_CHANGE_ALT)
+
         # Check yaw (orientation)
         if (
             telemetry_data.yaw is not None
@@ -124,32 +227,215 @@ class Command:  # pylint: disable=too-many-instance-attributes
                 angle_diff += 2 * math.pi
 
             if abs(angle_diff) > self.ANGLE_TOLERANCE:
+                # Already turning into tolerance
+                if self.__will_reach(angle_diff, telemetry_data.yaw_speed, self.ANGLE_TOLERANCE):
+                    self.held_count += 1
+                    return False, None
+
+                # Turn towards the same heading still in progress
+                if self.tracker is not None and not self.tracker.should_send(
+                    mavutil.mavlink.MAV_CMD_CONDITION_YAW,
+                    required_yaw,
+                    angle_diff,
+                    current_time,
+                    True,
+                ):
+                    return False, None
+
+                if self.ack_tracker is not None and not self.ack_tracker.can_send(
+                    mavutil.mavlink.MAV_CMD_CONDITION_YAW
+                ):
+                    return False, None
+
                 # Convert to degrees for command
                 angle_diff_deg = math.degrees(angle_diff)
                 direction = -1 if angle_diff_deg >= 0 else 1  # 1=clockwise, -1=counter-clockwise
 
                 # Send yaw change command (relative)
-                self.connection.mav.command_long_send(
-                    1,  # target_system
-                    0,  # target_component
+                self.__send(
                     mavutil.mavlink.MAV_CMD_CONDITION_YAW,  # command (115)
-                    0,  # confirmation
-                    angle_diff_deg,  # param1 (target angle in degrees)
-                    5.0,  # param2 (angular speed in deg/s) - CHANGE FROM 0
-                    direction,  # param3 (direction: 1=clockwise, -1=counter-clockwise, not used for relative)
-                    1,  # param4 (relative=1, absolute=0)
-                    0,  # param5
-                    0,  # param6
-                    0,  # param7
+                    (
+                        angle_diff_deg,  # param1 (target angle in degrees)
+                        5.0,  # param2 (angular speed in deg/s) - CHANGE FROM 0
+                        direction,  # param3 (direction: 1=clockwise, -1=counter-clockwise, not used for relative)
+                        1,  # param4 (relative=1, absolute=0)
+                        0,  # param5
+                        0,  # param6
+                        0,  # param7
+                    ),
+                    current_time,
                 )
+                if self.tracker is not None:
+                    self.tracker.record_sent(
+                        mavutil.mavlink.MAV_CMD_CONDITION_YAW,
+                        required_yaw,
+                        angle_diff,
+                        current_time,
+                    )
 
                 action = f"CHANGE YAW: {angle_diff_deg:.2f}"
                 # self.local_logger.info(action, True)
                 return True, action
 
+            if self.tracker is not None:
+                self.tracker.clear(mavutil.mavlink.MAV_CMD_CONDITION_YAW)
+
         # No action needed
         return False, None
 
+    def run_batch(
+        self,
+        x: np.ndarray | float,
+        y: np.ndarray | float,
+        z: np.ndarray | float,
+        yaw: np.ndarray | float,
+        z_velocity: np.ndarray | float = np.nan,
+        yaw_speed: np.ndarray | float = np.nan,
+    ) -> "tuple[np.ndarray, np.ndarray, np.ndarray]":
+        """
+        Makes the decision of run() for many samples or vehicles at once, without sending
+        commands. Ignores the tracker, every sample out of tolerance is a command.
+
+        x, y, z: Positions in meters, NaN where unknown.
+        yaw: Headings in radians, NaN where unknown.
+        z_velocity: Climb rates in meters per second, for the prediction horizon.
+        yaw_speed: Turn rates in radians per second, for the prediction horizon.
+        Arrays of the same shape, or scalars applying to every sample.
+
+        Returns arrays of the altitude change in meters, the yaw change in degrees, and the
+        action code. Changes are 0 where that command is not sent.
+        """
+        x, y, z, yaw, z_velocity, yaw_speed = np.broadcast_arrays(
+            *(
+                np.asarray(values, dtype=np.float64)
+                for values in (x, y, z, yaw, z_velocity, yaw_speed)
+            )
+        )
+
+        # Comparisons with NaN are false, so unknown values never make a command
+        altitude_delta = self.target.z - z
+        out_of_altitude = np.abs(altitude_delta) > self.HEIGHT_TOLERANCE
+        change_altitude = out_of_altitude & ~self.__will_reach_batch(
+            altitude_delta, z_velocity, self.HEIGHT_TOLERANCE
+        )
+
+        required_yaw = np.arctan2(self.target.y - y, self.target.x - x)
+        # Normalize to [-π, π] like run(), taking off all the whole turns at once
+        angle_diff = required_yaw - yaw
+        turns = np.maximum(np.ceil((np.abs(angle_diff) - np.pi) / (2.0 * np.pi)), 0.0)
+        angle_diff = angle_diff - np.sign(angle_diff) * turns * 2.0 * np.pi
+        change_yaw = (
+            ~out_of_altitude
+            & (np.abs(angle_diff) > self.ANGLE_TOLERANCE)
+            & ~self.__will_reach_batch(angle_diff, yaw_speed, self.ANGLE_TOLERANCE)
+        )
+
+        actions = np.full(x.shape, ACTION_NONE, dtype=np.int8)
+        actions[change_altitude] = ACTION_CHANGE_ALTITUDE
+        actions[change_yaw] = ACTION_CHANGE_YAW
+
+        return (
+            np.where(change_altitude, altitude_delta, 0.0),
+            np.where(change_yaw, np.degrees(angle_diff), 0.0),
+            actions,
+        )
+
+    def handle_ack(self, msg: object, current_time: float | None = None) -> bool:
+        """
+        Completes the command acknowledged by a COMMAND_ACK message. Ignores acknowledgements
+        from other vehicles or for other senders, which share the link in fleet mode.
+
+        current_time: Monotonic time in seconds the message was received, None for now.
+
+        Returns whether a command was waiting for it.
+        """
+        if self.ack_tracker is None:
+            return False
+
+        if msg.get_srcSystem() != self.target_system:
+            return False
+
+        # Only MAVLink 2 has the target, 0 when not set
+        target_system = getattr(msg, "target_system", 0)
+        target_component = getattr(msg, "target_component", 0)
+        if target_system not in (0, self.connection.mav.srcSystem) or target_component not in (
+            0,
+            self.connection.mav.srcComponent,
+        ):
+            return False
+
+        if current_time is None:
+            current_time = time.monotonic()
+
+        return self.ack_tracker.handle_ack(msg.command, msg.result, current_time)
+
+    def retransmit(self, current_time: float | None = None) -> int:
+        """
+        Sends again the commands not acknowledged in time, with the next confirmation.
+        Does not wait for acknowledgements.
+
+        current_time: Monotonic time in seconds, None for now.
+
+        Returns the number of commands sent.
+        """
+        if self.ack_tracker is None:
+            return 0
+
+        if current_time is None:
+            current_time = time.monotonic()
+
+        retransmissions = self.ack_tracker.get_retransmissions(current_time)
+        for in_flight_command in retransmissions:
+            self.connection.mav.command_long_send(
+                self.target_system,
+                0,
+                in_flight_command.command,
+                in_flight_command.confirmation,
+                *in_flight_command.params,
+            )
+
+        return len(retransmissions)
+
+    def __will_reach(self, error: float, rate: float | None, tolerance: float) -> bool:
+        """
+        Whether the current rate brings the error within tolerance before a command sent now
+        would take effect.
+
+        error: Target minus current value.
+        rate: Rate of change of the current value, None if unknown.
+        """
+        if self.prediction_horizon is None or rate is None or rate * error <= 0.0:
+            return False
+
+        return abs(error) - abs(rate) * self.prediction_horizon <= tolerance
+
+    def __will_reach_batch(
+        self, error: np.ndarray, rate: np.ndarray, tolerance: float
+    ) -> np.ndarray:
+        """
+        `__will_reach()` for arrays, false where the rate is NaN.
+        """
+        if self.prediction_horizon is None:
+            return np.zeros(error.shape, dtype=bool)
+
+        return (rate * error > 0.0) & (
+            np.abs(error) - np.abs(rate) * self.prediction_horizon <= tolerance
+        )
+
+    def __send(self, command: int, params: "tuple[float, ...]", current_time: float) -> None:
+        """
+        Sends a COMMAND_LONG for the first time.
+        """
+        self.connection.mav.command_long_send(
+            self.target_system,  # target_system
+            0,  # target_component
+            command,
+            0,  # confirmation
+            *params,
+        )
+        if self.ack_tracker is not None:
+            self.ack_tracker.record_sent(command, params, current_time)
+
 
 # =================================================================================================
 #                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
@@ -0,0 +1,266 @@
+"""
+Acknowledgement tracking of outbound commands.
+"""
+
+import bisect
+
+from pymavlink import mavutil
+
+
+class AckLimits:
+    """
+    How many commands may wait for an acknowledgement, and how long each waits.
+    """
+
+    def __init__(self, window: int, timeout: float, max_retries: int) -> None:
+        """
+        window: Most commands waiting for an acknowledgement at once.
+        timeout: Time in seconds without an acknowledgement before sending again.
+        max_retries: Most times a command is sent again before giving up on it.
+        """
+        self.window = window
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+
+class InFlightCommand:
+    """
+    Command sent and not yet acknowledged.
+    """
+
+    def __init__(self, command: int, params: "tuple[float, ...]", send_time: float) -> None:
+        """
+        command: MAV_CMD.
+        params: The 7 parameters of COMMAND_LONG, to send again unchanged.
+        send_time: Monotonic time in seconds of the first send.
+        """
+        self.command = command
+        self.params = params
+        self.send_time = send_time
+        self.last_send_time = send_time
+        # COMMAND_LONG confirmation field, incremented on every retransmission
+        self.confirmation = 0
+        # An acknowledgement can not be told apart from one of an earlier send
+        self.is_ambiguous = False
+
+
+class RttHistogram:
+    """
+    Round trip times in buckets doubling in width, with constant memory.
+    """
+
+    # Upper bounds of the buckets, from 1 ms to about 4 s, the last bucket has no bound
+    __BOUNDS = [0.001 * 2**i for i in range(13)]  # seconds
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(self.__BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, rtt: float) -> None:
+        """
+        Adds a round trip time in seconds.
+        """
+        self.counts[bisect.bisect_left(self.__BOUNDS, rtt)] += 1
+        self.count += 1
+        self.total += rtt
+        self.max = max(self.max, rtt)
+
+    def get_percentile(self, fraction: float) -> float:
+        """
+        Returns the upper bound in seconds of the bucket holding the given fraction of
+        round trip times, the maximum if it is the last bucket or below the bound.
+        0.0 if there are none.
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = fraction * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank and bucket_count > 0:
+                if index == len(self.__BOUNDS):
+                    return self.max
+
+                return min(self.__BOUNDS[index], self.max)
+
+        return self.max
+
+    def __str__(self) -> str:
+        """
+        To string.
+        """
+        if self.count == 0:
+            return "count: 0"
+
+        return (
+            f"count: {self.count}, "
+            f"mean: {self.total / self.count * 1000.0:.1f} ms, "
+            f"p50 <= {self.get_percentile(0.5) * 1000.0:.1f} ms, "
+            f"p99 <= {self.get_percentile(0.99) * 1000.0:.1f} ms, "
+            f"max: {self.max * 1000.0:.1f} ms"
+        )
+
+
+class CommandAckTracker:  # pylint: disable=too-many-instance-attributes
+    """
+    Table of commands waiting for COMMAND_ACK, matched by MAV_CMD since that is all an
+    acknowledgement identifies. So only one command of each type waits at a time, and a new
+    one of that type is refused until it completes or is given up on.
+    Never waits itself, the owner polls for acknowledgements and timeouts between decisions.
+    """
+
+    __private_key = object()
+
+    @classmethod
+    def create(cls, limits: AckLimits) -> "tuple[True, CommandAckTracker] | tuple[False, None]":
+        """
+        Falliable create (instantiation) method to create a CommandAckTracker object.
+        """
+        if limits.window < 1 or limits.timeout <= 0.0 or limits.max_retries < 0:
+            return False, None
+
+        return True, CommandAckTracker(cls.__private_key, limits)
+
+    def __init__(self, key: object, limits: AckLimits) -> None:
+        assert key is CommandAckTracker.__private_key, "Use create() method"
+
+        self.__limits = limits
+        # Waiting commands by MAV_CMD
+        self.__in_flight: "dict[int, InFlightCommand]" = {}
+        # Round trip times by MAV_CMD
+        self.__histograms: "dict[int, RttHistogram]" = {}
+        # Acknowledgements by MAV_RESULT
+        self.result_counts: "dict[int, int]" = {}
+        self.retransmit_count = 0
+        self.failed_count = 0
+        self.unmatched_count = 0
+        self.window_full_count = 0
+        self.type_waiting_count = 0
+
+    def can_send(self, command: int) -> bool:
+        """
+        Decides whether a command can be sent: no command of its type is waiting and the
+        window has room. Counts it if not.
+
+        command: MAV_CMD.
+        """
+        if command in self.__in_flight:
+            self.type_waiting_count += 1
+            return False
+
+        if len(self.__in_flight) >= self.__limits.window:
+            self.window_full_count += 1
+            return False
+
+        return True
+
+    def record_sent(self, command: int, params: "tuple[float, ...]", current_time: float) -> None:
+        """
+        Records a command that was sent with confirmation 0, after `can_send()` allowed it.
+
+        command: MAV_CMD.
+        params: The 7 parameters of COMMAND_LONG.
+        current_time: Monotonic time in seconds.
+        """
+        assert command not in self.__in_flight, "A command of this type is already waiting"
+
+        self.__in_flight[command] = InFlightCommand(command, params, current_time)
+
+    def handle_ack(self, command: int, result: int, current_time: float) -> bool:
+        """
+        Completes the waiting command of the acknowledged type, and records its round trip
+        time unless the acknowledgement could be for another send of it. A command still in
+        progress keeps waiting for its final result, with the timeout restarted so that it
+        is not sent again while the vehicle is working on it.
+
+        command: MAV_CMD of COMMAND_ACK.
+        result: MAV_RESULT of COMMAND_ACK.
+        current_time: Monotonic time in seconds the acknowledgement was received.
+
+        Returns whether a command was waiting for it.
+        """
+        self.result_counts[result] = self.result_counts.get(result, 0) + 1
+
+        in_flight_command = self.__in_flight.get(command)
+        if in_flight_command is None:
+            self.unmatched_count += 1
+            return False
+
+        if result == mavutil.mavlink.MAV_RESULT_IN_PROGRESS:
+            in_flight_command.last_send_time = current_time
+            return True
+
+        del self.__in_flight[command]
+        if not in_flight_command.is_ambiguous:
+            histogram = self.__histograms.get(command)
+            if histogram is None:
+                histogram = RttHistogram()
+                self.__histograms[command] = histogram
+
+            histogram.record(current_time - in_flight_command.send_time)
+
+        return True
+
+    def get_retransmissions(self, current_time: float) -> "list[InFlightCommand]":
+        """
+        Finds the commands whose acknowledgement timed out, and increments their confirmation
+        for sending again. Gives up on those sent the maximum number of times.
+
+        current_time: Monotonic time in seconds.
+
+        Returns the commands to send again.
+        """
+        retransmissions = []
+        for command, in_flight_command in list(self.__in_flight.items()):
+            if current_time - in_flight_command.last_send_time < self.__limits.timeout:
+                continue
+
+            if in_flight_command.confirmation >= self.__limits.max_retries:
+                del self.__in_flight[command]
+                self.failed_count += 1
+                continue
+
+            in_flight_command.confirmation += 1
+            in_flight_command.last_send_time = current_time
+            # Acknowledgements do not say which send they are for
+            in_flight_command.is_ambiguous = True
+            retransmissions.append(in_flight_command)
+
+        self.retransmit_count += len(retransmissions)
+        return retransmissions
+
+    def get_in_flight_count(self) -> int:
+        """
+        Returns the number of commands waiting for an acknowledgement.
+        """
+        return len(self.__in_flight)
+
+    def get_histograms(self) -> "dict[int, RttHistogram]":
+        """
+        Returns the round trip times by MAV_CMD.
+        """
+        return self.__histograms
+
+    def get_summary(self) -> str:
+        """
+        Counts and round trip times, for logging.
+        """
+        results = {
+            mavutil.mavlink.enums["MAV_RESULT"][result].name: count
+            for result, count in self.result_counts.items()
+            if result in mavutil.mavlink.enums["MAV_RESULT"]
+        }
+        lines = [
+            f"Acknowledgements: {results}, unmatched: {self.unmatched_count}, "
+            f"retransmitted: {self.retransmit_count}, failed: {self.failed_count}, "
+            f"window full: {self.window_full_count}, "
+            f"same type waiting: {self.type_waiting_count}"
+        ]
+        for command, histogram in self.__histograms.items():
+            name = mavutil.mavlink.enums["MAV_CMD"][command].name
+            lines.append(f"{name} round trip: {histogram}")
+
+        return "\n".join(lines)
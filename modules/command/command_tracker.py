@@ -0,0 +1,121 @@
+"""
+Suppression of redundant outbound commands.
+"""
+
+import math
+
+
+class CommandLimits:
+    """
+    When to send a command again. Times are in seconds, targets and errors are in the
+    units of the command (meters for altitude, radians for yaw).
+    """
+
+    def __init__(
+        self,
+        min_interval: float,
+        timeout: float,
+        target_tolerance: float,
+        min_progress: float,
+    ) -> None:
+        """
+        min_interval: Shortest time between two sends, even if the target changes.
+        timeout: Longest time an unchanged command is suppressed.
+        target_tolerance: Smallest target change that counts as a new command.
+        min_progress: Smallest error reduction over a minimum interval that counts as
+        converging.
+        """
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self.target_tolerance = target_tolerance
+        self.min_progress = min_progress
+
+
+class CommandTracker:
+    """
+    Tracks the last command of each type sent to the vehicle, and decides whether sending
+    another one is useful: only if the target changed, the last one timed out, or the
+    vehicle stopped converging towards it.
+    """
+
+    __private_key = object()
+
+    @classmethod
+    def create(
+        cls, limits: "dict[int, CommandLimits]"
+    ) -> "tuple[True, CommandTracker] | tuple[False, None]":
+        """
+        Falliable create (instantiation) method to create a CommandTracker object.
+
+        limits: Limits by MAV_CMD, commands without limits are never suppressed.
+        """
+        for command_limits in limits.values():
+            if command_limits.min_interval < 0.0 or command_limits.timeout < 0.0:
+                return False, None
+
+        return True, CommandTracker(cls.__private_key, limits)
+
+    def __init__(self, key: object, limits: "dict[int, CommandLimits]") -> None:
+        assert key is CommandTracker.__private_key, "Use create() method"
+
+        self.__limits = limits
+        # Send time and target of the last command sent, by MAV_CMD
+        self.__in_flight: "dict[int, tuple[float, float]]" = {}
+        # Time and error that progress is measured from, moved on at most once per minimum
+        # interval so that a stall after early progress is noticed, by MAV_CMD
+        self.__checkpoints: "dict[int, tuple[float, float]]" = {}
+        self.suppressed_count = 0
+
+    def should_send(
+        self, command: int, target: float, error: float, current_time: float, is_angle: bool
+    ) -> bool:
+        """
+        Decides whether to send a command. Counts it as suppressed if not.
+
+        command: MAV_CMD.
+        target: Value the command moves the vehicle to.
+        error: Distance from the target.
+        current_time: Monotonic time in seconds.
+        is_angle: Whether the target is an angle in radians, compared the short way around.
+        """
+        limits = self.__limits.get(command)
+        if limits is None or command not in self.__in_flight:
+            return True
+
+        send_time, sent_target = self.__in_flight[command]
+        elapsed = current_time - send_time
+        if elapsed < limits.min_interval:
+            self.suppressed_count += 1
+            return False
+
+        target_change = target - sent_target
+        if is_angle:
+            target_change = math.remainder(target_change, 2.0 * math.pi)
+
+        if abs(target_change) > limits.target_tolerance or elapsed >= limits.timeout:
+            return True
+
+        checkpoint_time, checkpoint_error = self.__checkpoints[command]
+        if current_time - checkpoint_time >= limits.min_interval:
+            # Not getting closer, the vehicle may have missed or rejected the command
+            if abs(checkpoint_error) - abs(error) < limits.min_progress:
+                return True
+
+            self.__checkpoints[command] = (current_time, error)
+
+        self.suppressed_count += 1
+        return False
+
+    def record_sent(self, command: int, target: float, error: float, current_time: float) -> None:
+        """
+        Records a command that was sent.
+        """
+        self.__in_flight[command] = (current_time, target)
+        self.__checkpoints[command] = (current_time, error)
+
+    def clear(self, command: int) -> None:
+        """
+        Forgets a command once its target is reached, so the next one is sent immediately.
+        """
+        self.__in_flight.pop(command, None)
+        self.__checkpoints.pop(command, None)
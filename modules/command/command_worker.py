@@ -8,20 +8,42 @@ import time
 
 from pymavlink import mavutil
 
+from utilities.statistics import streaming_statistics
 from utilities.workers import queue_proxy_wrapper
+from utilities.workers import shared_memory_blackboard
 from utilities.workers import worker_controller
 from . import command
+from . import command_ack_tracker
+from . import command_tracker
 from ..common.modules.logger import logger
+from ..router import mavlink_endpoint
+from ..telemetry import telemetry
 
 
 # =================================================================================================
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
+TELEMETRY_BATCH_SIZE = 16
+TELEMETRY_QUEUE_TIMEOUT = 0.1  # seconds
+BLACKBOARD_POLL_PERIOD = 0.01  # seconds
+# Most acknowledgements handled between two decisions
+ACK_BATCH_SIZE = 16
+# Velocity statistics, logged periodically instead of for every sample
+VELOCITY_SUMMARY_PERIOD = 5.0  # seconds
+VELOCITY_EWMA_ALPHA = 0.1
+VELOCITY_WINDOW_SIZE = 50  # samples
+VELOCITY_QUANTILES = [0.5, 0.95]
+
+
 def command_worker(
     target: command.Position,
     height_tolerance: float,
     angle_tolerance: float,
-    connection: mavutil.mavfile,
+    command_limits: "dict[int, command_tracker.CommandLimits] | None",
+    ack_limits: command_ack_tracker.AckLimits | None,
+    prediction_horizon: float | None,
+    connection: mavutil.mavfile | mavlink_endpoint.MavlinkEndpoint,
+    blackboard: shared_memory_blackboard.SharedMemoryBlackboard | None,
     telemetry_queue: queue_proxy_wrapper.QueueProxyWrapper,
     report_queue: queue_proxy_wrapper.QueueProxyWrapper,
     controller: worker_controller.WorkerController,
@@ -32,8 +54,14 @@ def command_worker(
     target: Target position to maintain
     height_tolerance: Tolerance for altitude adjustments (meters)
     angle_tolerance: Tolerance for yaw adjustments (degrees)
-    connection: MAVLink connection to the drone
-    telemetry_queue: Input queue receiving TelemetryData
+    command_limits: When to resend each command, None to send for every sample out of tolerance
+    ack_limits: When to send a command again without COMMAND_ACK, None to not wait for it,
+        the connection must receive COMMAND_ACK
+    prediction_horizon: Expected command latency (seconds) to hold off commands while the drone
+        is already moving into tolerance, None to react to the current state only
+    connection: MAVLink connection to the drone, or a router endpoint
+    blackboard: Latest TelemetryData, None to use the queue instead
+    telemetry_queue: Input queue receiving TelemetryData, unused with a blackboard
     report_queue: Output queue for action strings
     controller: Worker controller for managing worker state
     """
@@ -57,9 +85,32 @@ def command_worker(
     # =============================================================================================
     #                          ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
     # =============================================================================================
+    # Suppress commands that are already in progress
+    tracker = None
+    if command_limits is not None:
+        result, tracker = command_tracker.CommandTracker.create(command_limits)
+        if not result:
+            local_logger.error("Failed to create CommandTracker", True)
+            return
+
+    # Track acknowledgements without waiting for them
+    ack_tracker = None
+    if ack_limits is not None:
+        result, ack_tracker = command_ack_tracker.CommandAckTracker.create(ack_limits)
+        if not result:
+            local_logger.error("Failed to create CommandAckTracker", True)
+            return
+
     # Instantiate class object (command.Command)
     result, cmd = command.Command.create(
-        connection, target, height_tolerance, angle_tolerance, local_logger
+        connection,
+        target,
+        height_tolerance,
+        angle_tolerance,
+        local_logger,
+        tracker,
+        ack_tracker=ack_tracker,
+        prediction_horizon=prediction_horizon,
     )
     if not result:
         local_logger.error("Failed to create Command", True)
@@ -69,47 +120,100 @@ def command_worker(
 
     local_logger.info("Command created", True)
 
-    # Track cumulative velocities for average calculation
-    total_x_velocity = 0.0
-    total_y_velocity = 0.0
-    total_z_velocity = 0.0
-    data_count = 0
+    # Velocity statistics by axis
+    velocity_statistics = {
+        axis: streaming_statistics.StreamingStatistics(
+            VELOCITY_EWMA_ALPHA, VELOCITY_WINDOW_SIZE, VELOCITY_QUANTILES
+        )
+        for axis in ("x", "y", "z")
+    }
+    next_summary_time = time.monotonic() + VELOCITY_SUMMARY_PERIOD
+
+    last_version = 0
 
     # Main loop: do work.
     while not controller.is_exit_requested():
         controller.check_pause()
-        if not telemetry_queue.queue.empty():
-            telemetry_data = telemetry_queue.queue.get()
+
+        if ack_tracker is not None:
+            # Only what already arrived, the decision never waits for acknowledgements
+            for _ in range(ACK_BATCH_SIZE):
+                ack = connection.recv_match(type="COMMAND_ACK", blocking=False)
+                if ack is None:
+                    break
+
+                cmd.handle_ack(ack)
+
+            cmd.retransmit()
+
+        if blackboard is not None:
+            # Only the latest sample matters, skip any that were overwritten in between
+            version, data = blackboard.read()
+            if version == last_version or data is None:
+                controller.wait_for_exit(BLACKBOARD_POLL_PERIOD)
+                continue
+
+            last_version = version
+            telemetry_batch = [telemetry.TelemetryData.from_bytes(data)]
+        else:
+            # Drain the backlog in one call, waiting briefly when there is nothing to do
+            telemetry_batch = telemetry_queue.get_many(
+                TELEMETRY_BATCH_SIZE, TELEMETRY_QUEUE_TIMEOUT
+            )
+
+        actions = []
+        for telemetry_data in telemetry_batch:
             # local_logger.info(f"Received telemetry: {telemetry_data}", True)
 
             if telemetry_data is None:
                 continue
 
-            # Update cumulative velocities and count
+            # Update velocity statistics
             if telemetry_data.x_velocity is not None:
-                total_x_velocity += telemetry_data.x_velocity
+                velocity_statistics["x"].update(telemetry_data.x_velocity)
             if telemetry_data.y_velocity is not None:
-                total_y_velocity += telemetry_data.y_velocity
+                velocity_statistics["y"].update(telemetry_data.y_velocity)
             if telemetry_data.z_velocity is not None:
-                total_z_velocity += telemetry_data.z_velocity
-            data_count += 1
-
-            # Calculate and log average velocity vector
-            avg_x = total_x_velocity / data_count
-            avg_y = total_y_velocity / data_count
-            avg_z = total_z_velocity / data_count
-            local_logger.info(
-                f"Average Velocity - x: {avg_x}, y: {avg_y}, z: {avg_z}",
-                True,
-            )
+                velocity_statistics["z"].update(telemetry_data.z_velocity)
 
             result, action = cmd.run(telemetry_data)
 
             if result:
-                # Send action string to report queue
-                report_queue.queue.put(action)
-        else:
-            time.sleep(0.01)  # Small sleep when queue is empty
+                actions.append(action)
+
+        # Send action strings to report queue
+        if len(actions) > 0:
+            report_queue.put_many(actions)
+
+        # Periodically log velocity statistics, on a fixed grid so the period does not drift
+        # with the loop, skipping any summaries missed while the loop was blocked
+        current_time = time.monotonic()
+        if current_time >= next_summary_time:
+            log_velocity_statistics(velocity_statistics, local_logger)
+            while next_summary_time <= current_time:
+                next_summary_time += VELOCITY_SUMMARY_PERIOD
+
+    log_velocity_statistics(velocity_statistics, local_logger)
+
+    if tracker is not None:
+        local_logger.info(f"Suppressed commands: {tracker.suppressed_count}", True)
+
+    if ack_tracker is not None:
+        local_logger.info(ack_tracker.get_summary(), True)
+
+    if prediction_horizon is not None:
+        local_logger.info(f"Held commands: {cmd.held_count}", True)
+
+
+def log_velocity_statistics(
+    velocity_statistics: "dict[str, streaming_statistics.StreamingStatistics]",
+    local_logger: logger.Logger,
+) -> None:
+    """
+    Logs a summary of the velocity along each axis (m/s).
+    """
+    for axis, statistics in velocity_statistics.items():
+        local_logger.info(f"Velocity {axis}: {statistics.get_summary()}", True)
 
 
 # =================================================================================================
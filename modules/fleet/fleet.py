@@ -0,0 +1,248 @@
+"""
+Telemetry and command state of many vehicles, keyed by MAVLink system ID.
+"""
+
+import time
+
+from pymavlink import mavutil
+
+from ..command import command
+from ..command import command_tracker
+from ..common.modules.logger import logger
+from ..telemetry import telemetry
+
+
+class Vehicle:  # pylint: disable=too-many-instance-attributes
+    """
+    State of one vehicle.
+    """
+
+    def __init__(
+        self,
+        system_id: int,
+        link: int,
+        telem: telemetry.Telemetry,
+        cmd: command.Command,
+        current_time: float,
+    ) -> None:
+        """
+        system_id: MAVLink system ID.
+        link: Index of the link the vehicle was first seen on, commands are sent on it.
+        telem: Combines this vehicle's position and attitude.
+        cmd: Commands this vehicle.
+        current_time: Monotonic time the vehicle was first seen.
+        """
+        self.system_id = system_id
+        self.link = link
+        self.telemetry = telem
+        self.command = cmd
+        self.last_heartbeat_time = current_time
+        self.status = "Connected"
+        self.message_count = 0
+        self.command_count = 0
+
+
+class Fleet:  # pylint: disable=too-many-instance-attributes
+    """
+    Routes received messages by their source system ID to the state of that vehicle, and
+    makes the decision for that vehicle with its own Telemetry and Command. One Fleet
+    handles every vehicle on every link, instead of a set of workers per vehicle.
+    """
+
+    __private_key = object()
+
+    __TELEMETRY_TYPES = ("LOCAL_POSITION_NED", "ATTITUDE")
+
+    @classmethod
+    def create(
+        cls,
+        target: command.Position,
+        height_tolerance: float,
+        angle_tolerance: float,
+        command_limits: "dict[int, command_tracker.CommandLimits] | None",
+        max_age: float | None,
+        disconnect_timeout: float,
+        max_vehicles: int,
+        links: "list[object]",
+        local_logger: logger.Logger,
+    ) -> "tuple[True, Fleet] | tuple[False, None]":
+        """
+        Falliable create (instantiation) method to create a Fleet object.
+
+        target: Target position of every vehicle.
+        height_tolerance: Tolerance for altitude adjustments (meters).
+        angle_tolerance: Tolerance for yaw adjustments (degrees).
+        command_limits: When to resend each command, None to send for every sample
+        out of tolerance. Each vehicle is limited separately.
+        max_age: Oldest message in seconds to combine, None for no limit.
+        disconnect_timeout: Time in seconds without a heartbeat before a vehicle
+        is considered disconnected.
+        max_vehicles: Vehicles beyond this many are ignored.
+        links: Connection or endpoint to send commands through, one for each link.
+        local_logger: Existing logger from process.
+        """
+        if disconnect_timeout <= 0.0 or max_vehicles <= 0 or len(links) == 0:
+            local_logger.error(
+                "Disconnect timeout, maximum vehicles, and links must be greater than 0", True
+            )
+            return False, None
+
+        return True, Fleet(
+            cls.__private_key,
+            target,
+            height_tolerance,
+            angle_tolerance,
+            command_limits,
+            max_age,
+            disconnect_timeout,
+            max_vehicles,
+            links,
+            local_logger,
+        )
+
+    def __init__(
+        self,
+        key: object,
+        target: command.Position,
+        height_tolerance: float,
+        angle_tolerance: float,
+        command_limits: "dict[int, command_tracker.CommandLimits] | None",
+        max_age: float | None,
+        disconnect_timeout: float,
+        max_vehicles: int,
+        links: "list[object]",
+        local_logger: logger.Logger,
+    ) -> None:
+        assert key is Fleet.__private_key, "Use create() method"
+
+        self.target = target
+        self.local_logger = local_logger
+        self.__command_limits = command_limits
+        self.__max_age = max_age
+        self.__max_vehicles = max_vehicles
+        self.__links = links
+        # Vehicles by system ID
+        self.__vehicles: "dict[int, Vehicle]" = {}
+        self.ignored_count = 0
+        # pylint: disable=invalid-name
+        self.HEIGHT_TOLERANCE = height_tolerance
+        self.ANGLE_TOLERANCE = angle_tolerance
+        self.DISCONNECT_TIMEOUT = disconnect_timeout
+
+    def get_vehicles(self) -> "dict[int, Vehicle]":
+        """
+        Returns the vehicles seen so far by system ID.
+        """
+        return self.__vehicles
+
+    def process(self, link: int, msg: object) -> "tuple[True, str] | tuple[False, None]":
+        """
+        Updates the vehicle that sent the message, and commands it if needed.
+
+        link: Index of the link the message was received on.
+        msg: HEARTBEAT, LOCAL_POSITION_NED, or ATTITUDE.
+
+        Returns (True, report) if a command was sent or the vehicle reconnected,
+        (False, None) otherwise.
+        """
+        message_type = msg.get_type()
+        # Other ground stations are not vehicles
+        if message_type == "HEARTBEAT" and msg.type == mavutil.mavlink.MAV_TYPE_GCS:
+            return False, None
+
+        system_id = msg.get_srcSystem()
+        current_time = time.monotonic()
+        vehicle = self.__vehicles.get(system_id)
+        if vehicle is None:
+            vehicle = self.__add_vehicle(system_id, link, current_time)
+            if vehicle is None:
+                return False, None
+
+        vehicle.message_count += 1
+
+        if message_type == "HEARTBEAT":
+            vehicle.last_heartbeat_time = current_time
+            if vehicle.status == "Connected":
+                return False, None
+
+            vehicle.status = "Connected"
+            return True, f"Vehicle {system_id}: Connected"
+
+        if message_type not in self.__TELEMETRY_TYPES:
+            return False, None
+
+        sample = vehicle.telemetry.combine(msg, self.__max_age)
+        if sample is None:
+            return False, None
+
+        result, telemetry_data = sample
+        if not result:
+            return False, None
+
+        result, action = vehicle.command.run(telemetry_data)
+        if not result:
+            return False, None
+
+        vehicle.command_count += 1
+        return True, f"Vehicle {system_id}: {action}"
+
+    def check_heartbeats(self) -> "list[str]":
+        """
+        Finds vehicles whose last heartbeat is older than the disconnect timeout.
+
+        Returns a report for each vehicle that just disconnected.
+        """
+        current_time = time.monotonic()
+        reports = []
+        for vehicle in self.__vehicles.values():
+            if vehicle.status == "Disconnected":
+                continue
+
+            if current_time - vehicle.last_heartbeat_time >= self.DISCONNECT_TIMEOUT:
+                vehicle.status = "Disconnected"
+                reports.append(f"Vehicle {vehicle.system_id}: Disconnected")
+
+        return reports
+
+    def __add_vehicle(self, system_id: int, link: int, current_time: float) -> Vehicle | None:
+        """
+        Creates the state of a newly seen vehicle.
+
+        Returns the vehicle, None if there are too many.
+        """
+        if len(self.__vehicles) >= self.__max_vehicles:
+            self.ignored_count += 1
+            return None
+
+        connection = self.__links[link]
+
+        tracker = None
+        if self.__command_limits is not None:
+            result, tracker = command_tracker.CommandTracker.create(self.__command_limits)
+            if not result:
+                self.local_logger.error("Failed to create CommandTracker", True)
+                return None
+
+        # The connection is only used to send, messages are given to combine()
+        result, telem = telemetry.Telemetry.create(0.0, connection, self.local_logger)
+        if not result:
+            self.local_logger.error("Failed to create Telemetry", True)
+            return None
+
+        result, cmd = command.Command.create(
+            connection,
+            self.target,
+            self.HEIGHT_TOLERANCE,
+            self.ANGLE_TOLERANCE,
+            self.local_logger,
+            tracker,
+            system_id,
+        )
+        if not result:
+            self.local_logger.error("Failed to create Command", True)
+            return None
+
+        vehicle = Vehicle(system_id, link, telem, cmd, current_time)
+        self.__vehicles[system_id] = vehicle
+        self.local_logger.info(f"New vehicle {system_id} on link {link}", True)
+        return vehicle
@@ -0,0 +1,114 @@
+"""
+Fleet worker that commands every vehicle on every link.
+"""
+
+import os
+import pathlib
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_selector
+from utilities.workers import worker_controller
+from . import fleet
+from ..command import command
+from ..command import command_tracker  # pylint: disable=unused-import
+from ..common.modules.logger import logger
+from ..router import mavlink_endpoint
+
+
+def fleet_worker(
+    target: command.Position,
+    height_tolerance: float,
+    angle_tolerance: float,
+    command_limits: "dict[int, command_tracker.CommandLimits] | None",
+    max_age: float | None,
+    disconnect_timeout: float,
+    check_period: float,
+    max_vehicles: int,
+    links: "list[mavlink_endpoint.MavlinkEndpoint]",
+    report_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Worker process. Makes decisions for each vehicle based on its own telemetry.
+
+    target: Target position of every vehicle
+    height_tolerance: Tolerance for altitude adjustments (meters)
+    angle_tolerance: Tolerance for yaw adjustments (degrees)
+    command_limits: When to resend each command, None to send for every sample out of tolerance
+    max_age: Oldest message in seconds to combine, None for no limit
+    disconnect_timeout: Time in seconds without a heartbeat before a vehicle is disconnected
+    check_period: Longest time in seconds between checks of heartbeat deadlines and for exit
+    max_vehicles: Vehicles beyond this many are ignored
+    links: Router endpoint of each link, subscribed to HEARTBEAT, LOCAL_POSITION_NED, ATTITUDE
+    report_queue: Output queue for action and connection reports
+    controller: Worker controller for managing worker state
+    """
+    # Instantiate logger
+    worker_name = pathlib.Path(__file__).stem
+    process_id = os.getpid()
+    result, local_logger = logger.Logger.create(f"{worker_name}_{process_id}", True)
+    if not result:
+        print("ERROR: Worker failed to create logger")
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    local_logger.info("Logger initialized", True)
+
+    result, vehicles = fleet.Fleet.create(
+        target,
+        height_tolerance,
+        angle_tolerance,
+        command_limits,
+        max_age,
+        disconnect_timeout,
+        max_vehicles,
+        links,
+        local_logger,
+    )
+    if not result:
+        local_logger.error("Failed to create Fleet", True)
+        return
+
+    assert vehicles is not None
+
+    local_logger.info("Fleet created", True)
+
+    # Link of each inbound queue
+    inbound_queues = [link.get_inbound_queue() for link in links]
+    link_indices = {id(inbound_queue): i for i, inbound_queue in enumerate(inbound_queues)}
+    selector = queue_selector.QueueSelector(inbound_queues, controller)
+
+    # Main loop: do work.
+    while not controller.is_exit_requested():
+        controller.check_pause()
+
+        reports = []
+        for source, msg in selector.select(check_period):
+            # The router wakes up its subscribers with None on exit
+            if msg is None:
+                continue
+
+            result, report = vehicles.process(link_indices[id(source)], msg)
+            if result:
+                reports.append(report)
+
+        reports.extend(vehicles.check_heartbeats())
+
+        # Send reports to report queue
+        if len(reports) > 0:
+            report_queue.put_many(reports)
+
+    selector.close()
+
+    for system_id, vehicle in vehicles.get_vehicles().items():
+        local_logger.info(
+            f"Vehicle {system_id}: link {vehicle.link}, messages: {vehicle.message_count}, "
+            f"commands: {vehicle.command_count}, status: {vehicle.status}",
+            True,
+        )
+    if vehicles.ignored_count > 0:
+        local_logger.warning(
+            f"Ignored {vehicles.ignored_count} messages from vehicles beyond {max_vehicles}", True
+        )
@@ -2,9 +2,12 @@
 Heartbeat receiving logic.
 """
 
+import time
+
 from pymavlink import mavutil
 
 from ..common.modules.logger import logger
+from ..router import async_endpoint
 
 
 # =================================================================================================
@@ -20,61 +23,100 @@ class HeartbeatReceiver:
     @classmethod
     def create(
         cls,
-        disconnect_threshold: int,
-        connection: mavutil.mavfile,
+        disconnect_timeout: float,
+        check_period: float,
+        connection: mavutil.mavfile | async_endpoint.AsyncEndpoint,
         local_logger: logger.Logger,
     ) -> "tuple[True, HeartbeatReceiver] | tuple[False, None]":
         """
         Falliable create (instantiation) method to create a HeartbeatReceiver object.
+
+        disconnect_timeout: Time in seconds without a heartbeat before considering disconnected.
+        check_period: Longest time in seconds `run()` waits, so the caller can check for exit.
         """
+        if disconnect_timeout <= 0.0 or check_period <= 0.0:
+            local_logger.error("Disconnect timeout and check period must be greater than 0", True)
+            return False, None
+
         return True, HeartbeatReceiver(
-            cls.__private_key, disconnect_threshold, connection, local_logger
+            cls.__private_key, disconnect_timeout, check_period, connection, local_logger
         )
 
     def __init__(
         self,
         key: object,
-        disconnect_threshold: int,
-        connection: mavutil.mavfile,
+        disconnect_timeout: float,
+        check_period: float,
+        connection: mavutil.mavfile | async_endpoint.AsyncEndpoint,
         local_logger: logger.Logger,
     ) -> None:
         assert key is HeartbeatReceiver.__private_key, "Use create() method"
 
         self.connection = connection
         self.local_logger = local_logger
-        self.missed_heartbeats = 0
         self.status = "Connected"  # Start as Connected
+        # The deadline starts from creation, as if a heartbeat had just arrived
+        self.last_heartbeat_time = time.monotonic()
         # pylint: disable=invalid-name
-        self.DISCONNECT_THRESHOLD = disconnect_threshold
+        self.DISCONNECT_TIMEOUT = disconnect_timeout
+        self.CHECK_PERIOD = check_period
 
     def run(
         self,
     ) -> str:
         """
         Attempt to recieve a heartbeat message.
-        If disconnected for over a threshold number of periods,
+        If no heartbeat has arrived within the disconnect timeout,
         the connection is considered disconnected.
 
+        Returns as soon as a heartbeat arrives, the deadline passes, or the check period ends,
+        so a status change is seen immediately.
+
         Returns the current connection status as a string.
         """
-        # Try to receive a HEARTBEAT message with 1 second timeout
-        msg = self.connection.recv_match(type="HEARTBEAT", blocking=True, timeout=1.0)
+        msg = self.connection.recv_match(
+            type="HEARTBEAT", blocking=True, timeout=self.__wait_time()
+        )
+        return self.__update(msg)
+
+    async def run_async(
+        self,
+    ) -> str:
+        """
+        Same as `run()` , waiting on an async endpoint without blocking the event loop.
 
+        Returns the current connection status as a string.
+        """
+        msg = await self.connection.recv_match_async(type="HEARTBEAT", timeout=self.__wait_time())
+        return self.__update(msg)
+
+    def __wait_time(self) -> float:
+        """
+        Time in seconds to wait for a heartbeat: until the deadline, at most the check period.
+        """
+        if self.status == "Disconnected":
+            return self.CHECK_PERIOD
+
+        deadline = self.last_heartbeat_time + self.DISCONNECT_TIMEOUT
+        return min(max(deadline - time.monotonic(), 0.0), self.CHECK_PERIOD)
+
+    def __update(self, msg: "object | None") -> str:
+        """
+        Updates the connection status with the result of one receive.
+        """
+        current_time = time.monotonic()
         if msg and msg.get_type() == "HEARTBEAT":
-            # Received heartbeat successfully
-            self.missed_heartbeats = 0
+            self.last_heartbeat_time = current_time
+            if self.status != "Connected":
+                self.local_logger.info("Connection restored", True)
             self.status = "Connected"
             self.local_logger.info("Received heartbeat", True)
-        else:
-            # Missed a heartbeat
-            self.missed_heartbeats += 1
-            self.local_logger.warning(f"Missed heartbeat (count: {self.missed_heartbeats})", True)
-
-            if self.missed_heartbeats >= self.DISCONNECT_THRESHOLD:
-                self.status = "Disconnected"
-                self.local_logger.error(
-                    f"Connection lost after {self.missed_heartbeats} missed heartbeats", True
-                )
+            return self.status
+
+        elapsed = current_time - self.last_heartbeat_time
+        if self.status == "Connected" and elapsed >= self.DISCONNECT_TIMEOUT:
+            self.status = "Disconnected"
+            self.local_logger.error(f"Connection lost, no heartbeat for {elapsed:.3f} s", True)
 
         return self.status
 
@@ -11,22 +11,25 @@ from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
 from . import heartbeat_receiver
 from ..common.modules.logger import logger
+from ..router import mavlink_endpoint
 
 
 # =================================================================================================
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
 def heartbeat_receiver_worker(
-    disconnect_threshold: int,
-    connection: mavutil.mavfile,
+    disconnect_timeout: float,
+    check_period: float,
+    connection: mavutil.mavfile | mavlink_endpoint.MavlinkEndpoint,
     report_queue: queue_proxy_wrapper.QueueProxyWrapper,
     controller: worker_controller.WorkerController,
 ) -> None:
     """
     Worker process.
 
-    disconnect_threshold: Number of missed heartbeats before considering disconnected
-    connection: MAVLink connection to the drone
+    disconnect_timeout: Time in seconds without a heartbeat before considering disconnected
+    check_period: Longest time in seconds between checks of the deadline and for exit
+    connection: MAVLink connection to the drone, or a router endpoint
     report_queue: Queue to send status reports to main process
     controller: Worker controller for managing worker state
     """
@@ -52,7 +55,7 @@ def heartbeat_receiver_worker(
     # =============================================================================================
     # Instantiate class object (heartbeat_receiver.HeartbeatReceiver)
     result, receiver = heartbeat_receiver.HeartbeatReceiver.create(
-        disconnect_threshold, connection, local_logger
+        disconnect_timeout, check_period, connection, local_logger
     )
     if not result:
         local_logger.error("Failed to create HeartbeatReceiver", True)
@@ -62,15 +65,21 @@ def heartbeat_receiver_worker(
 
     local_logger.info("HeartbeatReceiver created", True)
 
+    # Report the initial status, then only changes
+    last_status = None
+
     # Main loop: do work.
     while not controller.is_exit_requested():
         controller.check_pause()
         # Run the receiver to check for heartbeats
         status = receiver.run()
+        if status == last_status:
+            continue
 
         # Send status report to queue
-        report_queue.queue.put(status)
+        report_queue.put(status)
         local_logger.info(f"Status: {status}", True)
+        last_status = status
 
 
 # =================================================================================================
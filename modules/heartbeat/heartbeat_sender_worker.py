@@ -4,26 +4,29 @@ Heartbeat worker that sends heartbeats periodically.
 
 import os
 import pathlib
-import time
 
 from pymavlink import mavutil
 
+from utilities.workers import periodic_scheduler
 from utilities.workers import worker_controller
 from . import heartbeat_sender
 from ..common.modules.logger import logger
+from ..router import mavlink_endpoint
 
 
 # =================================================================================================
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
 def heartbeat_sender_worker(
-    connection: mavutil.mavfile,
+    period: float,
+    connection: mavutil.mavfile | mavlink_endpoint.MavlinkEndpoint,
     controller: worker_controller.WorkerController,
 ) -> None:
     """
     Worker process. Sends heartbeat messages to the drone.
 
-    connection: MAVLink connection to the drone
+    period: Time in seconds between heartbeats
+    connection: MAVLink connection to the drone, or a router endpoint
     controller: Worker controller for managing worker state
     """
     # =============================================================================================
@@ -56,13 +59,18 @@ def heartbeat_sender_worker(
 
     local_logger.info("HeartbeatSender created", True)
 
+    # Deadlines do not move when sending or logging is slow
+    scheduler = periodic_scheduler.PeriodicScheduler(period)
+
     # Main loop: do work.
     while not controller.is_exit_requested():
         controller.check_pause()
         sender.run()
         local_logger.info("Heartbeat sent", True)
-        time.sleep(1)  # Send once per second
+        # Wake up early on exit
+        scheduler.wait(controller.wait_for_exit)
 
+    local_logger.info(f"Heartbeat schedule: {scheduler.get_statistics()}", True)
     local_logger.info("Worker exiting", True)
 
 
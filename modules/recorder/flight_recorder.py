@@ -0,0 +1,121 @@
+"""
+Records MAVLink traffic to a file for replay.
+
+A recording is an append-only file of records, each a MAVLink frame with the host
+monotonic time it was read or written, next to a sparse index of time to file offset
+for seeking.
+"""
+
+import io
+import pathlib
+import struct
+import threading
+
+from ..common.modules.logger import logger
+
+
+# Recording file starts with this
+RECORDING_MAGIC = b"MAVREC1\0"
+# Index file starts with this
+INDEX_MAGIC = b"MAVIDX1\0"
+INDEX_SUFFIX = ".idx"
+
+# Record header: monotonic time in seconds, direction, frame length
+RECORD_HEADER = struct.Struct("<dBH")
+# Index entry: monotonic time in seconds, file offset of the first record at or after it
+INDEX_ENTRY = struct.Struct("<dQ")
+
+# Direction of a frame
+INBOUND = 0
+OUTBOUND = 1
+
+
+def get_index_path(path: pathlib.Path) -> pathlib.Path:
+    """
+    Returns the path of the index of a recording.
+    """
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+class FlightRecorder:
+    """
+    Appends frames to a recording. Safe to use from several threads.
+    """
+
+    __private_key = object()
+
+    # Write to disk in large blocks
+    __BUFFER_SIZE = 1 << 20  # bytes
+
+    @classmethod
+    def create(
+        cls, path: pathlib.Path, index_period: float, local_logger: logger.Logger
+    ) -> "tuple[True, FlightRecorder] | tuple[False, None]":
+        """
+        Falliable create (instantiation) method to create a FlightRecorder object.
+        Replaces the recording if it exists, since monotonic time restarts with the host.
+
+        path: Recording file.
+        index_period: Time in seconds between index entries.
+        local_logger: Existing logger from process.
+        """
+        if index_period <= 0.0:
+            local_logger.error("Index period must be greater than 0", True)
+            return False, None
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Closed by close()
+            # pylint: disable-next=consider-using-with
+            recording_file = open(path, "wb", buffering=cls.__BUFFER_SIZE)
+            # pylint: disable-next=consider-using-with
+            index_file = open(get_index_path(path), "wb")
+        except OSError as e:
+            local_logger.error(f"Failed to open recording {path}: {e}", True)
+            return False, None
+
+        recording_file.write(RECORDING_MAGIC)
+        index_file.write(INDEX_MAGIC)
+
+        return True, FlightRecorder(cls.__private_key, recording_file, index_file, index_period)
+
+    def __init__(
+        self,
+        key: object,
+        recording_file: io.BufferedWriter,
+        index_file: io.BufferedWriter,
+        index_period: float,
+    ) -> None:
+        assert key is FlightRecorder.__private_key, "Use create() method"
+
+        self.__recording_file = recording_file
+        self.__index_file = index_file
+        self.__index_period = index_period
+        self.__next_index_time = None
+        self.__lock = threading.Lock()
+        self.frame_count = 0
+
+    def record(self, direction: int, frame: bytes, timestamp: float) -> None:
+        """
+        Appends a frame.
+
+        direction: INBOUND or OUTBOUND.
+        frame: Encoded MAVLink frame.
+        timestamp: Monotonic time in seconds when the frame was read or written.
+        """
+        with self.__lock:
+            if self.__next_index_time is None or timestamp >= self.__next_index_time:
+                self.__index_file.write(INDEX_ENTRY.pack(timestamp, self.__recording_file.tell()))
+                self.__next_index_time = timestamp + self.__index_period
+
+            self.__recording_file.write(RECORD_HEADER.pack(timestamp, direction, len(frame)))
+            self.__recording_file.write(frame)
+            self.frame_count += 1
+
+    def close(self) -> None:
+        """
+        Writes everything to disk and closes the files.
+        """
+        with self.__lock:
+            self.__recording_file.close()
+            self.__index_file.close()
@@ -0,0 +1,166 @@
+"""
+Plays back a recording made by the flight recorder.
+"""
+
+import bisect
+import pathlib
+import time
+from collections.abc import Iterator
+
+from . import flight_recorder
+from ..common.modules.logger import logger
+
+
+class FlightReplayer:
+    """
+    Reads frames from a recording, starting anywhere with the index, and writes them out
+    with their recorded timing at any speed.
+    """
+
+    __private_key = object()
+
+    # Frames written at once at maximum speed
+    __MAX_SPEED_BATCH_SIZE = 1 << 16  # bytes
+
+    @classmethod
+    def create(
+        cls, path: pathlib.Path, local_logger: logger.Logger
+    ) -> "tuple[True, FlightReplayer] | tuple[False, None]":
+        """
+        Falliable create (instantiation) method to create a FlightReplayer object.
+
+        path: Recording file. Without its index, every read starts from the beginning.
+        local_logger: Existing logger from process.
+        """
+        try:
+            with open(path, "rb") as recording_file:
+                magic = recording_file.read(len(flight_recorder.RECORDING_MAGIC))
+        except OSError as e:
+            local_logger.error(f"Failed to open recording {path}: {e}", True)
+            return False, None
+
+        if magic != flight_recorder.RECORDING_MAGIC:
+            local_logger.error(f"{path} is not a recording", True)
+            return False, None
+
+        index_times = []
+        index_offsets = []
+        try:
+            with open(flight_recorder.get_index_path(path), "rb") as index_file:
+                data = index_file.read()
+        except OSError:
+            local_logger.warning(f"No index for {path}, seeking from the start", True)
+            data = b""
+
+        if data.startswith(flight_recorder.INDEX_MAGIC):
+            entries = data[len(flight_recorder.INDEX_MAGIC) :]
+            # Ignore a partly written last entry
+            usable_size = len(entries) - len(entries) % flight_recorder.INDEX_ENTRY.size
+            for index_time, offset in flight_recorder.INDEX_ENTRY.iter_unpack(
+                entries[:usable_size]
+            ):
+                index_times.append(index_time)
+                index_offsets.append(offset)
+
+        return True, FlightReplayer(cls.__private_key, path, index_times, index_offsets)
+
+    def __init__(
+        self,
+        key: object,
+        path: pathlib.Path,
+        index_times: "list[float]",
+        index_offsets: "list[int]",
+    ) -> None:
+        assert key is FlightReplayer.__private_key, "Use create() method"
+
+        self.__path = path
+        self.__index_times = index_times
+        self.__index_offsets = index_offsets
+
+    def read(self, start_time: float | None = None) -> "Iterator[tuple[float, int, bytes]]":
+        """
+        Reads records in order. A partly written last record is ignored.
+
+        start_time: Skip records before this recorded time, None to start at the beginning.
+
+        Yields the recorded time, direction, and frame of each record.
+        """
+        offset = len(flight_recorder.RECORDING_MAGIC)
+        if start_time is not None:
+            # Last index entry at or before the start
+            position = bisect.bisect_right(self.__index_times, start_time) - 1
+            if position >= 0:
+                offset = self.__index_offsets[position]
+
+        header = flight_recorder.RECORD_HEADER
+        with open(self.__path, "rb") as recording_file:
+            recording_file.seek(offset)
+            while True:
+                header_data = recording_file.read(header.size)
+                if len(header_data) < header.size:
+                    return
+
+                timestamp, direction, length = header.unpack(header_data)
+                frame = recording_file.read(length)
+                if len(frame) < length:
+                    return
+
+                if start_time is not None and timestamp < start_time:
+                    continue
+
+                yield timestamp, direction, frame
+
+    def replay(
+        self,
+        write: "(...) -> object",  # type: ignore
+        speed: float | None,
+        direction: int = flight_recorder.INBOUND,
+        start_time: float | None = None,
+    ) -> int:
+        """
+        Writes recorded frames with the recorded time between them.
+
+        write: Called with the frame bytes, for example a socket's sendall.
+        speed: Multiple of recorded speed, None for as fast as possible.
+        direction: Which frames to write.
+        start_time: Recorded time to start from, None for the beginning.
+
+        Returns the number of frames written.
+        """
+        assert speed is None or speed > 0.0, "Speed must be greater than 0"
+
+        count = 0
+        first_time = None
+        replay_start_time = time.monotonic()
+        batch = []
+        batch_size = 0
+        for timestamp, frame_direction, frame in self.read(start_time):
+            if frame_direction != direction:
+                continue
+
+            count += 1
+            if speed is None:
+                # Fewer, larger writes
+                batch.append(frame)
+                batch_size += len(frame)
+                if batch_size >= self.__MAX_SPEED_BATCH_SIZE:
+                    write(b"".join(batch))
+                    batch.clear()
+                    batch_size = 0
+                continue
+
+            if first_time is None:
+                first_time = timestamp
+
+            # Absolute due time so sleep overshoot does not add up
+            due_time = replay_start_time + (timestamp - first_time) / speed
+            delay = due_time - time.monotonic()
+            if delay > 0.0:
+                time.sleep(delay)
+
+            write(frame)
+
+        if len(batch) > 0:
+            write(b"".join(batch))
+
+        return count
@@ -0,0 +1,134 @@
+"""
+Coroutine side of the MAVLink router, in the process owning the router.
+"""
+
+import asyncio
+import collections
+import time
+
+from pymavlink import mavutil
+
+
+class AsyncEndpoint:
+    """
+    Stands in for the MAVLink connection in a coroutine running on the same event loop
+    as the router.
+
+    The router puts received messages of the subscribed types straight into the endpoint,
+    and `recv_match_async()` waits for them without blocking the loop. Sends through `mav`
+    like a connection, each encoded frame is written by the router immediately.
+    """
+
+    def __init__(
+        self,
+        message_types: "list[str]",
+        max_size: int,
+        send: "(list[bytes]) -> None",  # type: ignore
+        source_system: int,
+        source_component: int,
+    ) -> None:
+        """
+        message_types: Types of message to receive, empty for send only.
+        max_size: Maximum number of received messages kept, the oldest are dropped.
+        send: Writes encoded frames to the connection, usually `MavlinkRouter.send` .
+        source_system: MAVLink system ID of sent messages.
+        source_component: MAVLink component ID of sent messages.
+        """
+        assert max_size > 0, "Maximum size must be greater than 0"
+
+        self.__message_types = list(message_types)
+        self.__send = send
+        self.__pending = collections.deque(maxlen=max_size)
+        self.__arrived = asyncio.Event()
+        self.__is_closed = False
+        self.mav = mavutil.mavlink.MAVLink(self, source_system, source_component)
+
+    def get_message_types(self) -> "list[str]":
+        """
+        Returns the subscribed message types.
+        """
+        return self.__message_types
+
+    def get_inbound_queue(self) -> "AsyncEndpoint":
+        """
+        The endpoint is its own inbound queue.
+        """
+        return self
+
+    def put_many(  # pylint: disable=unused-argument
+        self, items: "list[object]", timeout: float | None = None
+    ) -> int:
+        """
+        Called by the router with received messages. Never waits, a None closes the endpoint.
+
+        Returns the number of items put.
+        """
+        for item in items:
+            if item is None:
+                self.__is_closed = True
+            else:
+                self.__pending.append(item)
+
+        self.__arrived.set()
+        return len(items)
+
+    def put(self, item: object, timeout: float | None = None) -> bool:
+        """
+        Called by the router with a single message, or None to close the endpoint.
+        """
+        return self.put_many([item], timeout) == 1
+
+    def write(self, buffer: "bytes | bytearray") -> None:
+        """
+        Called by `mav` with each encoded frame.
+        """
+        self.__send([bytes(buffer)])
+
+    async def recv_match_async(
+        self,
+        type: "str | list[str] | None" = None,  # pylint: disable=redefined-builtin
+        timeout: float | None = None,
+    ) -> "object | None":
+        """
+        Receives the oldest message of the given type. Messages of other subscribed types
+        are kept for later calls instead of being thrown away.
+
+        type: Message type or types to match, None for any.
+        timeout: Time waiting in seconds, None waits forever.
+
+        Returns the message, None if there was none in time or the endpoint was closed.
+        """
+        if isinstance(type, str):
+            type = [type]
+
+        end_time = None if timeout is None else time.monotonic() + timeout
+        while True:
+            message = self.__pop_pending(type)
+            if message is not None:
+                return message
+
+            if self.__is_closed:
+                return None
+
+            remaining_time = None
+            if end_time is not None:
+                remaining_time = end_time - time.monotonic()
+                if remaining_time <= 0.0:
+                    return None
+
+            self.__arrived.clear()
+            try:
+                await asyncio.wait_for(self.__arrived.wait(), remaining_time)
+            except asyncio.TimeoutError:
+                return None
+
+    def __pop_pending(self, message_types: "list[str] | None") -> "object | None":
+        """
+        Removes and returns the oldest pending message of the given types.
+        """
+        for index, message in enumerate(self.__pending):
+            if message_types is None or message.get_type() in message_types:
+                del self.__pending[index]
+                return message
+
+        return None
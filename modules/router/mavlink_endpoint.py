@@ -0,0 +1,168 @@
+"""
+Worker side of the MAVLink router.
+"""
+
+import collections
+import time
+
+from pymavlink import mavutil
+
+from utilities.workers import queue_proxy_wrapper
+
+
+class MavlinkEndpoint:
+    """
+    Stands in for the MAVLink connection in a worker process.
+
+    Receives only the subscribed message types, already parsed by the router, through
+    `recv_match()` . Sends through `mav` like a connection, the encoded frames are written
+    to the connection by the router.
+
+    Frames that time out waiting for the outbound queue and received messages pushed out
+    of the pending messages are counted as drops of the outbound and inbound queue.
+    """
+
+    # Maximum number of messages taken from the inbound queue at once
+    __BATCH_SIZE = 16
+    # Maximum number of received messages kept while waiting for another type
+    __PENDING_MAX_SIZE = 64
+    # How long a blocking receive without a timeout waits between checks
+    __BLOCKING_POLL_PERIOD = 1.0  # seconds
+    # How long a send waits for space in the outbound queue, which only fills up if the
+    # router stopped taking frames
+    __WRITE_TIMEOUT = 0.5  # seconds
+
+    def __init__(
+        self,
+        message_types: "list[str]",
+        inbound_queue: queue_proxy_wrapper.QueueProxyWrapper | None,
+        outbound_queue: queue_proxy_wrapper.QueueProxyWrapper,
+        source_system: int,
+        source_component: int,
+    ) -> None:
+        """
+        message_types: Types of message to receive, empty for send only.
+        inbound_queue: Queue the router puts received messages into, None for send only.
+        outbound_queue: Queue of encoded frames for the router to send, shared by all endpoints.
+        source_system: MAVLink system ID of sent messages.
+        source_component: MAVLink component ID of sent messages.
+        """
+        assert (len(message_types) == 0) == (
+            inbound_queue is None
+        ), "Subscribed endpoints need an inbound queue"
+
+        self.__message_types = list(message_types)
+        self.__inbound_queue = inbound_queue
+        self.__outbound_queue = outbound_queue
+        self.__source_system = source_system
+        self.__source_component = source_component
+        self.__pending = collections.deque(maxlen=self.__PENDING_MAX_SIZE)
+        self.mav = mavutil.mavlink.MAVLink(self, source_system, source_component)
+
+    def __getstate__(self) -> dict:
+        """
+        The encoder and pending messages belong to the process using the endpoint.
+        """
+        state = self.__dict__.copy()
+        del state["mav"]
+        del state["_MavlinkEndpoint__pending"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.__pending = collections.deque(maxlen=self.__PENDING_MAX_SIZE)
+        self.mav = mavutil.mavlink.MAVLink(self, self.__source_system, self.__source_component)
+
+    def get_message_types(self) -> "list[str]":
+        """
+        Returns the subscribed message types.
+        """
+        return self.__message_types
+
+    def get_inbound_queue(self) -> queue_proxy_wrapper.QueueProxyWrapper | None:
+        """
+        Returns the queue of received messages.
+        """
+        return self.__inbound_queue
+
+    def write(self, buffer: "bytes | bytearray") -> None:
+        """
+        Called by `mav` with each encoded frame.
+        """
+        if not self.__outbound_queue.put(bytes(buffer), self.__WRITE_TIMEOUT):
+            self.__outbound_queue.record_drops(1)
+
+    # Same signature as mavutil.mavfile.recv_match()
+    def recv_match(  # pylint: disable=redefined-builtin,unused-argument
+        self,
+        condition: str | None = None,
+        type: "str | list[str] | None" = None,
+        blocking: bool = False,
+        timeout: float | None = None,
+    ) -> "object | None":
+        """
+        Receives the oldest message of the given type. Messages of other subscribed types
+        are kept for later calls instead of being thrown away. `condition` is not supported.
+
+        type: Message type or types to match, None for any.
+        blocking: Wait for a message.
+        timeout: Time waiting in seconds when blocking, None waits forever.
+
+        Returns the message, None if there was none in time.
+        """
+        if self.__inbound_queue is None:
+            return None
+
+        if isinstance(type, str):
+            type = [type]
+
+        message = self.__pop_pending(type)
+        if message is not None:
+            return message
+
+        end_time = None
+        if blocking and timeout is not None:
+            end_time = time.monotonic() + timeout
+
+        while True:
+            if not blocking:
+                wait = 0.0
+            elif end_time is None:
+                wait = self.__BLOCKING_POLL_PERIOD
+            else:
+                wait = max(end_time - time.monotonic(), 0.0)
+
+            messages = self.__inbound_queue.get_many(self.__BATCH_SIZE, wait)
+            # The router wakes up blocked receivers with None on exit
+            if None in messages:
+                self.__add_pending([message for message in messages if message is not None])
+                return None
+
+            self.__add_pending(messages)
+            message = self.__pop_pending(type)
+            if message is not None:
+                return message
+
+            if not blocking or (end_time is not None and time.monotonic() >= end_time):
+                return None
+
+    def __add_pending(self, messages: "list[object]") -> None:
+        """
+        Keeps the messages, pushing out the oldest pending messages when full.
+        """
+        overflow_count = len(self.__pending) + len(messages) - self.__PENDING_MAX_SIZE
+        if overflow_count > 0:
+            self.__inbound_queue.record_drops(overflow_count)
+
+        self.__pending.extend(messages)
+
+    def __pop_pending(self, message_types: "list[str] | None") -> "object | None":
+        """
+        Removes and returns the oldest pending message of the given types.
+        """
+        for index, message in enumerate(self.__pending):
+            if message_types is None or message.get_type() in message_types:
+                del self.__pending[index]
+                return message
+
+        return None
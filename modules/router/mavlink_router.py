@@ -0,0 +1,198 @@
+"""
+Owns the MAVLink connection on behalf of all other workers.
+"""
+
+import errno
+import threading
+import time
+
+from pymavlink import mavutil
+
+from . import async_endpoint
+from . import mavlink_endpoint
+from ..recorder import flight_recorder
+from ..common.modules.logger import logger
+
+
+class MavlinkRouter:  # pylint: disable=too-many-instance-attributes
+    """
+    Reads the connection in large chunks, parses every received frame once, and forwards
+    the message to the endpoints subscribed to its type. Writes the frames sent by endpoints
+    one at a time, so frames from different workers never interleave on the connection.
+    """
+
+    __private_key = object()
+
+    # Maximum bytes read at once
+    __READ_SIZE = 65536
+
+    @classmethod
+    def create(
+        cls,
+        connection: mavutil.mavfile,
+        endpoints: "list[mavlink_endpoint.MavlinkEndpoint]",
+        local_logger: logger.Logger,
+        recorder: flight_recorder.FlightRecorder | None = None,
+    ) -> "tuple[True, MavlinkRouter] | tuple[False, None]":
+        """
+        Falliable create (instantiation) method to create a MavlinkRouter object.
+
+        connection: MAVLink connection to the drone, not used by anything else.
+        endpoints: Endpoints of the other workers.
+        local_logger: Existing logger from process.
+        recorder: Records every frame received and sent, None to not record.
+        """
+        subscriptions: "dict[str, list]" = {}
+        for endpoint in endpoints:
+            inbound_queue = endpoint.get_inbound_queue()
+            for message_type in endpoint.get_message_types():
+                subscriptions.setdefault(message_type, []).append(inbound_queue)
+
+        return True, MavlinkRouter(
+            cls.__private_key, connection, subscriptions, local_logger, recorder
+        )
+
+    def __init__(
+        self,
+        key: object,
+        connection: mavutil.mavfile,
+        subscriptions: "dict[str, list]",
+        local_logger: logger.Logger,
+        recorder: flight_recorder.FlightRecorder | None,
+    ) -> None:
+        assert key is MavlinkRouter.__private_key, "Use create() method"
+
+        self.connection = connection
+        self.local_logger = local_logger
+        # Inbound queues by message type
+        self.__subscriptions = subscriptions
+        self.__recorder = recorder
+        self.__write_lock = threading.Lock()
+        self.__buffer = bytearray(self.__READ_SIZE)
+        self.__buffer_view = memoryview(self.__buffer)
+        # Messages received by type, including unsubscribed types
+        self.receive_counts: "dict[str, int]" = {}
+        # Socket that reached end of file or was reset, never read again
+        self.__closed_port = None
+
+    def add_endpoint(
+        self, endpoint: mavlink_endpoint.MavlinkEndpoint | async_endpoint.AsyncEndpoint
+    ) -> None:
+        """
+        Subscribes an endpoint created after the router, such as one that sends through it.
+        """
+        inbound_queue = endpoint.get_inbound_queue()
+        for message_type in endpoint.get_message_types():
+            self.__subscriptions.setdefault(message_type, []).append(inbound_queue)
+
+    def receive(self, timeout: float) -> int:
+        """
+        Waits until the connection has data, then reads everything available at once,
+        parses all complete frames, and forwards the messages to their subscribers
+        with one put per subscriber. Does not wait for subscribers, a full inbound queue
+        is handled by its overflow policy.
+
+        timeout: Time waiting in seconds for data.
+
+        Returns the number of messages received.
+        """
+        messages = self.__read_messages(timeout)
+        if self.__recorder is not None and len(messages) > 0:
+            receive_time = time.monotonic()
+            for message in messages:
+                if message.get_type() != "BAD_DATA":
+                    self.__recorder.record(
+                        flight_recorder.INBOUND, message.get_msgbuf(), receive_time
+                    )
+
+        batches: "dict[int, tuple[object, list]]" = {}
+        for message in messages:
+            message_type = message.get_type()
+            self.receive_counts[message_type] = self.receive_counts.get(message_type, 0) + 1
+            if message_type == "BAD_DATA":
+                continue
+
+            for inbound_queue in self.__subscriptions.get(message_type, []):
+                batches.setdefault(id(inbound_queue), (inbound_queue, []))[1].append(message)
+
+        for inbound_queue, batch in batches.values():
+            inbound_queue.put_many(batch, 0.0)
+
+        return len(messages)
+
+    def __read_messages(self, timeout: float) -> "list[object]":
+        """
+        Reads one chunk and parses every complete frame in it.
+        Incomplete frames stay in the parser until the next read.
+        """
+        if not self.is_connected():
+            # A socket at end of file is always readable, wait instead of spinning on it
+            time.sleep(timeout)
+            return []
+
+        if not self.connection.select(timeout):
+            return []
+
+        port = getattr(self.connection, "port", None)
+        if isinstance(self.connection, mavutil.mavtcp) and port is not None:
+            # Read straight into the reused buffer
+            try:
+                count = port.recv_into(self.__buffer)
+            except OSError as exception:
+                if exception.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return []
+
+                # Reset or otherwise broken, same as the peer closing it
+                self.local_logger.warning(f"Connection failed: {exception!r}", True)
+                count = 0
+
+            if count == 0:
+                self.__closed_port = port
+                # Reconnects if the connection was opened with autoreconnect
+                self.connection.handle_eof()
+                return []
+
+            data = self.__buffer_view[:count]
+        else:
+            # Other connections track the sender address or read from files
+            data = self.connection.recv(len(self.__buffer))
+
+        messages = self.connection.mav.parse_buffer(data)
+        if messages is None:
+            return []
+
+        return messages
+
+    def is_connected(self) -> bool:
+        """
+        Returns whether the connection can still be read, False once the peer closed or
+        reset it until it is reconnected.
+        """
+        return (
+            self.__closed_port is None
+            or getattr(self.connection, "port", None) is not self.__closed_port
+        )
+
+    def send(self, frames: "list[bytes | None]") -> None:
+        """
+        Writes encoded frames to the connection. Safe to call from another thread
+        while receiving.
+
+        frames: Frames from the outbound queue, None is skipped.
+        """
+        with self.__write_lock:
+            for frame in frames:
+                if frame is None:
+                    continue
+
+                self.connection.write(frame)
+                if self.__recorder is not None:
+                    self.__recorder.record(flight_recorder.OUTBOUND, frame, time.monotonic())
+
+    def wake_subscribers(self) -> None:
+        """
+        Wakes up endpoints blocked on a receive, used when exiting.
+        """
+        for inbound_queues in self.__subscriptions.values():
+            for inbound_queue in inbound_queues:
+                inbound_queue.put(None, 0.0)
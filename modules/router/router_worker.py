@@ -0,0 +1,109 @@
+"""
+Router worker that alone reads from and writes to the MAVLink connection.
+"""
+
+import os
+import pathlib
+import threading
+
+from pymavlink import mavutil
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+from . import mavlink_endpoint
+from . import mavlink_router
+from ..recorder import flight_recorder
+from ..common.modules.logger import logger
+
+
+# How long to wait for a message before checking for exit
+RECEIVE_TIMEOUT = 0.1  # seconds
+# How long to wait for frames to send before checking for exit
+SEND_TIMEOUT = 0.1  # seconds
+SEND_BATCH_SIZE = 16
+# Time between entries in the recording index
+RECORDING_INDEX_PERIOD = 1.0  # seconds
+
+
+def router_worker(
+    connection: mavutil.mavfile,
+    endpoints: "list[mavlink_endpoint.MavlinkEndpoint]",
+    recording_path: pathlib.Path | None,
+    outbound_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Worker process. Receives from the drone for all endpoints and sends for all endpoints.
+
+    connection: MAVLink connection to the drone
+    endpoints: Endpoints of the other workers
+    recording_path: File to record all traffic to, None to not record
+    outbound_queue: Encoded frames from the endpoints to send to the drone
+    controller: Worker controller for managing worker state
+    """
+    # Instantiate logger
+    worker_name = pathlib.Path(__file__).stem
+    process_id = os.getpid()
+    result, local_logger = logger.Logger.create(f"{worker_name}_{process_id}", True)
+    if not result:
+        print("ERROR: Worker failed to create logger")
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    local_logger.info("Logger initialized", True)
+
+    recorder = None
+    if recording_path is not None:
+        result, recorder = flight_recorder.FlightRecorder.create(
+            recording_path, RECORDING_INDEX_PERIOD, local_logger
+        )
+        if not result:
+            local_logger.error("Failed to create FlightRecorder", True)
+            return
+
+    result, router = mavlink_router.MavlinkRouter.create(
+        connection, endpoints, local_logger, recorder
+    )
+    if not result:
+        local_logger.error("Failed to create MavlinkRouter", True)
+        return
+
+    assert router is not None
+
+    local_logger.info("MavlinkRouter created", True)
+
+    # Send as soon as frames arrive instead of between receives
+    sender = threading.Thread(target=send_loop, args=(router, outbound_queue, controller))
+    sender.start()
+
+    # Main loop: do work.
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        router.receive(RECEIVE_TIMEOUT)
+
+    router.wake_subscribers()
+    sender.join()
+
+    local_logger.info(f"Received messages: {router.receive_counts}", True)
+
+    if recorder is not None:
+        recorder.close()
+        local_logger.info(f"Recorded {recorder.frame_count} frames to {recording_path}", True)
+
+
+def send_loop(
+    router: mavlink_router.MavlinkRouter,
+    outbound_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+    stop: threading.Event | None = None,
+) -> None:
+    """
+    Sends frames from the outbound queue until exit is requested.
+
+    stop: Also stops the loop when set, for a worker exiting on its own.
+    """
+    while not controller.is_exit_requested() and (stop is None or not stop.is_set()):
+        controller.check_pause()
+        router.send(outbound_queue.get_many(SEND_BATCH_SIZE, SEND_TIMEOUT))
@@ -0,0 +1,393 @@
+"""
+Worker that runs the router, both heartbeat workers, and telemetry as coroutines in one process.
+"""
+
+import asyncio
+import os
+import pathlib
+import threading
+
+from pymavlink import mavutil
+
+from utilities.workers import periodic_scheduler
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import shared_memory_blackboard
+from utilities.workers import worker_controller
+from ..common.modules.logger import logger
+from ..heartbeat import heartbeat_receiver
+from ..heartbeat import heartbeat_sender
+from ..recorder import flight_recorder
+from ..router import async_endpoint
+from ..router import mavlink_endpoint
+from ..router import mavlink_router
+from ..router import router_worker
+from ..telemetry import telemetry
+from ..telemetry import telemetry_fusion
+
+
+# How often coroutines check for exit and pause
+CONTROL_CHECK_PERIOD = 0.1  # seconds
+# Received messages kept for each coroutine
+INBOUND_MAX_SIZE = 16
+
+
+def async_runtime_worker(
+    connection: mavutil.mavfile,
+    endpoints: "list[mavlink_endpoint.MavlinkEndpoint]",
+    recording_path: pathlib.Path | None,
+    heartbeat_period: float,
+    disconnect_timeout: float,
+    check_period: float,
+    telemetry_period: float,
+    streaming: bool,
+    max_age: float | None,
+    fusion: telemetry_fusion.TelemetryFusion | None,
+    blackboard: shared_memory_blackboard.SharedMemoryBlackboard | None,
+    outbound_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    heartbeat_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    telemetry_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Worker process. Owns the connection like the router worker, and runs the heartbeat
+    sender, heartbeat receiver, and telemetry on one event loop instead of in their own
+    processes. The connection is read whenever it is readable, without blocking the loop.
+
+    connection: MAVLink connection to the drone, must have a file descriptor
+    endpoints: Endpoints of the workers in other processes
+    recording_path: File to record all traffic to, None to not record
+    heartbeat_period: Time in seconds between heartbeats sent
+    disconnect_timeout: Time in seconds without a heartbeat before considering disconnected
+    check_period: Longest time in seconds between checks of the heartbeat deadline
+    telemetry_period: Timeout period for receiving telemetry messages
+    streaming: Send TelemetryData whenever either message arrives instead of waiting for both
+    max_age: When streaming, oldest message in seconds to combine, None for no limit
+    fusion: When streaming, aligns both messages to the same time, None to pair the latest
+    blackboard: Latest TelemetryData for any reader, None to use the queue instead
+    outbound_queue: Encoded frames from the other endpoints to send to the drone
+    heartbeat_queue: Queue to send status reports to main process
+    telemetry_queue: Queue to send TelemetryData to Command worker, unused with a blackboard
+    controller: Worker controller for managing worker state
+    """
+    # Instantiate logger
+    worker_name = pathlib.Path(__file__).stem
+    process_id = os.getpid()
+    result, local_logger = logger.Logger.create(f"{worker_name}_{process_id}", True)
+    if not result:
+        print("ERROR: Worker failed to create logger")
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    local_logger.info("Logger initialized", True)
+
+    if getattr(connection, "fd", None) is None:
+        local_logger.error("Connection has no file descriptor to wait on", True)
+        return
+
+    recorder = None
+    if recording_path is not None:
+        result, recorder = flight_recorder.FlightRecorder.create(
+            recording_path, router_worker.RECORDING_INDEX_PERIOD, local_logger
+        )
+        if not result:
+            local_logger.error("Failed to create FlightRecorder", True)
+            return
+
+    result, router = mavlink_router.MavlinkRouter.create(
+        connection, endpoints, local_logger, recorder
+    )
+    if not result:
+        local_logger.error("Failed to create MavlinkRouter", True)
+        return
+
+    assert router is not None
+
+    local_logger.info("MavlinkRouter created", True)
+
+    # Frames from the other processes still arrive through a queue
+    sender_stop = threading.Event()
+    sender = threading.Thread(
+        target=router_worker.send_loop, args=(router, outbound_queue, controller, sender_stop)
+    )
+    sender.start()
+
+    result = asyncio.run(
+        run(
+            router,
+            heartbeat_period,
+            disconnect_timeout,
+            check_period,
+            telemetry_period,
+            streaming,
+            max_age,
+            fusion,
+            blackboard,
+            heartbeat_queue,
+            telemetry_queue,
+            controller,
+            local_logger,
+        )
+    )
+
+    router.wake_subscribers()
+    sender_stop.set()
+    sender.join()
+
+    if not result:
+        local_logger.error("Coroutine failed, worker exiting before exit was requested", True)
+
+    local_logger.info(f"Received messages: {router.receive_counts}", True)
+
+    if recorder is not None:
+        recorder.close()
+        local_logger.info(f"Recorded {recorder.frame_count} frames to {recording_path}", True)
+
+
+async def run(
+    router: mavlink_router.MavlinkRouter,
+    heartbeat_period: float,
+    disconnect_timeout: float,
+    check_period: float,
+    telemetry_period: float,
+    streaming: bool,
+    max_age: float | None,
+    fusion: telemetry_fusion.TelemetryFusion | None,
+    blackboard: shared_memory_blackboard.SharedMemoryBlackboard | None,
+    heartbeat_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    telemetry_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+    local_logger: logger.Logger,
+) -> bool:
+    """
+    Runs the coroutines until exit is requested, or until one of them fails.
+
+    Returns False if a coroutine failed or could not be created, True otherwise.
+    """
+    connection = router.connection
+
+    sender_endpoint = async_endpoint.AsyncEndpoint(
+        [], INBOUND_MAX_SIZE, router.send, connection.source_system, connection.source_component
+    )
+    receiver_endpoint = async_endpoint.AsyncEndpoint(
+        ["HEARTBEAT"],
+        INBOUND_MAX_SIZE,
+        router.send,
+        connection.source_system,
+        connection.source_component,
+    )
+    telemetry_endpoint = async_endpoint.AsyncEndpoint(
+        ["LOCAL_POSITION_NED", "ATTITUDE"],
+        INBOUND_MAX_SIZE,
+        router.send,
+        connection.source_system,
+        connection.source_component,
+    )
+    router.add_endpoint(receiver_endpoint)
+    router.add_endpoint(telemetry_endpoint)
+
+    result, sender = heartbeat_sender.HeartbeatSender.create(sender_endpoint)
+    if not result:
+        local_logger.error("Failed to create HeartbeatSender", True)
+        return False
+
+    result, receiver = heartbeat_receiver.HeartbeatReceiver.create(
+        disconnect_timeout, check_period, receiver_endpoint, local_logger
+    )
+    if not result:
+        local_logger.error("Failed to create HeartbeatReceiver", True)
+        return False
+
+    result, telem = telemetry.Telemetry.create(telemetry_period, telemetry_endpoint, local_logger)
+    if not result:
+        local_logger.error("Failed to create Telemetry", True)
+        return False
+
+    assert sender is not None
+    assert receiver is not None
+    assert telem is not None
+
+    local_logger.info("HeartbeatSender, HeartbeatReceiver, and Telemetry created", True)
+
+    # Read and dispatch whenever the connection is readable
+    loop = asyncio.get_running_loop()
+    fd = connection.fd
+    is_reading = True
+
+    def read() -> None:
+        nonlocal is_reading
+        router.receive(0.0)
+        if not router.is_connected():
+            # A socket at end of file is always readable, stop watching it until reconnected
+            loop.remove_reader(fd)
+            is_reading = False
+
+    loop.add_reader(fd, read)
+
+    tasks = [
+        asyncio.create_task(
+            send_heartbeats(sender, heartbeat_period, controller, local_logger),
+            name="send_heartbeats",
+        ),
+        asyncio.create_task(
+            receive_heartbeats(receiver, heartbeat_queue, controller, local_logger),
+            name="receive_heartbeats",
+        ),
+        asyncio.create_task(
+            gather_telemetry(
+                telem,
+                streaming,
+                max_age,
+                fusion,
+                blackboard,
+                telemetry_queue,
+                controller,
+                local_logger,
+            ),
+            name="gather_telemetry",
+        ),
+    ]
+
+    # The coroutines run until cancelled, any that finishes has failed
+    failed_tasks = []
+    while not controller.is_exit_requested() and len(failed_tasks) == 0:
+        done, _ = await asyncio.wait(
+            tasks, timeout=CONTROL_CHECK_PERIOD, return_when=asyncio.FIRST_EXCEPTION
+        )
+        for task in done:
+            exception = task.exception()
+            if exception is not None:
+                local_logger.error(f"{task.get_name()} failed: {exception!r}", True)
+            else:
+                local_logger.error(f"{task.get_name()} returned unexpectedly", True)
+            failed_tasks.append(task)
+
+        # Reconnecting replaces the socket
+        if router.is_connected() and (connection.fd != fd or not is_reading):
+            loop.remove_reader(fd)
+            fd = connection.fd
+            loop.add_reader(fd, read)
+            is_reading = True
+
+    loop.remove_reader(fd)
+    for task in tasks:
+        task.cancel()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for task, task_result in zip(tasks, results):
+        if (
+            task not in failed_tasks
+            and isinstance(task_result, BaseException)
+            and not isinstance(task_result, asyncio.CancelledError)
+        ):
+            local_logger.error(f"{task.get_name()} failed while exiting: {task_result!r}", True)
+
+    local_logger.info("Worker exiting", True)
+    return len(failed_tasks) == 0
+
+
+async def check_pause(controller: worker_controller.WorkerController) -> None:
+    """
+    Waits without blocking the event loop while main has requested a pause.
+    """
+    while controller.get_pause_generation() % 2 == 1:
+        await asyncio.sleep(CONTROL_CHECK_PERIOD)
+
+
+async def put(
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    item: object,
+    controller: worker_controller.WorkerController,
+) -> bool:
+    """
+    Puts an item into a queue without blocking the event loop. Waits for space on
+    another thread if the queue's overflow policy blocks, giving up on exit and counting
+    the item as dropped.
+
+    Returns whether the item was put.
+    """
+    if output_queue.put(item, 0.0):
+        return True
+
+    loop = asyncio.get_running_loop()
+    while not controller.is_exit_requested():
+        if await loop.run_in_executor(None, output_queue.put, item, CONTROL_CHECK_PERIOD):
+            return True
+
+    output_queue.record_drops(1)
+    return False
+
+
+async def send_heartbeats(
+    sender: heartbeat_sender.HeartbeatSender,
+    period: float,
+    controller: worker_controller.WorkerController,
+    local_logger: logger.Logger,
+) -> None:
+    """
+    Sends a heartbeat every period, on a fixed schedule so delays do not add up.
+    """
+    scheduler = periodic_scheduler.PeriodicScheduler(period)
+    try:
+        while True:
+            await check_pause(controller)
+            sender.run()
+            local_logger.info("Heartbeat sent", True)
+
+            await asyncio.sleep(scheduler.get_delay())
+            scheduler.record_wake()
+    finally:
+        local_logger.info(f"Heartbeat schedule: {scheduler.get_statistics()}", True)
+
+
+async def receive_heartbeats(
+    receiver: heartbeat_receiver.HeartbeatReceiver,
+    heartbeat_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+    local_logger: logger.Logger,
+) -> None:
+    """
+    Reports the initial connection status, then every change as soon as it happens.
+    """
+    last_status = None
+    while True:
+        await check_pause(controller)
+        status = await receiver.run_async()
+        if status == last_status:
+            continue
+
+        await put(heartbeat_queue, status, controller)
+        local_logger.info(f"Status: {status}", True)
+        last_status = status
+
+
+async def gather_telemetry(
+    telem: telemetry.Telemetry,
+    streaming: bool,
+    max_age: float | None,
+    fusion: telemetry_fusion.TelemetryFusion | None,
+    blackboard: shared_memory_blackboard.SharedMemoryBlackboard | None,
+    telemetry_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+    local_logger: logger.Logger,
+) -> None:
+    """
+    Publishes TelemetryData as it is received.
+    """
+    samples = telem.stream_async(max_age, fusion) if streaming else None
+    while True:
+        await check_pause(controller)
+        if samples is not None:
+            result, telemetry_data = await anext(samples)
+        else:
+            result, telemetry_data = await telem.run_async()
+
+        if result:
+            if blackboard is not None:
+                blackboard.write(telemetry_data.to_bytes())
+            else:
+                await put(telemetry_queue, telemetry_data, controller)
+            local_logger.info(f"Sent telemetry data: {telemetry_data}", True)
+        elif samples is None:
+            local_logger.warning("Telemetry timeout, restarting", True)
@@ -2,18 +2,49 @@
 Telemetry gathering logic.
 """
 
+import select
+import struct
 import time
+from collections.abc import AsyncIterator
+from collections.abc import Iterator
 
 from pymavlink import mavutil
 
+from . import telemetry_fusion
 from ..common.modules.logger import logger
+from ..router import async_endpoint
 
 
 class TelemetryData:  # pylint: disable=too-many-instance-attributes
     """
     Python struct to represent Telemtry Data. Contains the most recent attitude and position reading.
+
+    Has a fixed binary layout: a bitmask of which fields are not None, time since boot,
+    then the 12 floating point fields in order.
     """
 
+    __slots__ = (
+        "time_since_boot",
+        "x",
+        "y",
+        "z",
+        "x_velocity",
+        "y_velocity",
+        "z_velocity",
+        "roll",
+        "pitch",
+        "yaw",
+        "roll_speed",
+        "pitch_speed",
+        "yaw_speed",
+    )
+
+    __STRUCT = struct.Struct("<Hq12d")
+    __ALL_FIELDS_MASK = (1 << len(__slots__)) - 1
+
+    # Size in bytes of a single encoded record
+    PACKED_SIZE = __STRUCT.size
+
     def __init__(
         self,
         time_since_boot: int | None = None,  # ms
@@ -44,6 +75,87 @@ class TelemetryData:  # pylint: disable=too-many-instance-attributes
         self.pitch_speed = pitch_speed
         self.yaw_speed = yaw_speed
 
+    def __reduce__(self) -> "tuple":
+        # Flat tuple of values rather than a dictionary of attribute names
+        return TelemetryData, self.__values()
+
+    def to_bytes(self) -> bytes:
+        """
+        Encodes into the fixed binary layout.
+        """
+        return self.__STRUCT.pack(*self.__packed_values())
+
+    def pack_into(self, buffer: "bytearray | memoryview", offset: int) -> None:
+        """
+        Encodes into the fixed binary layout, writing into an existing buffer.
+        """
+        self.__STRUCT.pack_into(buffer, offset, *self.__packed_values())
+
+    def __values(self) -> "tuple":
+        return (
+            self.time_since_boot,
+            self.x,
+            self.y,
+            self.z,
+            self.x_velocity,
+            self.y_velocity,
+            self.z_velocity,
+            self.roll,
+            self.pitch,
+            self.yaw,
+            self.roll_speed,
+            self.pitch_speed,
+            self.yaw_speed,
+        )
+
+    def __packed_values(self) -> "tuple":
+        values = self.__values()
+        if None not in values:
+            return (self.__ALL_FIELDS_MASK,) + values
+
+        mask = 0
+        for i, value in enumerate(values):
+            if value is not None:
+                mask |= 1 << i
+
+        return (mask,) + tuple(0 if value is None else value for value in values)
+
+    @classmethod
+    def from_bytes(cls, data: "bytes | bytearray | memoryview") -> "TelemetryData":
+        """
+        Decodes from the fixed binary layout.
+        """
+        return cls.unpack_from(data, 0)
+
+    @classmethod
+    def unpack_from(cls, data: "bytes | bytearray | memoryview", offset: int) -> "TelemetryData":
+        """
+        Decodes from the fixed binary layout at an offset into a buffer.
+        """
+        return cls.__from_values(cls.__STRUCT.unpack_from(data, offset))
+
+    @classmethod
+    def pack_many(cls, records: "list[TelemetryData]") -> bytes:
+        """
+        Encodes records back to back into a single buffer.
+        """
+        return b"".join([record.to_bytes() for record in records])
+
+    @classmethod
+    def unpack_many(cls, data: "bytes | bytearray | memoryview") -> "list[TelemetryData]":
+        """
+        Decodes records encoded with `pack_many()` .
+        """
+        return [cls.__from_values(values) for values in cls.__STRUCT.iter_unpack(data)]
+
+    @classmethod
+    def __from_values(cls, values: "tuple") -> "TelemetryData":
+        mask = values[0]
+        if mask == cls.__ALL_FIELDS_MASK:
+            return cls(*values[1:])
+
+        return cls(*(value if mask & (1 << i) else None for i, value in enumerate(values[1:])))
+
     def __str__(self) -> str:
         return f"""{{
             time_since_boot: {self.time_since_boot},
@@ -76,7 +188,7 @@ class Telemetry:
     def create(
         cls,
         timeout: float,
-        connection: mavutil.mavfile,
+        connection: mavutil.mavfile | async_endpoint.AsyncEndpoint,
         local_logger: logger.Logger,
     ) -> "tuple[True, Telemetry] | tuple[False, None]":
         """
@@ -88,7 +200,7 @@ class Telemetry:
         self,
         key: object,
         timeout: float,
-        connection: mavutil.mavfile,
+        connection: mavutil.mavfile | async_endpoint.AsyncEndpoint,
         local_logger: logger.Logger,
     ) -> None:
         assert key is Telemetry.__private_key, "Use create() method"
@@ -97,6 +209,11 @@ class Telemetry:
         self.local_logger = local_logger
         # pylint: disable=invalid-name
         self.TIMEOUT = timeout
+        # Receive time and message by type while streaming
+        self.__latest: "dict[str, tuple[float, object]]" = {}
+        self.__last_fused_time = None
+        # Timeouts in a row while streaming, only the first is logged
+        self.__timeout_count = 0
 
     def run(
         self,
@@ -105,58 +222,225 @@ class Telemetry:
         Receive LOCAL_POSITION_NED and ATTITUDE messages from the drone,
         combining them together to form a single TelemetryData object.
 
+        Sleeps until the connection has data instead of polling, and returns as soon as
+        both messages have been received.
+
         Returns (True, TelemetryData) on success, (False, None) on timeout.
         """
-        start_time = time.time()
+        end_time = time.monotonic() + self.TIMEOUT
 
         position_msg = None
         attitude_msg = None
 
         # Try to receive both messages within timeout
-        while time.time() - start_time < self.TIMEOUT:
-            # Try to get LOCAL_POSITION_NED if we don't have it yet
+        while position_msg is None or attitude_msg is None:
+            wanted_types = []
             if position_msg is None:
-                msg = self.connection.recv_match(type="LOCAL_POSITION_NED", blocking=False)
-                if msg and msg.get_type() == "LOCAL_POSITION_NED":
-                    position_msg = msg
-                    self.local_logger.info("Received LOCAL_POSITION_NED", True)
-
-            # Try to get ATTITUDE if we don't have it yet
+                wanted_types.append("LOCAL_POSITION_NED")
             if attitude_msg is None:
-                msg = self.connection.recv_match(type="ATTITUDE", blocking=False)
-                if msg and msg.get_type() == "ATTITUDE":
-                    attitude_msg = msg
-                    self.local_logger.info("Received ATTITUDE", True)
-
-            # If we have both, create TelemetryData
-            if position_msg is not None and attitude_msg is not None:
-                # CRITICAL FIX: Use position_msg timestamp as it's more reliable
-                # The spec says to use the most recent, but position messages have consistent timestamps
-                telemetry_data = TelemetryData(
-                    time_since_boot=position_msg.time_boot_ms,  # Use position timestamp
-                    x=position_msg.x,
-                    y=position_msg.y,
-                    z=position_msg.z,
-                    x_velocity=position_msg.vx,
-                    y_velocity=position_msg.vy,
-                    z_velocity=position_msg.vz,
-                    roll=attitude_msg.roll,
-                    pitch=attitude_msg.pitch,
-                    yaw=attitude_msg.yaw,
-                    roll_speed=attitude_msg.rollspeed,
-                    pitch_speed=attitude_msg.pitchspeed,
-                    yaw_speed=attitude_msg.yawspeed,
+                wanted_types.append("ATTITUDE")
+
+            msg = self.__receive(wanted_types, end_time)
+            if msg is None:
+                # Timeout - didn't receive both messages
+                self.local_logger.error(
+                    f"Timeout: Did not receive both messages within {self.TIMEOUT} seconds", True
+                )
+                return False, None
+
+            if msg.get_type() == "LOCAL_POSITION_NED":
+                position_msg = msg
+                self.local_logger.info("Received LOCAL_POSITION_NED", True)
+            else:
+                attitude_msg = msg
+                self.local_logger.info("Received ATTITUDE", True)
+
+        telemetry_data = self.__fuse(position_msg, attitude_msg)
+        self.local_logger.info("Created TelemetryData", True)
+        return True, telemetry_data
+
+    def stream(
+        self,
+        max_age: float | None = None,
+        fusion: telemetry_fusion.TelemetryFusion | None = None,
+    ) -> "Iterator[tuple[True, TelemetryData] | tuple[False, None]]":
+        """
+        Receive LOCAL_POSITION_NED and ATTITUDE messages from the drone forever, keeping the
+        latest of each type. Unlike `run()` , every new message produces a TelemetryData,
+        so the output rate is the combined input rate instead of the slower of the two.
+
+        max_age: Only combine messages received at most this many seconds ago,
+        None for no limit.
+        fusion: Estimate both messages at the same time instead of pairing the latest
+        of each, None to pair.
+
+        Yields (True, TelemetryData) for every new message, or (False, None) if no message
+        arrived within the timeout or the other message is too old.
+        """
+        self.__reset_stream()
+        while True:
+            msg = self.__receive(
+                ["LOCAL_POSITION_NED", "ATTITUDE"], time.monotonic() + self.TIMEOUT
+            )
+            sample = self.combine(msg, max_age, fusion)
+            if sample is not None:
+                yield sample
+
+    async def run_async(
+        self,
+    ) -> "tuple[True, TelemetryData] | tuple[False, None]":
+        """
+        Same as `run()` , waiting on an async endpoint without blocking the event loop.
+
+        Returns (True, TelemetryData) on success, (False, None) on timeout.
+        """
+        end_time = time.monotonic() + self.TIMEOUT
+
+        messages = {}
+        while len(messages) < 2:
+            wanted_types = [
+                message_type
+                for message_type in ["LOCAL_POSITION_NED", "ATTITUDE"]
+                if message_type not in messages
+            ]
+            msg = await self.connection.recv_match_async(
+                type=wanted_types, timeout=max(end_time - time.monotonic(), 0.0)
+            )
+            if msg is None:
+                self.local_logger.error(
+                    f"Timeout: Did not receive both messages within {self.TIMEOUT} seconds", True
+                )
+                return False, None
+
+            messages[msg.get_type()] = msg
+            self.local_logger.info(f"Received {msg.get_type()}", True)
+
+        telemetry_data = self.__fuse(messages["LOCAL_POSITION_NED"], messages["ATTITUDE"])
+        self.local_logger.info("Created TelemetryData", True)
+        return True, telemetry_data
+
+    async def stream_async(
+        self,
+        max_age: float | None = None,
+        fusion: telemetry_fusion.TelemetryFusion | None = None,
+    ) -> "AsyncIterator[tuple[True, TelemetryData] | tuple[False, None]]":
+        """
+        Same as `stream()` , waiting on an async endpoint without blocking the event loop.
+        """
+        self.__reset_stream()
+        while True:
+            msg = await self.connection.recv_match_async(
+                type=["LOCAL_POSITION_NED", "ATTITUDE"], timeout=self.TIMEOUT
+            )
+            sample = self.combine(msg, max_age, fusion)
+            if sample is not None:
+                yield sample
+
+    def __reset_stream(self) -> None:
+        """
+        Forgets the messages of a previous stream.
+        """
+        self.__latest = {}
+        self.__last_fused_time = None
+        self.__timeout_count = 0
+
+    def combine(
+        self,
+        msg: "object | None",
+        max_age: float | None = None,
+        fusion: telemetry_fusion.TelemetryFusion | None = None,
+    ) -> "tuple[True, TelemetryData] | tuple[False, None] | None":
+        """
+        Keeps a streamed message as the latest of its type. Used by `stream()` , and by
+        callers that receive messages themselves, such as one Telemetry per vehicle.
+
+        msg: LOCAL_POSITION_NED or ATTITUDE, None for a timeout. Only the first of several
+        timeouts in a row is logged, and their number once a message arrives.
+
+        Returns the sample to yield, None until both types have been received.
+        """
+        if msg is None:
+            if self.__timeout_count == 0:
+                self.local_logger.warning(
+                    f"Timeout: No message within {self.TIMEOUT} seconds", True
                 )
+            self.__timeout_count += 1
+            return False, None
+
+        if self.__timeout_count > 0:
+            self.local_logger.info(f"Received after {self.__timeout_count} timeouts", True)
+            self.__timeout_count = 0
+
+        receive_time = time.monotonic()
+        self.__latest[msg.get_type()] = (receive_time, msg)
+        if fusion is not None:
+            fusion.add(msg)
+        if len(self.__latest) < 2:
+            return None
+
+        position_time, position_msg = self.__latest["LOCAL_POSITION_NED"]
+        attitude_time, attitude_msg = self.__latest["ATTITUDE"]
+        if max_age is not None and receive_time - min(position_time, attitude_time) > max_age:
+            return False, None
+
+        if fusion is None:
+            return True, self.__fuse(position_msg, attitude_msg)
 
-                self.local_logger.info("Created TelemetryData", True)
-                return True, telemetry_data
+        # Without extrapolation the time only moves when the older type updates
+        result, fused_time, values = fusion.fuse()
+        if not result or fused_time == self.__last_fused_time:
+            return False, None
 
-            # Small sleep to avoid busy waiting
-            time.sleep(0.01)
+        self.__last_fused_time = fused_time
+        return True, TelemetryData(int(fused_time), *values)
+
+    def __fuse(self, position_msg: object, attitude_msg: object) -> TelemetryData:
+        """
+        Combines position and attitude into TelemetryData.
+        """
+        # CRITICAL FIX: Use position_msg timestamp as it's more reliable
+        # The spec says to use the most recent, but position messages have consistent timestamps
+        return TelemetryData(
+            time_since_boot=position_msg.time_boot_ms,  # Use position timestamp
+            x=position_msg.x,
+            y=position_msg.y,
+            z=position_msg.z,
+            x_velocity=position_msg.vx,
+            y_velocity=position_msg.vy,
+            z_velocity=position_msg.vz,
+            roll=attitude_msg.roll,
+            pitch=attitude_msg.pitch,
+            yaw=attitude_msg.yaw,
+            roll_speed=attitude_msg.rollspeed,
+            pitch_speed=attitude_msg.pitchspeed,
+            yaw_speed=attitude_msg.yawspeed,
+        )
+
+    def __receive(self, message_types: "list[str]", end_time: float) -> "object | None":
+        """
+        Receives the next message of the given types, waiting until the end time.
+
+        Returns the message, None on timeout.
+        """
+        # Router endpoints have no file descriptor and block on their own
+        fd = getattr(self.connection, "fd", None)
+        while True:
+            # Parse everything already read before waiting for more
+            msg = self.connection.recv_match(type=message_types, blocking=False)
+            if msg is not None:
+                return msg
+
+            remaining_time = end_time - time.monotonic()
+            if remaining_time <= 0.0:
+                return None
+
+            if fd is None:
+                return self.connection.recv_match(
+                    type=message_types, blocking=True, timeout=remaining_time
+                )
 
-        # Timeout - didn't receive both messages
-        self.local_logger.error("Timeout: Did not receive both messages within 1 second", True)
-        return False, None
+            # Sleep until the connection is readable
+            select.select([fd], [], [], remaining_time)
 
 
 # =================================================================================================
@@ -0,0 +1,258 @@
+"""
+Aligns position and attitude to a common timestamp.
+"""
+
+import array
+import math
+
+
+def wrap_angle(angle: float) -> float:
+    """
+    Returns the angle in radians wrapped to [-pi, pi) .
+    """
+    return (angle + math.pi) % (2.0 * math.pi) - math.pi
+
+
+class SampleBuffer:  # pylint: disable=too-many-instance-attributes
+    """
+    Ring buffer of the most recent samples of one message type, in time order.
+    Storage is allocated once, so adding and sampling do not allocate.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        field_count: int,
+        angle_fields: "tuple[int, ...]",
+        rate_fields: "tuple[int, ...]",
+    ) -> None:
+        """
+        capacity: Number of samples kept.
+        field_count: Number of values in each sample.
+        angle_fields: Indices of values in radians, interpolated the short way around.
+        rate_fields: For each value, the index of its rate of change per second,
+        or -1 to hold it constant when extrapolating.
+        """
+        assert capacity >= 2, "Capacity must be at least 2"
+        assert len(rate_fields) == field_count, "Every field needs a rate field or -1"
+
+        self.__capacity = capacity
+        self.__field_count = field_count
+        self.__is_angle = [i in angle_fields for i in range(field_count)]
+        self.__rate_fields = rate_fields
+        # Milliseconds since boot
+        self.__times = array.array("d", bytes(8 * capacity))
+        self.__values = array.array("d", bytes(8 * capacity * field_count))
+        self.__count = 0
+        # Index of the newest sample
+        self.__newest = -1
+
+    def append(self, sample_time: float, values: "tuple[float, ...]") -> bool:
+        """
+        Adds a sample, replacing the oldest when full.
+
+        sample_time: Milliseconds since boot.
+        values: Exactly `field_count` values.
+
+        Returns False if the sample is older than the newest sample and was ignored.
+        """
+        if self.__count > 0:
+            newest_time = self.__times[self.__newest]
+            if sample_time < newest_time:
+                return False
+
+            # Same time, replace instead of adding a zero length interval
+            if sample_time > newest_time:
+                self.__newest = (self.__newest + 1) % self.__capacity
+                self.__count = min(self.__count + 1, self.__capacity)
+        else:
+            self.__newest = 0
+            self.__count = 1
+
+        self.__times[self.__newest] = sample_time
+        start = self.__newest * self.__field_count
+        for i in range(self.__field_count):
+            self.__values[start + i] = values[i]
+
+        return True
+
+    def newest_time(self) -> float | None:
+        """
+        Returns the time of the newest sample, None if empty.
+        """
+        if self.__count == 0:
+            return None
+
+        return self.__times[self.__newest]
+
+    def sample(
+        self,
+        sample_time: float,
+        max_extrapolation: float,
+        output: array.array,
+        output_offset: int,
+    ) -> bool:
+        """
+        Estimates the values at a time: interpolated between the samples on either side,
+        or extrapolated from the newest sample with the rate fields.
+
+        sample_time: Milliseconds since boot.
+        max_extrapolation: Maximum time in seconds after the newest sample.
+        output: Where to write the values.
+        output_offset: Index of the first value in the output.
+
+        Returns False if the time is before the oldest sample or too far after the newest.
+        """
+        if self.__count == 0:
+            return False
+
+        newest_time = self.__times[self.__newest]
+        if sample_time >= newest_time:
+            elapsed = (sample_time - newest_time) / 1000.0
+            if elapsed > max_extrapolation:
+                return False
+
+            start = self.__newest * self.__field_count
+            for i in range(self.__field_count):
+                value = self.__values[start + i]
+                rate_field = self.__rate_fields[i]
+                if rate_field >= 0:
+                    value += self.__values[start + rate_field] * elapsed
+                if self.__is_angle[i]:
+                    value = wrap_angle(value)
+                output[output_offset + i] = value
+
+            return True
+
+        # Newest to oldest for the sample just before the time
+        after = self.__newest
+        for _ in range(self.__count - 1):
+            before = (after - 1) % self.__capacity
+            before_time = self.__times[before]
+            if before_time <= sample_time:
+                self.__interpolate(before, after, sample_time, output, output_offset)
+                return True
+
+            after = before
+
+        return False
+
+    def __interpolate(
+        self,
+        before: int,
+        after: int,
+        sample_time: float,
+        output: array.array,
+        output_offset: int,
+    ) -> None:
+        """
+        Linear interpolation between two stored samples.
+        """
+        before_time = self.__times[before]
+        fraction = (sample_time - before_time) / (self.__times[after] - before_time)
+        before_start = before * self.__field_count
+        after_start = after * self.__field_count
+        for i in range(self.__field_count):
+            before_value = self.__values[before_start + i]
+            change = self.__values[after_start + i] - before_value
+            if self.__is_angle[i]:
+                # Short way around, so 179 to -179 degrees passes through 180
+                output[output_offset + i] = wrap_angle(before_value + wrap_angle(change) * fraction)
+            else:
+                output[output_offset + i] = before_value + change * fraction
+
+
+class TelemetryFusion:
+    """
+    Keeps recent position and attitude samples and estimates both at a common time,
+    so position and attitude describe the same instant.
+
+    The common time is the newest message, but at most the maximum extrapolation after
+    the newest message of the other type. The other type is extrapolated up to that time,
+    and the newer type is interpolated back to it if needed. With no extrapolation,
+    the newer type is always interpolated to the time of the older type.
+    """
+
+    __private_key = object()
+
+    # x, y, z, vx, vy, vz, where position changes at the rate of velocity
+    __POSITION_RATE_FIELDS = (3, 4, 5, -1, -1, -1)
+    # roll, pitch, yaw, rollspeed, pitchspeed, yawspeed
+    __ATTITUDE_ANGLE_FIELDS = (0, 1, 2)
+    __ATTITUDE_RATE_FIELDS = (3, 4, 5, -1, -1, -1)
+    __FIELD_COUNT = 6
+
+    @classmethod
+    def create(
+        cls, capacity: int, max_extrapolation: float
+    ) -> "tuple[True, TelemetryFusion] | tuple[False, None]":
+        """
+        Falliable create (instantiation) method to create a TelemetryFusion object.
+
+        capacity: Number of samples of each message type kept, at least 2.
+        max_extrapolation: Maximum time in seconds to extrapolate the older message type,
+        0 to only interpolate.
+        """
+        if capacity < 2 or max_extrapolation < 0.0:
+            return False, None
+
+        return True, TelemetryFusion(cls.__private_key, capacity, max_extrapolation)
+
+    def __init__(self, key: object, capacity: int, max_extrapolation: float) -> None:
+        assert key is TelemetryFusion.__private_key, "Use create() method"
+
+        self.__max_extrapolation = max_extrapolation
+        self.__positions = SampleBuffer(
+            capacity, self.__FIELD_COUNT, (), self.__POSITION_RATE_FIELDS
+        )
+        self.__attitudes = SampleBuffer(
+            capacity,
+            self.__FIELD_COUNT,
+            self.__ATTITUDE_ANGLE_FIELDS,
+            self.__ATTITUDE_RATE_FIELDS,
+        )
+        # Position then attitude values of the fused sample
+        self.__fused = array.array("d", bytes(8 * 2 * self.__FIELD_COUNT))
+
+    def add(self, msg: object) -> bool:
+        """
+        Adds a LOCAL_POSITION_NED or ATTITUDE message.
+
+        Returns False if the message was ignored for being older than the newest one.
+        """
+        if msg.get_type() == "LOCAL_POSITION_NED":
+            return self.__positions.append(
+                msg.time_boot_ms, (msg.x, msg.y, msg.z, msg.vx, msg.vy, msg.vz)
+            )
+
+        return self.__attitudes.append(
+            msg.time_boot_ms,
+            (msg.roll, msg.pitch, msg.yaw, msg.rollspeed, msg.pitchspeed, msg.yawspeed),
+        )
+
+    def fuse(self) -> "tuple[True, float, array.array] | tuple[False, None, None]":
+        """
+        Estimates position and attitude at the common time.
+
+        Returns the time in milliseconds since boot and the values x, y, z, vx, vy, vz,
+        roll, pitch, yaw, rollspeed, pitchspeed, yawspeed, in the order of TelemetryData.
+        The values are overwritten by the next call. (False, None, None) if either message
+        type has no sample close enough.
+        """
+        position_time = self.__positions.newest_time()
+        attitude_time = self.__attitudes.newest_time()
+        if position_time is None or attitude_time is None:
+            return False, None, None
+
+        fused_time = min(
+            max(position_time, attitude_time),
+            min(position_time, attitude_time) + self.__max_extrapolation * 1000.0,
+        )
+        if not self.__positions.sample(fused_time, self.__max_extrapolation, self.__fused, 0):
+            return False, None, None
+        if not self.__attitudes.sample(
+            fused_time, self.__max_extrapolation, self.__fused, self.__FIELD_COUNT
+        ):
+            return False, None, None
+
+        return True, fused_time, self.__fused
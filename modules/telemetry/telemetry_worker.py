@@ -8,9 +8,12 @@ import pathlib
 from pymavlink import mavutil
 
 from utilities.workers import queue_proxy_wrapper
+from utilities.workers import shared_memory_blackboard
 from utilities.workers import worker_controller
 from . import telemetry
+from . import telemetry_fusion
 from ..common.modules.logger import logger
+from ..router import mavlink_endpoint
 
 
 # =================================================================================================
@@ -18,7 +21,11 @@ from ..common.modules.logger import logger
 # =================================================================================================
 def telemetry_worker(
     period: float,
-    connection: mavutil.mavfile,
+    streaming: bool,
+    max_age: float | None,
+    fusion: telemetry_fusion.TelemetryFusion | None,
+    connection: mavutil.mavfile | mavlink_endpoint.MavlinkEndpoint,
+    blackboard: shared_memory_blackboard.SharedMemoryBlackboard | None,
     telemetry_queue: queue_proxy_wrapper.QueueProxyWrapper,
     controller: worker_controller.WorkerController,
 ) -> None:
@@ -26,8 +33,12 @@ def telemetry_worker(
     Worker process. Gathers telemetry data from the drone.
 
     period: Timeout period for receiving messages
-    connection: MAVLink connection to the drone
-    telemetry_queue: Queue to send TelemetryData to Command worker
+    streaming: Send TelemetryData whenever either message arrives instead of waiting for both
+    max_age: When streaming, oldest message in seconds to combine, None for no limit
+    fusion: When streaming, aligns both messages to the same time, None to pair the latest
+    connection: MAVLink connection to the drone, or a router endpoint
+    blackboard: Latest TelemetryData for any reader, None to use the queue instead
+    telemetry_queue: Queue to send TelemetryData to Command worker, unused with a blackboard
     controller: Worker controller for managing worker state
     """
     # =============================================================================================
@@ -61,16 +72,25 @@ def telemetry_worker(
 
     local_logger.info("Telemetry created", True)
 
+    # Keeps the latest of each message between samples
+    samples = telem.stream(max_age, fusion) if streaming else None
+
     # Main loop: do work.
     while not controller.is_exit_requested():
         controller.check_pause()
-        result, telemetry_data = telem.run()
+        if samples is not None:
+            result, telemetry_data = next(samples)
+        else:
+            result, telemetry_data = telem.run()
 
         if result:
-            # Successfully got telemetry data, send to queue
-            telemetry_queue.queue.put(telemetry_data)
+            # Successfully got telemetry data, publish it
+            if blackboard is not None:
+                blackboard.write(telemetry_data.to_bytes())
+            else:
+                telemetry_queue.put(telemetry_data)
             local_logger.info(f"Sent telemetry data: {telemetry_data}", True)
-        else:
+        elif samples is None:
             # Timeout occurred, restart and try again
             local_logger.warning("Telemetry timeout, restarting", True)
 
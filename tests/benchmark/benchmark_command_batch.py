@@ -0,0 +1,106 @@
+"""
+Benchmark deciding commands one TelemetryData at a time against one vectorized batch. To run:
+```
+python -m tests.benchmark.benchmark_command_batch
+```
+"""
+
+import math
+import random
+import time
+
+import numpy as np
+from pymavlink import mavutil
+
+from modules.command import command
+from modules.common.modules.logger import logger
+from modules.telemetry import telemetry
+
+
+SAMPLE_COUNT = 100_000
+TARGET = command.Position(10.0, 20.0, 30.0)
+HEIGHT_TOLERANCE = 0.5
+ANGLE_TOLERANCE = 5.0
+
+
+class NullConnection:
+    """
+    Throws away sent frames.
+    """
+
+    def __init__(self) -> None:
+        self.mav = mavutil.mavlink.MAVLink(self, 255, 0)
+
+    def write(self, buffer: bytes) -> None:
+        """
+        Nothing to do.
+        """
+
+
+def main() -> int:
+    """
+    Run the benchmark and print the results.
+    """
+    result, local_logger = logger.Logger.create("benchmark_command_batch", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    assert local_logger is not None
+
+    result, cmd = command.Command.create(
+        NullConnection(), TARGET, HEIGHT_TOLERANCE, ANGLE_TOLERANCE, local_logger
+    )
+    if not result:
+        print("ERROR: Failed to create Command")
+        return -1
+
+    assert cmd is not None
+
+    # Mostly at the target altitude, so both commands are decided
+    generator = random.Random(0)
+    samples = [
+        telemetry.TelemetryData(
+            x=generator.uniform(0.0, 20.0),
+            y=generator.uniform(10.0, 30.0),
+            z=generator.gauss(30.0, 0.4),
+            yaw=generator.uniform(-math.pi, math.pi),
+        )
+        for _ in range(SAMPLE_COUNT)
+    ]
+    packed = telemetry.TelemetryData.pack_many(samples)
+
+    start = time.perf_counter_ns()
+    for sample in samples:
+        cmd.run(sample)
+    run_time = (time.perf_counter_ns() - start) / SAMPLE_COUNT
+
+    start = time.perf_counter_ns()
+    arrays = command.unpack_telemetry_arrays(packed)
+    unpack_time = (time.perf_counter_ns() - start) / SAMPLE_COUNT
+
+    start = time.perf_counter_ns()
+    _, _, actions = cmd.run_batch(arrays["x"], arrays["y"], arrays["z"], arrays["yaw"])
+    batch_time = (time.perf_counter_ns() - start) / SAMPLE_COUNT
+
+    counts = np.bincount(actions, minlength=3)
+    print(f"Samples: {SAMPLE_COUNT}")
+    print(
+        f"Decisions: none {counts[command.ACTION_NONE]}, "
+        f"altitude {counts[command.ACTION_CHANGE_ALTITUDE]}, "
+        f"yaw {counts[command.ACTION_CHANGE_YAW]}"
+    )
+    print("Time (ns per sample):")
+    print(f"  run(), sending commands:     {run_time:.0f}")
+    print(f"  unpack_telemetry_arrays():   {unpack_time:.0f}")
+    print(f"  run_batch():                 {batch_time:.0f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Done!")
@@ -0,0 +1,254 @@
+"""
+Benchmark one fleet commanding many simulated vehicles over several links, reporting
+CPU of the ground side and end-to-end latency from each telemetry message being sent
+to the command it causes arriving back at the vehicle. To run:
+```
+python -m tests.benchmark.benchmark_fleet
+```
+"""
+
+import multiprocessing as mp
+import select
+import socket
+import statistics
+import time
+
+from pymavlink import mavutil
+
+from modules.command import command
+from modules.common.modules.logger import logger
+from modules.fleet import fleet
+from modules.router import mavlink_router
+
+
+VEHICLE_COUNT = 100
+LINK_COUNT = 2
+# Each vehicle sends LOCAL_POSITION_NED and ATTITUDE at this rate
+MESSAGE_RATE = 10.0  # Hz
+DURATION = 5.0  # seconds
+# Time for the last commands to arrive
+DRAIN_TIME = 0.5  # seconds
+RECEIVE_TIMEOUT = 0.1  # seconds
+
+# Vehicles stay at altitude 0, so every sample out of tolerance is commanded
+TARGET = command.Position(10.0, 20.0, 30.0)
+
+
+class Collector:
+    """
+    Endpoint of the router, keeping vehicle messages for the benchmark loop.
+    """
+
+    def __init__(self) -> None:
+        self.messages = []
+
+    def get_message_types(self) -> "list[str]":
+        """
+        Messages the fleet uses.
+        """
+        return ["HEARTBEAT", "LOCAL_POSITION_NED", "ATTITUDE"]
+
+    def get_inbound_queue(self) -> "Collector":
+        """
+        The collector is its own inbound queue.
+        """
+        return self
+
+    def put_many(  # pylint: disable=unused-argument
+        self, items: "list[object]", timeout: float | None = None
+    ) -> int:
+        """
+        Keeps the messages.
+        """
+        self.messages.extend(items)
+        return len(items)
+
+
+class SocketWriter:
+    """
+    File like object for the encoders of the simulated vehicles.
+    """
+
+    def __init__(self, connection: socket.socket) -> None:
+        self.connection = connection
+
+    def write(self, buffer: bytes) -> None:
+        """
+        Sends the frame.
+        """
+        self.connection.sendall(buffer)
+
+
+def simulate_link(
+    server: socket.socket, system_ids: "list[int]", results: mp.Queue  # type: ignore
+) -> None:
+    """
+    Simulated vehicles sharing one link. Sends telemetry of every vehicle at the message
+    rate, and matches each command received to the message that caused it.
+
+    The first message of a vehicle only starts its pair, every later message causes
+    exactly one command, so the Nth command answers the (N + 1)th message.
+    """
+    connection, _ = server.accept()
+    writer = SocketWriter(connection)
+    encoders = {
+        system_id: mavutil.mavlink.MAVLink(writer, system_id, 1) for system_id in system_ids
+    }
+    parser = mavutil.mavlink.MAVLink(None)
+
+    send_times = {system_id: [] for system_id in system_ids}
+    command_counts = {system_id: 0 for system_id in system_ids}
+    latencies = {system_id: [] for system_id in system_ids}
+
+    def receive_commands(timeout: float) -> None:
+        readable, _, _ = select.select([connection], [], [], timeout)
+        if len(readable) == 0:
+            return
+
+        data = connection.recv(65536)
+        if len(data) == 0:
+            return
+
+        receive_time = time.monotonic()
+        for msg in parser.parse_buffer(data) or []:
+            if msg.get_type() != "COMMAND_LONG":
+                continue
+
+            system_id = msg.target_system
+            index = command_counts[system_id] + 1
+            command_counts[system_id] += 1
+            if index < len(send_times[system_id]):
+                latencies[system_id].append(receive_time - send_times[system_id][index])
+
+    start_time = time.monotonic()
+    period = 1.0 / MESSAGE_RATE
+    next_time = start_time
+    sample = 0
+    while next_time < start_time + DURATION:
+        receive_commands(max(next_time - time.monotonic(), 0.0))
+        if time.monotonic() < next_time:
+            continue
+
+        time_boot_ms = int((next_time - start_time) * 1000.0)
+        for system_id, mav in encoders.items():
+            send_times[system_id].append(time.monotonic())
+            mav.local_position_ned_send(time_boot_ms, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+            send_times[system_id].append(time.monotonic())
+            mav.attitude_send(time_boot_ms, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+        sample += 1
+        next_time = start_time + sample * period
+
+    end_time = time.monotonic() + DRAIN_TIME
+    while time.monotonic() < end_time:
+        receive_commands(end_time - time.monotonic())
+
+    sent = sum(len(times) for times in send_times.values())
+    results.put((sent, latencies))
+    connection.close()
+
+
+def main() -> int:
+    """
+    Run the benchmark and print the results.
+    """
+    result, local_logger = logger.Logger.create("benchmark_fleet", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    assert local_logger is not None
+
+    results = mp.Queue()
+    simulators = []
+    connections = []
+    for link in range(LINK_COUNT):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        port = server.getsockname()[1]
+
+        system_ids = list(range(link + 1, VEHICLE_COUNT + 1, LINK_COUNT))
+        simulator = mp.Process(target=simulate_link, args=(server, system_ids, results))
+        simulator.start()
+        simulators.append(simulator)
+
+        connections.append(mavutil.mavlink_connection(f"tcp:127.0.0.1:{port}"))
+        server.close()
+
+    result, vehicles = fleet.Fleet.create(
+        TARGET, 0.5, 5.0, None, None, DURATION, VEHICLE_COUNT, connections, local_logger
+    )
+    assert result
+    assert vehicles is not None
+
+    routers = []
+    for connection in connections:
+        collector = Collector()
+        result, router = mavlink_router.MavlinkRouter.create(connection, [collector], local_logger)
+        assert result
+        routers.append((router, collector))
+
+    fds = {connection.fd: link for link, connection in enumerate(connections)}
+    processed = 0
+    start_time = time.monotonic()
+    start_cpu_time = time.process_time()
+    while time.monotonic() - start_time < DURATION + DRAIN_TIME:
+        readable, _, _ = select.select(list(fds), [], [], RECEIVE_TIMEOUT)
+        for fd in readable:
+            link = fds[fd]
+            router, collector = routers[link]
+            router.receive(0.0)
+            for msg in collector.messages:
+                vehicles.process(link, msg)
+
+            processed += len(collector.messages)
+            collector.messages.clear()
+
+    cpu_time = time.process_time() - start_cpu_time
+
+    sent = 0
+    latencies = {}
+    for _ in simulators:
+        link_sent, link_latencies = results.get()
+        sent += link_sent
+        latencies.update(link_latencies)
+
+    for simulator in simulators:
+        simulator.join()
+    for connection in connections:
+        connection.close()
+
+    all_latencies = sorted(latency for values in latencies.values() for latency in values)
+    vehicle_means = [statistics.mean(values) for values in latencies.values() if len(values) > 0]
+    print(f"{VEHICLE_COUNT} vehicles on {LINK_COUNT} links, {DURATION:.0f} s:")
+    print(f"  Messages sent/processed: {sent}/{processed}")
+    print(f"  Vehicles seen: {len(vehicles.get_vehicles())}")
+    print(
+        f"  Ground CPU: {cpu_time / (DURATION + DRAIN_TIME) * 100.0:.1f}% of a core, "
+        f"{cpu_time / max(processed, 1) * 1e6:.1f} us per message, "
+        f"{cpu_time / DURATION / VEHICLE_COUNT * 1000.0:.3f} ms per vehicle per second"
+    )
+    print(f"  Commands matched: {len(all_latencies)}")
+    if len(all_latencies) > 0:
+        print(
+            f"  Latency p50/p99/max: "
+            f"{all_latencies[len(all_latencies) // 2] * 1000.0:.2f}/"
+            f"{all_latencies[int(len(all_latencies) * 0.99)] * 1000.0:.2f}/"
+            f"{all_latencies[-1] * 1000.0:.2f} ms"
+        )
+        print(
+            f"  Per vehicle mean latency best/median/worst: "
+            f"{min(vehicle_means) * 1000.0:.2f}/{statistics.median(vehicle_means) * 1000.0:.2f}/"
+            f"{max(vehicle_means) * 1000.0:.2f} ms"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Done!")
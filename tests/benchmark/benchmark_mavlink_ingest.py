@@ -0,0 +1,148 @@
+"""
+Benchmark receiving a high rate MAVLink stream with a recv_match() loop and with
+the router's bulk reads. To run:
+```
+python -m tests.benchmark.benchmark_mavlink_ingest
+```
+"""
+
+import multiprocessing as mp
+import socket
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from modules.router import mavlink_router
+
+
+FRAME_COUNT = 100000
+RECEIVE_TIMEOUT = 1.0  # seconds
+
+
+class FrameRecorder:
+    """
+    File like object collecting encoded frames.
+    """
+
+    def __init__(self) -> None:
+        self.frames = []
+
+    def write(self, buffer: bytes) -> None:
+        """
+        Records the frame.
+        """
+        self.frames.append(bytes(buffer))
+
+
+def encode_stream() -> bytes:
+    """
+    Creates a stream of ATTITUDE, LOCAL_POSITION_NED, and the occasional HEARTBEAT.
+    """
+    recorder = FrameRecorder()
+    mav = mavutil.mavlink.MAVLink(recorder, 1, 1)
+    for i in range(FRAME_COUNT):
+        if i % 50 == 0:
+            mav.heartbeat_send(0, 0, 0, 0, 0)
+        elif i % 2 == 0:
+            mav.attitude_send(i, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6)
+        else:
+            mav.local_position_ned_send(i, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0)
+
+    return b"".join(recorder.frames)
+
+
+def send_stream(server: socket.socket, stream: bytes) -> None:
+    """
+    Fake drone process, sends the whole stream as fast as possible to the first connection.
+    """
+    drone, _ = server.accept()
+    drone.sendall(stream)
+    # Let the receiver finish before closing
+    drone.recv(1)
+    drone.close()
+
+
+def measure(stream: bytes, receive: "(...) -> int") -> "tuple[float, float]":  # type: ignore
+    """
+    Receives the stream over a local TCP connection.
+
+    receive: Receives some messages from the connection, returns how many.
+
+    Returns wall time and CPU time of the receiving process in seconds.
+    """
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    port = server.getsockname()[1]
+
+    drone = mp.Process(target=send_stream, args=(server, stream))
+    drone.start()
+
+    connection = mavutil.mavlink_connection(f"tcp:127.0.0.1:{port}")
+
+    start_time = time.perf_counter()
+    start_cpu_time = time.process_time()
+    count = 0
+    while count < FRAME_COUNT:
+        received = receive(connection)
+        if received == 0:
+            print(f"  Timed out after {count} frames")
+            break
+
+        count += received
+
+    wall_time = time.perf_counter() - start_time
+    cpu_time = time.process_time() - start_cpu_time
+
+    connection.write(b"\0")
+    drone.join()
+    connection.close()
+    server.close()
+
+    return wall_time, cpu_time
+
+
+def main() -> int:
+    """
+    Run the benchmark and print the results.
+    """
+    result, local_logger = logger.Logger.create("benchmark_mavlink_ingest", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    assert local_logger is not None
+
+    def recv_match_receive(connection: mavutil.mavfile) -> int:
+        message = connection.recv_match(blocking=True, timeout=RECEIVE_TIMEOUT)
+        return 0 if message is None else 1
+
+    routers = {}
+
+    def router_receive(connection: mavutil.mavfile) -> int:
+        if connection not in routers:
+            result, router = mavlink_router.MavlinkRouter.create(connection, [], local_logger)
+            assert result
+            routers[connection] = router
+
+        return routers[connection].receive(RECEIVE_TIMEOUT)
+
+    stream = encode_stream()
+    print(f"{FRAME_COUNT} frames, {len(stream)} bytes:")
+    for name, receive in [("recv_match", recv_match_receive), ("router", router_receive)]:
+        wall_time, cpu_time = measure(stream, receive)
+        print(
+            f"  {name:<12} frames/s: {FRAME_COUNT / wall_time:>10.0f}   "
+            f"CPU per frame: {cpu_time / FRAME_COUNT * 1e6:>6.2f} us"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Done!")
@@ -0,0 +1,226 @@
+"""
+Compare the commands sent by reactive and predictive Command on the same recorded trace.
+To run on a recording made by the router worker:
+```
+python -m tests.benchmark.benchmark_predictive_command logs/flight_<time>.mavrec
+```
+Without a recording, a simulated climb and turn is recorded first.
+"""
+
+import argparse
+import math
+import pathlib
+import random
+import tempfile
+
+from pymavlink import mavutil
+
+from modules.command import command
+from modules.command import command_tracker
+from modules.common.modules.logger import logger
+from modules.recorder import flight_recorder
+from modules.recorder import flight_replayer
+from modules.telemetry import telemetry
+
+
+TARGET = command.Position(10.0, 20.0, 30.0)
+HEIGHT_TOLERANCE = 0.5
+ANGLE_TOLERANCE = 5.0
+PREDICTION_HORIZON = 0.5  # seconds
+# Same as bootcamp_main
+COMMAND_LIMITS = {
+    mavutil.mavlink.MAV_CMD_CONDITION_CHANGE_ALT: command_tracker.CommandLimits(
+        0.5, 5.0, 0.1, 0.05
+    ),
+    mavutil.mavlink.MAV_CMD_CONDITION_YAW: command_tracker.CommandLimits(
+        0.5, 5.0, math.radians(1.0), math.radians(1.0)
+    ),
+}
+
+# Simulated flight
+SIMULATION_DURATION = 30.0  # seconds
+SIMULATION_RATE = 10.0  # Hz
+START_ALTITUDE = 20.0  # m
+CLIMB_RATE = 1.0  # m/s
+TURN_RATE = math.radians(5.0)  # rad/s
+ALTITUDE_NOISE = 0.05  # m
+YAW_NOISE = math.radians(0.5)  # rad
+
+
+class CountingConnection:
+    """
+    Counts sent frames.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mav = mavutil.mavlink.MAVLink(self, 255, 0)
+
+    def write(self, buffer: bytes) -> None:  # pylint: disable=unused-argument
+        """
+        Counts the frame.
+        """
+        self.count += 1
+
+
+class FrameCollector:
+    """
+    Keeps the last encoded frame.
+    """
+
+    def __init__(self) -> None:
+        self.frame = b""
+
+    def write(self, buffer: bytes) -> None:
+        """
+        Keeps the frame.
+        """
+        self.frame = bytes(buffer)
+
+
+def record_simulated_flight(path: pathlib.Path, local_logger: logger.Logger) -> bool:
+    """
+    Records a drone climbing to the target altitude while turning towards the target,
+    at constant rates with measurement noise.
+    """
+    result, recorder = flight_recorder.FlightRecorder.create(path, 1.0, local_logger)
+    if not result:
+        return False
+
+    assert recorder is not None
+
+    collector = FrameCollector()
+    mav = mavutil.mavlink.MAVLink(collector, 1, 1)
+    generator = random.Random(0)
+    required_yaw = math.atan2(TARGET.y, TARGET.x)
+    z = START_ALTITUDE
+    yaw = 0.0
+    period = 1.0 / SIMULATION_RATE
+    for i in range(int(SIMULATION_DURATION * SIMULATION_RATE)):
+        z_velocity = CLIMB_RATE if TARGET.z - z > CLIMB_RATE * period else 0.0
+        yaw_speed = TURN_RATE if required_yaw - yaw > TURN_RATE * period else 0.0
+        z += z_velocity * period
+        yaw += yaw_speed * period
+
+        time_boot_ms = int(i * period * 1000.0)
+        mav.local_position_ned_send(
+            time_boot_ms,
+            0.0,
+            0.0,
+            z + generator.gauss(0.0, ALTITUDE_NOISE),
+            0.0,
+            0.0,
+            z_velocity,
+        )
+        recorder.record(flight_recorder.INBOUND, collector.frame, i * period)
+        mav.attitude_send(
+            time_boot_ms, 0.0, 0.0, yaw + generator.gauss(0.0, YAW_NOISE), 0.0, 0.0, yaw_speed
+        )
+        recorder.record(flight_recorder.INBOUND, collector.frame, i * period)
+
+    recorder.close()
+    return True
+
+
+def count_commands(
+    path: pathlib.Path,
+    limits: "dict[int, command_tracker.CommandLimits] | None",
+    prediction_horizon: float | None,
+    local_logger: logger.Logger,
+) -> "tuple[int, int]":
+    """
+    Replays the received telemetry of a recording through Command, at recorded time.
+
+    Returns the number of commands sent and held.
+    """
+    result, replayer = flight_replayer.FlightReplayer.create(path, local_logger)
+    assert result
+    assert replayer is not None
+
+    tracker = None
+    if limits is not None:
+        result, tracker = command_tracker.CommandTracker.create(limits)
+        assert result
+
+    connection = CountingConnection()
+    result, telem = telemetry.Telemetry.create(0.0, connection, local_logger)
+    assert result
+    assert telem is not None
+
+    result, cmd = command.Command.create(
+        connection,
+        TARGET,
+        HEIGHT_TOLERANCE,
+        ANGLE_TOLERANCE,
+        local_logger,
+        tracker,
+        prediction_horizon=prediction_horizon,
+    )
+    assert result
+    assert cmd is not None
+
+    parser = mavutil.mavlink.MAVLink(None)
+    for timestamp, direction, frame in replayer.read():
+        if direction != flight_recorder.INBOUND:
+            continue
+
+        for msg in parser.parse_buffer(frame) or []:
+            if msg.get_type() not in ("LOCAL_POSITION_NED", "ATTITUDE"):
+                continue
+
+            sample = telem.combine(msg)
+            if sample is None or not sample[0]:
+                continue
+
+            cmd.run(sample[1], timestamp)
+
+    return connection.count, cmd.held_count
+
+
+def main() -> int:
+    """
+    Run the comparison and print the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("path", nargs="?", type=pathlib.Path, help="Recording, simulated if none")
+    parser.add_argument(
+        "--horizon", type=float, default=PREDICTION_HORIZON, help="Prediction horizon (s)"
+    )
+    args = parser.parse_args()
+
+    result, local_logger = logger.Logger.create("benchmark_predictive_command", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    assert local_logger is not None
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.path
+        if path is None:
+            path = pathlib.Path(directory, "simulated.mavrec")
+            if not record_simulated_flight(path, local_logger):
+                print("ERROR: Failed to record simulated flight")
+                return -1
+
+        print(f"Trace: {path if args.path is not None else 'simulated climb and turn'}")
+        print(f"Prediction horizon: {args.horizon} s")
+        for name, limits in [("Every sample", None), ("Command tracker", COMMAND_LIMITS)]:
+            reactive_count, _ = count_commands(path, limits, None, local_logger)
+            predictive_count, held_count = count_commands(path, limits, args.horizon, local_logger)
+            avoided = reactive_count - predictive_count
+            percentage = avoided / reactive_count * 100.0 if reactive_count > 0 else 0.0
+            print(f"{name}:")
+            print(f"  Reactive commands:   {reactive_count}")
+            print(f"  Predictive commands: {predictive_count} ({held_count} held)")
+            print(f"  Avoided:             {avoided} ({percentage:.1f}%)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Done!")
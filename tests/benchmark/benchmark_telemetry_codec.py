@@ -0,0 +1,124 @@
+"""
+Benchmark the TelemetryData binary layout against pickling a plain object. To run:
+```
+python -m tests.benchmark.benchmark_telemetry_codec
+```
+"""
+
+import pickle
+import time
+
+from modules.telemetry import telemetry
+
+
+RECORD_COUNT = 100_000
+
+
+# Original layout of TelemetryData, with a per instance __dict__
+class PlainTelemetryData:  # pylint: disable=too-many-instance-attributes
+    """
+    TelemetryData before the binary layout.
+    """
+
+    def __init__(
+        self,
+        time_since_boot: int | None = None,
+        x: float | None = None,
+        y: float | None = None,
+        z: float | None = None,
+        x_velocity: float | None = None,
+        y_velocity: float | None = None,
+        z_velocity: float | None = None,
+        roll: float | None = None,
+        pitch: float | None = None,
+        yaw: float | None = None,
+        roll_speed: float | None = None,
+        pitch_speed: float | None = None,
+        yaw_speed: float | None = None,
+    ) -> None:
+        self.time_since_boot = time_since_boot
+        self.x = x
+        self.y = y
+        self.z = z
+        self.x_velocity = x_velocity
+        self.y_velocity = y_velocity
+        self.z_velocity = z_velocity
+        self.roll = roll
+        self.pitch = pitch
+        self.yaw = yaw
+        self.roll_speed = roll_speed
+        self.pitch_speed = pitch_speed
+        self.yaw_speed = yaw_speed
+
+
+def make_arguments(i: int) -> "tuple":
+    """
+    Deterministic field values for record i.
+    """
+    return (i,) + tuple(i * 0.001 + j for j in range(12))
+
+
+def time_per_record(function: "(...) -> object", items: list) -> float:  # type: ignore
+    """
+    Applies function to every item and returns nanoseconds per item.
+    """
+    start = time.perf_counter_ns()
+    for item in items:
+        function(item)
+    return (time.perf_counter_ns() - start) / len(items)
+
+
+def main() -> int:
+    """
+    Run the benchmark and print the results.
+    """
+    plain_records = [PlainTelemetryData(*make_arguments(i)) for i in range(RECORD_COUNT)]
+    records = [telemetry.TelemetryData(*make_arguments(i)) for i in range(RECORD_COUNT)]
+
+    plain_pickles = [pickle.dumps(record) for record in plain_records]
+    pickles = [pickle.dumps(record) for record in records]
+    encoded = [record.to_bytes() for record in records]
+
+    print(f"Records: {RECORD_COUNT}")
+    print("Size per record (bytes):")
+    print(f"  pickle, plain object:        {len(plain_pickles[-1])}")
+    print(f"  pickle, TelemetryData:       {len(pickles[-1])}")
+    print(f"  to_bytes():                  {len(encoded[-1])}")
+
+    print("Encode (ns per record):")
+    print(f"  pickle, plain object:        {time_per_record(pickle.dumps, plain_records):.0f}")
+    print(f"  pickle, TelemetryData:       {time_per_record(pickle.dumps, records):.0f}")
+    print(
+        "  to_bytes():                  "
+        f"{time_per_record(telemetry.TelemetryData.to_bytes, records):.0f}"
+    )
+
+    print("Decode (ns per record):")
+    print(f"  unpickle, plain object:      {time_per_record(pickle.loads, plain_pickles):.0f}")
+    print(f"  unpickle, TelemetryData:     {time_per_record(pickle.loads, pickles):.0f}")
+    print(
+        "  from_bytes():                "
+        f"{time_per_record(telemetry.TelemetryData.from_bytes, encoded):.0f}"
+    )
+
+    start = time.perf_counter_ns()
+    packed = telemetry.TelemetryData.pack_many(records)
+    pack_time = (time.perf_counter_ns() - start) / RECORD_COUNT
+
+    start = time.perf_counter_ns()
+    telemetry.TelemetryData.unpack_many(packed)
+    unpack_time = (time.perf_counter_ns() - start) / RECORD_COUNT
+
+    print("Bulk (ns per record):")
+    print(f"  pack_many():                 {pack_time:.0f}")
+    print(f"  unpack_many():               {unpack_time:.0f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Done!")
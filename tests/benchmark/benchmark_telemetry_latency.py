@@ -0,0 +1,154 @@
+"""
+Benchmark latency from the last needed frame arriving to TelemetryData being returned,
+with the original polling loop and the current readiness wait. To run:
+```
+python -m tests.benchmark.benchmark_telemetry_latency
+```
+"""
+
+import socket
+import statistics
+import threading
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from modules.telemetry import telemetry
+
+
+SAMPLE_COUNT = 100
+# Time between samples sent by the fake drone, not a multiple of the polling period
+SAMPLE_PERIOD = 0.0137  # seconds
+TIMEOUT = 1.0  # seconds
+
+
+class SocketWriter:
+    """
+    File like object for the encoder of the fake drone.
+    """
+
+    def __init__(self, connection: socket.socket) -> None:
+        self.connection = connection
+
+    def write(self, buffer: bytes) -> None:
+        """
+        Sends the frame.
+        """
+        self.connection.sendall(buffer)
+
+
+def original_run(connection: mavutil.mavfile) -> bool:
+    """
+    Telemetry.run before the readiness wait, without logging.
+
+    Returns whether both messages were received.
+    """
+    start_time = time.time()
+
+    position_msg = None
+    attitude_msg = None
+    while time.time() - start_time < TIMEOUT:
+        if position_msg is None:
+            position_msg = connection.recv_match(type="LOCAL_POSITION_NED", blocking=False)
+
+        if attitude_msg is None:
+            attitude_msg = connection.recv_match(type="ATTITUDE", blocking=False)
+
+        if position_msg is not None and attitude_msg is not None:
+            return True
+
+        time.sleep(0.01)
+
+    return False
+
+
+def send_samples(drone: socket.socket, send_times: "list[float]") -> None:
+    """
+    Sends LOCAL_POSITION_NED then ATTITUDE every sample period, recording when the
+    ATTITUDE frame was sent.
+    """
+    mav = mavutil.mavlink.MAVLink(SocketWriter(drone), 1, 1)
+    for i in range(SAMPLE_COUNT):
+        time.sleep(SAMPLE_PERIOD)
+        mav.local_position_ned_send(i, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0)
+        send_times.append(time.perf_counter())
+        mav.attitude_send(i, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6)
+
+
+def measure(create_run: "(...) -> object") -> "list[float]":  # type: ignore
+    """
+    Receives each sample sent by a fake drone on a local TCP connection.
+
+    create_run: Returns the function receiving one sample from the connection.
+
+    Returns the latency of each sample in seconds.
+    """
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    port = server.getsockname()[1]
+
+    connection = mavutil.mavlink_connection(f"tcp:127.0.0.1:{port}")
+    drone, _ = server.accept()
+    drone.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    run = create_run(connection)
+
+    send_times = []
+    sender = threading.Thread(target=send_samples, args=(drone, send_times))
+    sender.start()
+
+    receive_times = []
+    for _ in range(SAMPLE_COUNT):
+        run()
+        receive_times.append(time.perf_counter())
+
+    sender.join()
+    connection.close()
+    drone.close()
+    server.close()
+
+    return [receive - send for send, receive in zip(send_times, receive_times)]
+
+
+def main() -> int:
+    """
+    Run the benchmark and print the results.
+    """
+    result, local_logger = logger.Logger.create("benchmark_telemetry_latency", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    assert local_logger is not None
+
+    def create_original_run(connection: mavutil.mavfile) -> "(...) -> object":  # type: ignore
+        return lambda: original_run(connection)
+
+    def create_current_run(connection: mavutil.mavfile) -> "(...) -> object":  # type: ignore
+        result, telem = telemetry.Telemetry.create(TIMEOUT, connection, local_logger)
+        assert result
+        assert telem is not None
+        return telem.run
+
+    print("Frame arrival to TelemetryData latency (ms):")
+    for name, create_run in [("original", create_original_run), ("current", create_current_run)]:
+        latencies = sorted(latency * 1000.0 for latency in measure(create_run))
+        print(
+            f"  {name:<10} "
+            f"mean: {statistics.mean(latencies):>7.3f}   "
+            f"median: {statistics.median(latencies):>7.3f}   "
+            f"p99: {latencies[int(len(latencies) * 0.99) - 1]:>7.3f}   "
+            f"max: {latencies[-1]:>7.3f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Done!")
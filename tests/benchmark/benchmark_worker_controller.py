@@ -0,0 +1,118 @@
+"""
+Benchmark worker loop iterations per second with the original and current controller. To run:
+```
+python -m tests.benchmark.benchmark_worker_controller
+```
+"""
+
+import multiprocessing as mp
+import time
+
+from modules.telemetry import telemetry
+from utilities.workers import shared_memory_blackboard
+from utilities.workers import worker_controller
+
+
+LOOP_DURATION = 2.0  # seconds
+
+
+class OriginalWorkerController:
+    """
+    Loop checks of WorkerController before the shared flags.
+    """
+
+    def __init__(self) -> None:
+        self.__pause = mp.BoundedSemaphore(1)
+        self.__exit_queue = mp.Queue(1)
+
+    def check_pause(self) -> None:
+        """
+        Always acquires and releases the semaphore.
+        """
+        self.__pause.acquire()
+        self.__pause.release()
+
+    def is_exit_requested(self) -> bool:
+        """
+        Checks the queue.
+        """
+        return not self.__exit_queue.empty()
+
+
+def telemetry_loop(
+    controller: "worker_controller.WorkerController | OriginalWorkerController",
+    blackboard: shared_memory_blackboard.SharedMemoryBlackboard,
+) -> float:
+    """
+    Telemetry worker loop with the MAVLink reads taken out: publish a sample every iteration.
+
+    Returns iterations per second.
+    """
+    telemetry_data = telemetry.TelemetryData(*range(13))
+
+    iterations = 0
+    end_time = time.perf_counter() + LOOP_DURATION
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        blackboard.write(telemetry_data.to_bytes())
+        iterations += 1
+        if time.perf_counter() > end_time:
+            break
+
+    return iterations / LOOP_DURATION
+
+
+def command_loop(
+    controller: "worker_controller.WorkerController | OriginalWorkerController",
+    blackboard: shared_memory_blackboard.SharedMemoryBlackboard,
+) -> float:
+    """
+    Command worker loop with the decision taken out: read the latest sample every iteration.
+
+    Returns iterations per second.
+    """
+    iterations = 0
+    end_time = time.perf_counter() + LOOP_DURATION
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        _, data = blackboard.read()
+        assert data is not None
+        telemetry.TelemetryData.from_bytes(data)
+        iterations += 1
+        if time.perf_counter() > end_time:
+            break
+
+    return iterations / LOOP_DURATION
+
+
+def main() -> int:
+    """
+    Run the benchmark and print the results.
+    """
+    blackboard = shared_memory_blackboard.SharedMemoryBlackboard(
+        telemetry.TelemetryData.PACKED_SIZE
+    )
+    blackboard.write(telemetry.TelemetryData(*range(13)).to_bytes())
+
+    controllers = [
+        ("original", OriginalWorkerController()),
+        ("current", worker_controller.WorkerController()),
+    ]
+
+    print("Loop iterations per second:")
+    for name, controller in controllers:
+        telemetry_rate = telemetry_loop(controller, blackboard)
+        command_rate = command_loop(controller, blackboard)
+        print(f"  {name:<10} telemetry: {telemetry_rate:>12.0f}   command: {command_rate:>12.0f}")
+
+    blackboard.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Done!")
@@ -0,0 +1,75 @@
+"""
+Mock drone that plays back a flight recording to whatever connects. To run:
+```
+python -m tests.integration.mock_drones.replay_drone logs/flight_<time>.mavrec --speed 1
+```
+"""
+
+import argparse
+import os
+import pathlib
+import socket
+
+from modules.common.modules.logger import logger
+from modules.recorder import flight_replayer
+
+
+HOST = "localhost"
+PORT = 12345
+
+
+def main() -> int:
+    """
+    Wait for a connection, then send it the inbound frames of a recording.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", type=pathlib.Path, help="Recording to play back")
+    parser.add_argument(
+        "--speed", type=float, default=0.0, help="Multiple of recorded speed, 0 for maximum"
+    )
+    parser.add_argument("--start", type=float, default=None, help="Recorded time to start from")
+    args = parser.parse_args()
+
+    # Instantiate logger after main starts
+    drone_name = pathlib.Path(__file__).stem
+    process_id = os.getpid()
+    result, local_logger = logger.Logger.create(f"{drone_name}_{process_id}", True)
+    if not result:
+        print("ERROR: Worker failed to create drone logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    local_logger.info("Logger initialized")
+
+    result, replayer = flight_replayer.FlightReplayer.create(args.path, local_logger)
+    if not result:
+        local_logger.error("Failed to create FlightReplayer")
+        return -2
+
+    assert replayer is not None
+
+    speed = args.speed if args.speed > 0.0 else None
+
+    with socket.create_server((HOST, PORT)) as server:
+        connection, address = server.accept()
+        with connection:
+            local_logger.info(f"Replaying to {address}")
+            try:
+                count = replayer.replay(connection.sendall, speed, start_time=args.start)
+            except OSError as e:
+                local_logger.error(f"Connection lost: {e}")
+                return -3
+
+    local_logger.info(f"Replayed {count} frames")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"Failed with return code {result_main}")
+    else:
+        print("Done!")
@@ -241,7 +241,11 @@ def main() -> int:
         TARGET,
         HEIGHT_TOLERANCE,
         ANGLE_TOLERANCE,
+        None,
+        None,
+        None,
         connection,
+        None,
         input_queue,
         output_queue,
         controller,
@@ -32,6 +32,8 @@ ERROR_TOLERANCE = 1e-2
 # =================================================================================================
 # Add your own constants here
 REPORT_QUEUE_MAX_SIZE = 10
+DISCONNECT_TIMEOUT = HEARTBEAT_PERIOD * DISCONNECT_THRESHOLD
+CHECK_PERIOD = 0.1
 # =================================================================================================
 #                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
 # =================================================================================================
@@ -141,7 +143,8 @@ def main() -> int:
     threading.Thread(target=read_queue, args=(report_queue, controller, main_logger)).start()
 
     heartbeat_receiver_worker.heartbeat_receiver_worker(
-        DISCONNECT_THRESHOLD,
+        DISCONNECT_TIMEOUT,
+        CHECK_PERIOD,
         connection,
         report_queue,
         controller,
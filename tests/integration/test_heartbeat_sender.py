@@ -99,6 +99,7 @@ def main() -> int:
     threading.Timer(HEARTBEAT_PERIOD * NUM_TRIALS, stop, (controller,)).start()
 
     heartbeat_sender_worker.heartbeat_sender_worker(
+        HEARTBEAT_PERIOD,
         connection,
         controller,
     )
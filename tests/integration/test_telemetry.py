@@ -132,7 +132,11 @@ def main() -> int:
 
     telemetry_worker.telemetry_worker(
         TELEMETRY_PERIOD,
+        False,
+        None,
+        None,
         connection,
+        None,
         output_queue,
         controller,
     )
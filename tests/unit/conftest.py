@@ -0,0 +1,112 @@
+"""
+Fakes and fixtures shared by the unit tests.
+"""
+
+import pytest
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+class FakeConnection:
+    """
+    Replays messages of the requested types and collects the frames sent through `mav` .
+    """
+
+    def __init__(
+        self,
+        messages: "list[object] | None" = None,
+        source_system: int = 255,
+        source_component: int = 0,
+    ) -> None:
+        self.messages = [] if messages is None else list(messages)
+        self.frames = []
+        self.mav = mavutil.mavlink.MAVLink(self, source_system, source_component)
+
+    def recv_match(  # pylint: disable=redefined-builtin,unused-argument
+        self,
+        type: "str | list[str] | None" = None,
+        blocking: bool = False,
+        timeout: float | None = None,
+    ) -> "object | None":
+        """
+        Returns the next message if it is one of the types.
+        """
+        if len(self.messages) == 0:
+            return None
+
+        if isinstance(type, str):
+            type = [type]
+
+        if type is not None and self.messages[0].get_type() not in type:
+            return None
+
+        return self.messages.pop(0)
+
+    def write(self, buffer: bytes) -> None:
+        """
+        Records the frame.
+        """
+        self.frames.append(bytes(buffer))
+
+    def send(self, frames: "list[bytes]") -> None:
+        """
+        Records the frames, like `MavlinkRouter.send` .
+        """
+        self.frames.extend(frames)
+
+    def get_sent(self) -> "list[object]":
+        """
+        Decodes the frames sent.
+        """
+        return mavutil.mavlink.MAVLink(None).parse_buffer(b"".join(self.frames)) or []
+
+
+def encode_frames(
+    types: str,
+    source_system: int = 1,
+    mav_type: int = mavutil.mavlink.MAV_TYPE_QUADROTOR,
+) -> bytes:
+    """
+    Encodes messages in order, P for LOCAL_POSITION_NED, A for ATTITUDE, H for HEARTBEAT.
+    The time of each message and its x or roll is its index.
+    """
+    connection = FakeConnection(source_system=source_system, source_component=1)
+    for i, message_type in enumerate(types):
+        if message_type == "P":
+            connection.mav.local_position_ned_send(i, float(i), 0.0, 0.0, 0.0, 0.0, 0.0)
+        elif message_type == "A":
+            connection.mav.attitude_send(i, float(i), 0.0, 0.0, 0.0, 0.0, 0.0)
+        else:
+            connection.mav.heartbeat_send(mav_type, 0, 0, 0, 0)
+
+    return b"".join(connection.frames)
+
+
+def encode_messages(
+    types: str,
+    source_system: int = 1,
+    mav_type: int = mavutil.mavlink.MAV_TYPE_QUADROTOR,
+) -> "list[object]":
+    """
+    Decoded messages of `encode_frames` .
+    """
+    return mavutil.mavlink.MAVLink(None).parse_buffer(encode_frames(types, source_system, mav_type))
+
+
+@pytest.fixture()
+def test_logger(request: pytest.FixtureRequest) -> logger.Logger:  # type: ignore
+    """
+    Creates a logger named after the test module that does not log to file.
+    """
+    name = request.module.__name__.split(".")[-1]
+    result, instance = logger.Logger.create(name, False)
+    assert result
+    assert instance is not None
+
+    yield instance  # type: ignore
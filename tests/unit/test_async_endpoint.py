@@ -0,0 +1,299 @@
+"""
+Test async endpoint and the coroutines using it.
+"""
+
+import asyncio
+import socket
+
+import pytest
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from modules.heartbeat import heartbeat_receiver
+from modules.router import async_endpoint
+from modules.router import mavlink_router
+from modules.runtime import async_runtime_worker
+from modules.telemetry import telemetry
+from tests.unit import conftest
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+def create_endpoint(
+    message_types: "list[str]", recorder: conftest.FakeConnection
+) -> async_endpoint.AsyncEndpoint:
+    """
+    Creates an endpoint keeping at most 4 messages.
+    """
+    return async_endpoint.AsyncEndpoint(message_types, 4, recorder.send, 255, 0)
+
+
+class TestRecvMatchAsync:
+    """
+    Receiving without blocking the event loop.
+    """
+
+    def test_other_types_kept(self) -> None:
+        """
+        Messages of other types stay pending for later calls.
+        """
+
+        async def receive() -> "list[str]":
+            endpoint = create_endpoint(
+                ["LOCAL_POSITION_NED", "ATTITUDE"], conftest.FakeConnection()
+            )
+            endpoint.put_many(conftest.encode_messages("PA"))
+            first = await endpoint.recv_match_async(type="ATTITUDE", timeout=0.0)
+            second = await endpoint.recv_match_async(timeout=0.0)
+            return [first.get_type(), second.get_type()]
+
+        # Run
+        types = asyncio.run(receive())
+
+        # Test
+        assert types == ["ATTITUDE", "LOCAL_POSITION_NED"]
+
+    def test_waits_for_put(self) -> None:
+        """
+        A waiting receive wakes up when the router puts a message.
+        """
+
+        async def receive() -> object:
+            endpoint = create_endpoint(["HEARTBEAT"], conftest.FakeConnection())
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.01, endpoint.put_many, conftest.encode_messages("H"))
+            return await endpoint.recv_match_async(type="HEARTBEAT", timeout=1.0)
+
+        # Run
+        message = asyncio.run(receive())
+
+        # Test
+        assert message is not None
+        assert message.get_type() == "HEARTBEAT"
+
+    def test_timeout(self) -> None:
+        """
+        Returns None when nothing arrives in time.
+        """
+        # Setup
+        endpoint = create_endpoint(["HEARTBEAT"], conftest.FakeConnection())
+
+        # Run
+        message = asyncio.run(endpoint.recv_match_async(type="HEARTBEAT", timeout=0.01))
+
+        # Test
+        assert message is None
+
+    def test_closed(self) -> None:
+        """
+        The router's None wakes up a waiting receive.
+        """
+
+        async def receive() -> object:
+            endpoint = create_endpoint(["HEARTBEAT"], conftest.FakeConnection())
+            asyncio.get_running_loop().call_soon(endpoint.put, None)
+            return await endpoint.recv_match_async(type="HEARTBEAT")
+
+        # Run
+        message = asyncio.run(asyncio.wait_for(receive(), 1.0))
+
+        # Test
+        assert message is None
+
+    def test_oldest_dropped(self) -> None:
+        """
+        Only the newest messages are kept.
+        """
+        # Setup
+        endpoint = create_endpoint(["LOCAL_POSITION_NED"], conftest.FakeConnection())
+        endpoint.put_many(conftest.encode_messages("PPPPPP"))
+
+        async def receive_all() -> "list[float]":
+            values = []
+            while True:
+                message = await endpoint.recv_match_async(timeout=0.0)
+                if message is None:
+                    return values
+
+                values.append(message.x)
+
+        # Run
+        values = asyncio.run(receive_all())
+
+        # Test
+        assert values == [2.0, 3.0, 4.0, 5.0]
+
+    def test_send(self) -> None:
+        """
+        Encoded frames go straight to the router.
+        """
+        # Setup
+        recorder = conftest.FakeConnection()
+        endpoint = create_endpoint([], recorder)
+
+        # Run
+        endpoint.mav.heartbeat_send(0, 0, 0, 0, 0)
+
+        # Test
+        assert len(recorder.frames) == 1
+        message = mavutil.mavlink.MAVLink(None).parse_char(recorder.frames[0])
+        assert message.get_type() == "HEARTBEAT"
+
+
+class TestCoroutines:
+    """
+    Heartbeat receiver and telemetry on an async endpoint.
+    """
+
+    def test_heartbeat_receiver(self, test_logger: logger.Logger) -> None:
+        """
+        Connected after a heartbeat, disconnected once the deadline passes.
+        """
+        # Setup
+        endpoint = create_endpoint(["HEARTBEAT"], conftest.FakeConnection())
+        result, receiver = heartbeat_receiver.HeartbeatReceiver.create(
+            0.05, 0.01, endpoint, test_logger
+        )
+        assert result
+        assert receiver is not None
+        endpoint.put_many(conftest.encode_messages("H"))
+
+        async def run_until_disconnected() -> "list[str]":
+            statuses = [await receiver.run_async()]
+            while statuses[-1] == "Connected":
+                statuses.append(await receiver.run_async())
+
+            return statuses
+
+        # Run
+        statuses = asyncio.run(asyncio.wait_for(run_until_disconnected(), 1.0))
+
+        # Test
+        assert statuses[0] == "Connected"
+        assert statuses[-1] == "Disconnected"
+
+    def test_telemetry_stream(self, test_logger: logger.Logger) -> None:
+        """
+        Same samples as the blocking stream.
+        """
+        # Setup
+        endpoint = create_endpoint(["LOCAL_POSITION_NED", "ATTITUDE"], conftest.FakeConnection())
+        result, telem = telemetry.Telemetry.create(0.01, endpoint, test_logger)
+        assert result
+        assert telem is not None
+        endpoint.put_many(conftest.encode_messages("PPAA"))
+
+        async def take(count: int) -> "list[tuple]":
+            samples = telem.stream_async()
+            return [await anext(samples) for _ in range(count)]
+
+        # Run
+        results = asyncio.run(take(3))
+
+        # Test
+        assert [result for result, _ in results] == [True, True, False]
+        assert [(data.x, data.roll) for _, data in results[:2]] == [(1.0, 2.0), (1.0, 3.0)]
+
+    def test_telemetry_run(self, test_logger: logger.Logger) -> None:
+        """
+        Waits for both messages.
+        """
+        # Setup
+        endpoint = create_endpoint(["LOCAL_POSITION_NED", "ATTITUDE"], conftest.FakeConnection())
+        result, telem = telemetry.Telemetry.create(0.01, endpoint, test_logger)
+        assert result
+        assert telem is not None
+        endpoint.put_many(conftest.encode_messages("AP"))
+
+        # Run
+        result, data = asyncio.run(telem.run_async())
+
+        # Test
+        assert result
+        assert data is not None
+        assert (data.x, data.roll) == (1.0, 0.0)
+
+
+class SocketConnection:
+    """
+    Connection with a file descriptor that never becomes readable.
+    """
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.fd = sock.fileno()
+        self.source_system = 255
+        self.source_component = 0
+
+
+async def idle(*args: object) -> None:  # pylint: disable=unused-argument
+    """
+    Coroutine running until cancelled.
+    """
+    await asyncio.Event().wait()
+
+
+async def fail(*args: object) -> None:  # pylint: disable=unused-argument
+    """
+    Coroutine failing after a short time.
+    """
+    await asyncio.sleep(0.01)
+    raise RuntimeError("Test failure")
+
+
+class TestRun:
+    """
+    Runtime ends when a coroutine fails.
+    """
+
+    def test_coroutine_failure(
+        self, test_logger: logger.Logger, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """
+        Returns without exit being requested.
+        """
+        # Setup
+        monkeypatch.setattr(async_runtime_worker, "send_heartbeats", fail)
+        monkeypatch.setattr(async_runtime_worker, "receive_heartbeats", idle)
+        monkeypatch.setattr(async_runtime_worker, "gather_telemetry", idle)
+
+        local_socket, remote_socket = socket.socketpair()
+        result, router = mavlink_router.MavlinkRouter.create(
+            SocketConnection(local_socket), [], test_logger
+        )
+        assert result
+        assert router is not None
+
+        controller = worker_controller.WorkerController()
+
+        # Run
+        result = asyncio.run(
+            asyncio.wait_for(
+                async_runtime_worker.run(
+                    router,
+                    1.0,
+                    5.0,
+                    0.5,
+                    1.0,
+                    True,
+                    None,
+                    None,
+                    None,
+                    None,
+                    None,
+                    controller,
+                    test_logger,
+                ),
+                5.0,
+            )
+        )
+
+        # Test
+        assert not result
+        assert not controller.is_exit_requested()
+
+        local_socket.close()
+        remote_socket.close()
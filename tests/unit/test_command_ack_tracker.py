@@ -0,0 +1,317 @@
+"""
+Test command acknowledgement tracking.
+"""
+
+import time
+
+import pytest
+from pymavlink import mavutil
+
+from modules.command import command
+from modules.command import command_ack_tracker
+from modules.common.modules.logger import logger
+from modules.telemetry import telemetry
+from tests.unit import conftest
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+ALTITUDE = mavutil.mavlink.MAV_CMD_CONDITION_CHANGE_ALT
+YAW = mavutil.mavlink.MAV_CMD_CONDITION_YAW
+OTHER = mavutil.mavlink.MAV_CMD_DO_SET_MODE
+ACCEPTED = mavutil.mavlink.MAV_RESULT_ACCEPTED
+IN_PROGRESS = mavutil.mavlink.MAV_RESULT_IN_PROGRESS
+PARAMS = (1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 30.0)
+
+
+def encode_ack(source_system: int, command_type: int) -> object:
+    """
+    Accepted COMMAND_ACK as received from the given system.
+    """
+    connection = conftest.FakeConnection(source_system=source_system, source_component=1)
+    connection.mav.command_ack_send(command_type, ACCEPTED)
+
+    return connection.get_sent()[0]
+
+
+@pytest.fixture()
+def ack_tracker() -> command_ack_tracker.CommandAckTracker:  # type: ignore
+    """
+    Tracker with a window of 2, a timeout of 1 s and 2 retries.
+    """
+    result, instance = command_ack_tracker.CommandAckTracker.create(
+        command_ack_tracker.AckLimits(2, 1.0, 2)
+    )
+    assert result
+    assert instance is not None
+
+    yield instance  # type: ignore
+
+
+class TestCreate:
+    """
+    Limits are checked.
+    """
+
+    def test_invalid_limits(self) -> None:
+        """
+        Empty window, no timeout, or negative retries.
+        """
+        for limits in [
+            command_ack_tracker.AckLimits(0, 1.0, 2),
+            command_ack_tracker.AckLimits(2, 0.0, 2),
+            command_ack_tracker.AckLimits(2, 1.0, -1),
+        ]:
+            result, instance = command_ack_tracker.CommandAckTracker.create(limits)
+            assert not result
+            assert instance is None
+
+
+class TestWindow:
+    """
+    Limiting the commands waiting for acknowledgement.
+    """
+
+    def test_window_full(self, ack_tracker: command_ack_tracker.CommandAckTracker) -> None:
+        """
+        A third type waits for room in the window.
+        """
+        # Setup
+        ack_tracker.record_sent(ALTITUDE, PARAMS, 0.0)
+        ack_tracker.record_sent(YAW, PARAMS, 0.0)
+
+        # Run
+        result = ack_tracker.can_send(OTHER)
+
+        # Test
+        assert not result
+        assert ack_tracker.window_full_count == 1
+
+    def test_same_type_waits(self, ack_tracker: command_ack_tracker.CommandAckTracker) -> None:
+        """
+        A command of a type already waiting is refused even with room in the window.
+        """
+        # Setup
+        ack_tracker.record_sent(ALTITUDE, PARAMS, 0.0)
+
+        # Run
+        waiting_result = ack_tracker.can_send(ALTITUDE)
+        ack_tracker.handle_ack(ALTITUDE, ACCEPTED, 0.1)
+        acknowledged_result = ack_tracker.can_send(ALTITUDE)
+
+        # Test
+        assert not waiting_result
+        assert acknowledged_result
+        assert ack_tracker.type_waiting_count == 1
+        assert ack_tracker.window_full_count == 0
+
+    def test_ack_frees_window(self, ack_tracker: command_ack_tracker.CommandAckTracker) -> None:
+        """
+        Acknowledged commands leave the window.
+        """
+        # Setup
+        ack_tracker.record_sent(ALTITUDE, PARAMS, 0.0)
+        ack_tracker.record_sent(YAW, PARAMS, 0.0)
+
+        # Run
+        ack_tracker.handle_ack(YAW, ACCEPTED, 0.1)
+
+        # Test
+        assert ack_tracker.can_send(OTHER)
+        assert ack_tracker.get_in_flight_count() == 1
+
+
+class TestAck:
+    """
+    Matching acknowledgements and measuring round trip time.
+    """
+
+    def test_round_trip_time(self, ack_tracker: command_ack_tracker.CommandAckTracker) -> None:
+        """
+        Round trip time by command.
+        """
+        # Setup
+        ack_tracker.record_sent(ALTITUDE, PARAMS, 10.0)
+
+        # Run
+        result = ack_tracker.handle_ack(ALTITUDE, ACCEPTED, 10.003)
+
+        # Test
+        assert result
+        histogram = ack_tracker.get_histograms()[ALTITUDE]
+        assert histogram.count == 1
+        assert histogram.max == pytest.approx(0.003)
+        assert histogram.get_percentile(0.5) == pytest.approx(0.003)
+        assert ack_tracker.result_counts == {ACCEPTED: 1}
+
+    def test_unmatched(self, ack_tracker: command_ack_tracker.CommandAckTracker) -> None:
+        """
+        Nothing waiting for the acknowledgement.
+        """
+        result = ack_tracker.handle_ack(YAW, ACCEPTED, 0.0)
+
+        assert not result
+        assert ack_tracker.unmatched_count == 1
+
+    def test_in_progress(self, ack_tracker: command_ack_tracker.CommandAckTracker) -> None:
+        """
+        Keeps waiting for the final result, timed from the send.
+        """
+        # Setup
+        ack_tracker.record_sent(ALTITUDE, PARAMS, 0.0)
+
+        # Run
+        in_progress_result = ack_tracker.handle_ack(ALTITUDE, IN_PROGRESS, 0.2)
+        in_flight_count = ack_tracker.get_in_flight_count()
+        histograms = dict(ack_tracker.get_histograms())
+        final_result = ack_tracker.handle_ack(ALTITUDE, ACCEPTED, 0.5)
+
+        # Test
+        assert in_progress_result
+        assert in_flight_count == 1
+        assert ALTITUDE not in histograms
+        assert final_result
+        assert ack_tracker.get_in_flight_count() == 0
+        assert ack_tracker.get_histograms()[ALTITUDE].max == pytest.approx(0.5)
+
+    def test_in_progress_restarts_timeout(
+        self, ack_tracker: command_ack_tracker.CommandAckTracker
+    ) -> None:
+        """
+        Not sent again while in progress, only once the vehicle goes quiet for a timeout.
+        """
+        # Setup
+        ack_tracker.record_sent(ALTITUDE, PARAMS, 0.0)
+
+        # Run
+        ack_tracker.handle_ack(ALTITUDE, IN_PROGRESS, 0.9)
+        early_retransmissions = ack_tracker.get_retransmissions(1.0)
+        late_retransmissions = ack_tracker.get_retransmissions(2.0)
+
+        # Test
+        assert len(early_retransmissions) == 0
+        assert len(late_retransmissions) == 1
+
+
+class TestRetransmit:
+    """
+    Sending again on timeout.
+    """
+
+    def test_timeout(self, ack_tracker: command_ack_tracker.CommandAckTracker) -> None:
+        """
+        Confirmation increments on each timeout until the retries run out.
+        """
+        # Setup
+        ack_tracker.record_sent(ALTITUDE, PARAMS, 0.0)
+
+        # Run
+        confirmations = []
+        for current_time in [0.5, 1.0, 2.0, 3.0]:
+            retransmissions = ack_tracker.get_retransmissions(current_time)
+            confirmations.append(
+                [retransmission.confirmation for retransmission in retransmissions]
+            )
+            if len(retransmissions) > 0:
+                assert retransmissions[0].params == PARAMS
+
+        # Test
+        assert confirmations == [[], [1], [2], []]
+        assert ack_tracker.retransmit_count == 2
+        assert ack_tracker.failed_count == 1
+        assert ack_tracker.get_in_flight_count() == 0
+
+    def test_retransmitted_not_measured(
+        self, ack_tracker: command_ack_tracker.CommandAckTracker
+    ) -> None:
+        """
+        The acknowledgement may be for the first send.
+        """
+        # Setup
+        ack_tracker.record_sent(ALTITUDE, PARAMS, 0.0)
+        ack_tracker.get_retransmissions(1.0)
+
+        # Run
+        result = ack_tracker.handle_ack(ALTITUDE, ACCEPTED, 1.1)
+
+        # Test
+        assert result
+        assert len(ack_tracker.get_histograms()) == 0
+
+
+class TestCommand:
+    """
+    Command sending again without waiting.
+    """
+
+    def test_retransmit(self, ack_tracker: command_ack_tracker.CommandAckTracker) -> None:
+        """
+        The same command is sent again with the next confirmation.
+        """
+        # Setup
+        result, local_logger = logger.Logger.create("test_command_ack_tracker", False)
+        assert result
+        assert local_logger is not None
+
+        connection = conftest.FakeConnection()
+        result, cmd = command.Command.create(
+            connection,
+            command.Position(10.0, 20.0, 30.0),
+            0.5,
+            5.0,
+            local_logger,
+            ack_tracker=ack_tracker,
+        )
+        assert result
+        assert cmd is not None
+
+        result, _ = cmd.run(telemetry.TelemetryData(x=0.0, y=0.0, z=20.0, yaw=0.0))
+        assert result
+
+        # Run
+        count = cmd.retransmit(time.monotonic() + 1.0)
+
+        # Test
+        assert count == 1
+        commands = connection.get_sent()
+        assert [message.command for message in commands] == [ALTITUDE, ALTITUDE]
+        assert [message.confirmation for message in commands] == [0, 1]
+        assert commands[1].param7 == commands[0].param7
+
+    def test_other_vehicle_ack_ignored(
+        self, ack_tracker: command_ack_tracker.CommandAckTracker
+    ) -> None:
+        """
+        Only an acknowledgement from the commanded vehicle completes the command.
+        """
+        # Setup
+        result, local_logger = logger.Logger.create("test_command_ack_tracker", False)
+        assert result
+        assert local_logger is not None
+
+        result, cmd = command.Command.create(
+            conftest.FakeConnection(),
+            command.Position(10.0, 20.0, 30.0),
+            0.5,
+            5.0,
+            local_logger,
+            target_system=2,
+            ack_tracker=ack_tracker,
+        )
+        assert result
+        assert cmd is not None
+
+        result, _ = cmd.run(telemetry.TelemetryData(x=0.0, y=0.0, z=20.0, yaw=0.0))
+        assert result
+
+        # Run
+        other_result = cmd.handle_ack(encode_ack(1, ALTITUDE))
+        own_result = cmd.handle_ack(encode_ack(2, ALTITUDE))
+
+        # Test
+        assert not other_result
+        assert own_result
+        assert ack_tracker.get_in_flight_count() == 0
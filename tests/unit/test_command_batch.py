@@ -0,0 +1,174 @@
+"""
+Test deciding commands for many samples at once.
+"""
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from modules.command import command
+from modules.common.modules.logger import logger
+from modules.telemetry import telemetry
+from tests.unit import conftest
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+SAMPLE_COUNT = 1000
+
+
+@pytest.fixture()
+def cmd(test_logger: logger.Logger) -> command.Command:  # type: ignore
+    """
+    Command without a tracker, so every sample out of tolerance is a command.
+    """
+    result, instance = command.Command.create(
+        conftest.FakeConnection(), command.Position(10.0, 20.0, 30.0), 0.5, 5.0, test_logger
+    )
+    assert result
+    assert instance is not None
+
+    yield instance  # type: ignore
+
+
+def random_samples() -> "list[telemetry.TelemetryData]":
+    """
+    Samples around the target, some with missing fields.
+    """
+    generator = random.Random(0)
+    samples = []
+    for _ in range(SAMPLE_COUNT):
+        values = [
+            generator.uniform(0.0, 20.0),
+            generator.uniform(10.0, 30.0),
+            generator.uniform(29.0, 31.0),
+            generator.uniform(-math.pi, math.pi),
+        ]
+        # Leave a field out of one sample in ten
+        if generator.random() < 0.1:
+            values[generator.randrange(4)] = None
+
+        samples.append(
+            telemetry.TelemetryData(x=values[0], y=values[1], z=values[2], yaw=values[3])
+        )
+
+    return samples
+
+
+class TestUnpackTelemetryArrays:
+    """
+    Decoding packed telemetry into arrays.
+    """
+
+    def test_fields(self) -> None:
+        """
+        Same values as the records, NaN where a field is None.
+        """
+        # Setup
+        samples = [
+            telemetry.TelemetryData(time_since_boot=5, x=1.0, yaw=0.5),
+            telemetry.TelemetryData(x=2.0, z=3.0),
+        ]
+
+        # Run
+        arrays = command.unpack_telemetry_arrays(telemetry.TelemetryData.pack_many(samples))
+
+        # Test
+        assert command.TELEMETRY_DTYPE.itemsize == telemetry.TelemetryData.PACKED_SIZE
+        assert arrays["x"].tolist() == [1.0, 2.0]
+        assert arrays["time_since_boot"][0] == 5.0
+        assert math.isnan(arrays["time_since_boot"][1])
+        assert math.isnan(arrays["z"][0])
+        assert arrays["yaw"][0] == 0.5
+        assert math.isnan(arrays["yaw"][1])
+
+
+class TestRunBatch:
+    """
+    Batch decisions are the decisions of run().
+    """
+
+    def test_same_as_run(self, cmd: command.Command) -> None:
+        """
+        Same action and change for every sample.
+        """
+        # Setup
+        samples = random_samples()
+        arrays = command.unpack_telemetry_arrays(telemetry.TelemetryData.pack_many(samples))
+
+        # Run
+        altitude_deltas, yaw_deltas, actions = cmd.run_batch(
+            arrays["x"], arrays["y"], arrays["z"], arrays["yaw"]
+        )
+
+        # Test
+        for i, sample in enumerate(samples):
+            result, action = cmd.run(sample)
+            if not result:
+                assert actions[i] == command.ACTION_NONE
+            elif action.startswith("CHANGE ALTITUDE"):
+                assert actions[i] == command.ACTION_CHANGE_ALTITUDE
+                assert action == f"CHANGE ALTITUDE: {altitude_deltas[i]:.2f}"
+            else:
+                assert actions[i] == command.ACTION_CHANGE_YAW
+                assert action == f"CHANGE YAW: {yaw_deltas[i]:.2f}"
+
+        assert set(actions.tolist()) == {
+            command.ACTION_NONE,
+            command.ACTION_CHANGE_ALTITUDE,
+            command.ACTION_CHANGE_YAW,
+        }
+
+    def test_unused_changes_zero(self, cmd: command.Command) -> None:
+        """
+        Only the change of the command sent is set.
+        """
+        altitude_deltas, yaw_deltas, actions = cmd.run_batch(
+            np.array([0.0, 0.0, 10.0]),
+            np.array([0.0, 0.0, 0.0]),
+            np.array([20.0, 30.0, 30.0]),
+            np.array([0.0, 0.0, math.pi / 2.0]),
+        )
+
+        assert actions.tolist() == [
+            command.ACTION_CHANGE_ALTITUDE,
+            command.ACTION_CHANGE_YAW,
+            command.ACTION_NONE,
+        ]
+        assert altitude_deltas.tolist() == [10.0, 0.0, 0.0]
+        assert yaw_deltas[0] == 0.0
+        assert yaw_deltas[1] == pytest.approx(math.degrees(math.atan2(20.0, 10.0)))
+        assert yaw_deltas[2] == 0.0
+
+    def test_broadcast(self, cmd: command.Command) -> None:
+        """
+        Scalars apply to every sample.
+        """
+        _, _, actions = cmd.run_batch(10.0, 0.0, np.array([30.0, 40.0]), math.pi / 2.0)
+
+        assert actions.tolist() == [command.ACTION_NONE, command.ACTION_CHANGE_ALTITUDE]
+
+    @pytest.mark.parametrize("yaw", [-math.pi, math.pi, 3.0 * math.pi, -2.5 * math.pi])
+    def test_yaw_boundary(self, cmd: command.Command, yaw: float) -> None:
+        """
+        A difference of exactly half a turn keeps its sign, the same as run().
+        """
+        # Setup
+        # Straight along x to the target, so the required yaw is exactly 0
+        sample = telemetry.TelemetryData(x=0.0, y=20.0, z=30.0, yaw=yaw)
+
+        # Run
+        _, yaw_deltas, actions = cmd.run_batch(
+            np.array([sample.x]), np.array([sample.y]), np.array([sample.z]), np.array([yaw])
+        )
+        result, action = cmd.run(sample)
+
+        # Test
+        assert result
+        assert actions[0] == command.ACTION_CHANGE_YAW
+        assert action == f"CHANGE YAW: {yaw_deltas[0]:.2f}"
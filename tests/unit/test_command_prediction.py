@@ -0,0 +1,187 @@
+"""
+Test holding off commands while the vehicle moves into tolerance.
+"""
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from modules.command import command
+from modules.common.modules.logger import logger
+from modules.telemetry import telemetry
+from tests.unit import conftest
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+TARGET = command.Position(10.0, 0.0, 30.0)
+HORIZON = 0.5  # seconds
+SAMPLE_COUNT = 1000
+
+
+@pytest.fixture()
+def cmd(test_logger: logger.Logger) -> command.Command:  # type: ignore
+    """
+    Predictive command without a tracker.
+    """
+    result, instance = command.Command.create(
+        conftest.FakeConnection(), TARGET, 0.5, 5.0, test_logger, prediction_horizon=HORIZON
+    )
+    assert result
+    assert instance is not None
+
+    yield instance  # type: ignore
+
+
+class TestCreate:
+    """
+    Horizon is checked.
+    """
+
+    def test_negative_horizon(self, test_logger: logger.Logger) -> None:
+        """
+        A negative horizon fails.
+        """
+        result, instance = command.Command.create(
+            conftest.FakeConnection(), TARGET, 0.5, 5.0, test_logger, prediction_horizon=-1.0
+        )
+
+        assert not result
+        assert instance is None
+
+
+class TestAltitude:
+    """
+    Holding off altitude commands.
+    """
+
+    def test_climbing_into_tolerance(self, cmd: command.Command) -> None:
+        """
+        1 m below at 1 m/s is within tolerance in 0.5 s.
+        """
+        result, _ = cmd.run(telemetry.TelemetryData(x=0.0, y=0.0, z=29.0, yaw=0.0, z_velocity=1.0))
+
+        assert not result
+        assert cmd.held_count == 1
+
+    def test_too_slow(self, cmd: command.Command) -> None:
+        """
+        1 m below at 0.5 m/s is still out of tolerance in 0.5 s.
+        """
+        result, action = cmd.run(
+            telemetry.TelemetryData(x=0.0, y=0.0, z=29.0, yaw=0.0, z_velocity=0.5)
+        )
+
+        assert result
+        assert action.startswith("CHANGE ALTITUDE")
+        assert cmd.held_count == 0
+
+    def test_moving_away(self, cmd: command.Command) -> None:
+        """
+        Descending while below the target.
+        """
+        result, _ = cmd.run(telemetry.TelemetryData(x=0.0, y=0.0, z=29.0, yaw=0.0, z_velocity=-1.0))
+
+        assert result
+
+    def test_reactive(self, test_logger: logger.Logger) -> None:
+        """
+        Without a horizon the motion is ignored.
+        """
+        result, cmd = command.Command.create(
+            conftest.FakeConnection(), TARGET, 0.5, 5.0, test_logger
+        )
+        assert result
+        assert cmd is not None
+
+        result, _ = cmd.run(telemetry.TelemetryData(x=0.0, y=0.0, z=29.0, yaw=0.0, z_velocity=1.0))
+
+        assert result
+        assert cmd.held_count == 0
+
+
+class TestYaw:
+    """
+    Holding off yaw commands.
+    """
+
+    def test_turning_into_tolerance(self, cmd: command.Command) -> None:
+        """
+        10 degrees off at 20 deg/s is within tolerance in 0.5 s.
+        """
+        result, _ = cmd.run(
+            telemetry.TelemetryData(
+                x=0.0, y=0.0, z=30.0, yaw=math.radians(10.0), yaw_speed=math.radians(-20.0)
+            )
+        )
+
+        assert not result
+        assert cmd.held_count == 1
+
+    def test_turning_away(self, cmd: command.Command) -> None:
+        """
+        Turning further off the target.
+        """
+        result, action = cmd.run(
+            telemetry.TelemetryData(
+                x=0.0, y=0.0, z=30.0, yaw=math.radians(10.0), yaw_speed=math.radians(20.0)
+            )
+        )
+
+        assert result
+        assert action.startswith("CHANGE YAW")
+
+
+class TestRunBatch:
+    """
+    Batch decisions hold off the same commands.
+    """
+
+    def test_same_as_run(self, cmd: command.Command) -> None:
+        """
+        Same action for every sample.
+        """
+        # Setup
+        generator = random.Random(0)
+        samples = [
+            telemetry.TelemetryData(
+                x=generator.uniform(0.0, 20.0),
+                y=generator.uniform(-10.0, 10.0),
+                z=generator.uniform(28.0, 32.0),
+                yaw=generator.uniform(-math.pi, math.pi),
+                z_velocity=generator.uniform(-2.0, 2.0),
+                yaw_speed=generator.uniform(-1.0, 1.0),
+            )
+            for _ in range(SAMPLE_COUNT)
+        ]
+        arrays = command.unpack_telemetry_arrays(telemetry.TelemetryData.pack_many(samples))
+
+        # Run
+        _, _, actions = cmd.run_batch(
+            arrays["x"],
+            arrays["y"],
+            arrays["z"],
+            arrays["yaw"],
+            arrays["z_velocity"],
+            arrays["yaw_speed"],
+        )
+
+        # Test
+        expected = []
+        for sample in samples:
+            result, action = cmd.run(sample)
+            if not result:
+                expected.append(command.ACTION_NONE)
+            elif action.startswith("CHANGE ALTITUDE"):
+                expected.append(command.ACTION_CHANGE_ALTITUDE)
+            else:
+                expected.append(command.ACTION_CHANGE_YAW)
+
+        assert actions.tolist() == expected
+        assert cmd.held_count > 0
+        assert np.count_nonzero(actions == command.ACTION_NONE) >= cmd.held_count
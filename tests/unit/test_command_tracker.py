@@ -0,0 +1,149 @@
+"""
+Test command tracker.
+"""
+
+import math
+
+import pytest
+
+from modules.command import command_tracker
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+ALTITUDE = 113
+YAW = 115
+
+
+@pytest.fixture()
+def tracker() -> command_tracker.CommandTracker:  # type: ignore
+    """
+    Tracker limiting altitude and yaw commands.
+    """
+    result, instance = command_tracker.CommandTracker.create(
+        {
+            ALTITUDE: command_tracker.CommandLimits(0.5, 5.0, 0.1, 0.05),
+            YAW: command_tracker.CommandLimits(0.5, 5.0, math.radians(1.0), math.radians(1.0)),
+        }
+    )
+    assert result
+    assert instance is not None
+
+    yield instance  # type: ignore
+
+
+class TestShouldSend:
+    """
+    Deciding whether to resend.
+    """
+
+    def test_first_command_sent(self, tracker: command_tracker.CommandTracker) -> None:
+        """
+        Nothing in flight.
+        """
+        assert tracker.should_send(ALTITUDE, 30.0, 5.0, 0.0, False)
+
+    def test_converging_suppressed(self, tracker: command_tracker.CommandTracker) -> None:
+        """
+        Same target while the vehicle is getting closer.
+        """
+        # Setup
+        tracker.record_sent(ALTITUDE, 30.0, 5.0, 0.0)
+
+        # Run
+        results = [
+            tracker.should_send(ALTITUDE, 30.0, 4.9, 0.1, False),
+            tracker.should_send(ALTITUDE, 30.0, 4.0, 1.0, False),
+        ]
+
+        # Test
+        assert results == [False, False]
+        assert tracker.suppressed_count == 2
+
+    def test_target_changed(self, tracker: command_tracker.CommandTracker) -> None:
+        """
+        A new target is sent after the minimum interval.
+        """
+        # Setup
+        tracker.record_sent(ALTITUDE, 30.0, 5.0, 0.0)
+
+        # Run
+        too_soon = tracker.should_send(ALTITUDE, 40.0, 4.0, 0.1, False)
+        later = tracker.should_send(ALTITUDE, 40.0, 4.0, 0.6, False)
+
+        # Test
+        assert not too_soon
+        assert later
+
+    def test_not_converging(self, tracker: command_tracker.CommandTracker) -> None:
+        """
+        Resent if the vehicle did not get closer.
+        """
+        # Setup
+        tracker.record_sent(ALTITUDE, 30.0, 5.0, 0.0)
+
+        # Run
+        result = tracker.should_send(ALTITUDE, 30.0, 5.0, 1.0, False)
+
+        # Test
+        assert result
+
+    def test_stalled_after_progress(self, tracker: command_tracker.CommandTracker) -> None:
+        """
+        Resent before the timeout once the vehicle stops getting closer, even though it got
+        closer since the send.
+        """
+        # Setup
+        tracker.record_sent(ALTITUDE, 30.0, 5.0, 0.0)
+
+        # Run
+        results = [
+            tracker.should_send(ALTITUDE, 30.0, 3.0, 1.0, False),
+            tracker.should_send(ALTITUDE, 30.0, 3.0, 1.2, False),
+            tracker.should_send(ALTITUDE, 30.0, 3.0, 2.0, False),
+        ]
+
+        # Test
+        assert results == [False, False, True]
+
+    def test_timeout(self, tracker: command_tracker.CommandTracker) -> None:
+        """
+        Resent after the timeout even while converging.
+        """
+        # Setup
+        tracker.record_sent(ALTITUDE, 30.0, 5.0, 0.0)
+
+        # Run
+        result = tracker.should_send(ALTITUDE, 30.0, 1.0, 5.0, False)
+
+        # Test
+        assert result
+
+    def test_angle_target_wraps(self, tracker: command_tracker.CommandTracker) -> None:
+        """
+        Headings either side of +-pi are the same target.
+        """
+        # Setup
+        tracker.record_sent(YAW, math.pi - 0.001, 1.0, 0.0)
+
+        # Run
+        result = tracker.should_send(YAW, -math.pi + 0.001, 0.5, 1.0, True)
+
+        # Test
+        assert not result
+
+    def test_clear(self, tracker: command_tracker.CommandTracker) -> None:
+        """
+        Sent immediately after the previous target was reached.
+        """
+        # Setup
+        tracker.record_sent(ALTITUDE, 30.0, 5.0, 0.0)
+
+        # Run
+        tracker.clear(ALTITUDE)
+
+        # Test
+        assert tracker.should_send(ALTITUDE, 30.0, 5.0, 0.1, False)
@@ -0,0 +1,137 @@
+"""
+Test routing messages to per-vehicle state.
+"""
+
+import time
+
+from pymavlink import mavutil
+
+from modules.command import command
+from modules.common.modules.logger import logger
+from modules.fleet import fleet
+from tests.unit import conftest
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+TARGET = command.Position(10.0, 20.0, 30.0)
+DISCONNECT_TIMEOUT = 0.05  # seconds
+
+
+def create_fleet(
+    links: "list[conftest.FakeConnection]", local_logger: logger.Logger, max_vehicles: int = 10
+) -> fleet.Fleet:
+    """
+    Creates a fleet commanding every sample out of tolerance.
+    """
+    result, instance = fleet.Fleet.create(
+        TARGET, 0.5, 5.0, None, None, DISCONNECT_TIMEOUT, max_vehicles, links, local_logger
+    )
+    assert result
+    assert instance is not None
+
+    return instance
+
+
+class TestProcess:
+    """
+    Routing by system ID.
+    """
+
+    def test_vehicles_separate(self, test_logger: logger.Logger) -> None:
+        """
+        Each vehicle combines only its own messages and is commanded by its own system ID.
+        """
+        # Setup
+        link = conftest.FakeConnection()
+        vehicles = create_fleet([link], test_logger)
+
+        # Run
+        reports = []
+        # Interleaved, so neither vehicle has both types until its second message
+        for first, second in zip(
+            conftest.encode_messages("PA", 1), conftest.encode_messages("PA", 2)
+        ):
+            reports.append(vehicles.process(0, first))
+            reports.append(vehicles.process(0, second))
+
+        # Test
+        assert [result for result, _ in reports] == [False, False, True, True]
+        assert reports[2][1].startswith("Vehicle 1: CHANGE ALTITUDE")
+        assert reports[3][1].startswith("Vehicle 2: CHANGE ALTITUDE")
+        assert [msg.target_system for msg in link.get_sent()] == [1, 2]
+
+    def test_commands_sent_on_vehicle_link(self, test_logger: logger.Logger) -> None:
+        """
+        A vehicle is commanded on the link it was seen on.
+        """
+        # Setup
+        links = [conftest.FakeConnection(), conftest.FakeConnection()]
+        vehicles = create_fleet(links, test_logger)
+
+        # Run
+        for msg in conftest.encode_messages("PA", 7):
+            vehicles.process(1, msg)
+
+        # Test
+        assert len(links[0].frames) == 0
+        assert [msg.target_system for msg in links[1].get_sent()] == [7]
+        assert vehicles.get_vehicles()[7].link == 1
+
+    def test_ground_station_ignored(self, test_logger: logger.Logger) -> None:
+        """
+        Heartbeats from ground stations do not create vehicles.
+        """
+        # Setup
+        vehicles = create_fleet([conftest.FakeConnection()], test_logger)
+
+        # Run
+        msg = conftest.encode_messages("H", 255, mavutil.mavlink.MAV_TYPE_GCS)[0]
+        result, _ = vehicles.process(0, msg)
+
+        # Test
+        assert not result
+        assert len(vehicles.get_vehicles()) == 0
+
+    def test_max_vehicles(self, test_logger: logger.Logger) -> None:
+        """
+        Vehicles beyond the maximum are ignored.
+        """
+        # Setup
+        vehicles = create_fleet([conftest.FakeConnection()], test_logger, 2)
+
+        # Run
+        for system_id in range(1, 4):
+            vehicles.process(0, conftest.encode_messages("H", system_id)[0])
+
+        # Test
+        assert sorted(vehicles.get_vehicles()) == [1, 2]
+        assert vehicles.ignored_count == 1
+
+
+class TestCheckHeartbeats:
+    """
+    Per-vehicle connection status.
+    """
+
+    def test_disconnect_and_reconnect(self, test_logger: logger.Logger) -> None:
+        """
+        Only the silent vehicle disconnects, and reconnects on its next heartbeat.
+        """
+        # Setup
+        vehicles = create_fleet([conftest.FakeConnection()], test_logger)
+        vehicles.process(0, conftest.encode_messages("H", 1)[0])
+        time.sleep(DISCONNECT_TIMEOUT)
+        vehicles.process(0, conftest.encode_messages("H", 2)[0])
+
+        # Run
+        disconnects = vehicles.check_heartbeats()
+        reconnect = vehicles.process(0, conftest.encode_messages("H", 1)[0])
+
+        # Test
+        assert disconnects == ["Vehicle 1: Disconnected"]
+        assert reconnect == (True, "Vehicle 1: Connected")
+        assert len(vehicles.check_heartbeats()) == 0
@@ -0,0 +1,200 @@
+"""
+Test flight recorder and replayer.
+"""
+
+import pathlib
+import time
+
+import pytest
+
+from modules.common.modules.logger import logger
+from modules.recorder import flight_recorder
+from modules.recorder import flight_replayer
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+INDEX_PERIOD = 1.0  # seconds
+FRAME_COUNT = 50
+FRAME_PERIOD = 0.1  # seconds
+
+
+@pytest.fixture()
+def local_logger() -> logger.Logger:  # type: ignore
+    """
+    Logger for the recorder and replayer.
+    """
+    result, instance = logger.Logger.create("test_flight_recorder", False)
+    assert result
+    assert instance is not None
+
+    yield instance  # type: ignore
+
+
+@pytest.fixture()
+def recording(tmp_path: pathlib.Path, local_logger: logger.Logger) -> pathlib.Path:  # type: ignore
+    """
+    Recording of numbered inbound frames every FRAME_PERIOD, with an outbound frame after each.
+    """
+    path = tmp_path / "flight.mavrec"
+    result, recorder = flight_recorder.FlightRecorder.create(path, INDEX_PERIOD, local_logger)
+    assert result
+    assert recorder is not None
+
+    for i in range(FRAME_COUNT):
+        recorder.record(flight_recorder.INBOUND, bytes([i]) * 4, i * FRAME_PERIOD)
+        recorder.record(flight_recorder.OUTBOUND, b"out", i * FRAME_PERIOD)
+
+    recorder.close()
+
+    yield path  # type: ignore
+
+
+def create_replayer(
+    path: pathlib.Path, local_logger: logger.Logger
+) -> flight_replayer.FlightReplayer:
+    """
+    Creates a replayer that must succeed.
+    """
+    result, replayer = flight_replayer.FlightReplayer.create(path, local_logger)
+    assert result
+    assert replayer is not None
+
+    return replayer
+
+
+class TestRead:
+    """
+    Reading records back.
+    """
+
+    def test_round_trip(self, recording: pathlib.Path, local_logger: logger.Logger) -> None:
+        """
+        Every record comes back in order.
+        """
+        # Setup
+        replayer = create_replayer(recording, local_logger)
+
+        # Run
+        records = list(replayer.read())
+
+        # Test
+        assert len(records) == 2 * FRAME_COUNT
+        assert records[0] == (0.0, flight_recorder.INBOUND, bytes([0]) * 4)
+        assert records[1] == (0.0, flight_recorder.OUTBOUND, b"out")
+        assert records[-2][2] == bytes([FRAME_COUNT - 1]) * 4
+
+    def test_index_written(self, recording: pathlib.Path, local_logger: logger.Logger) -> None:
+        """
+        One index entry per index period.
+        """
+        # Run
+        replayer = create_replayer(recording, local_logger)
+
+        # Test
+        expected = int(FRAME_COUNT * FRAME_PERIOD / INDEX_PERIOD)
+        assert len(replayer._FlightReplayer__index_times) == expected
+
+    def test_start_time(self, recording: pathlib.Path, local_logger: logger.Logger) -> None:
+        """
+        Starting in the middle skips earlier records.
+        """
+        # Setup
+        replayer = create_replayer(recording, local_logger)
+
+        # Run
+        records = list(replayer.read(2.45))
+
+        # Test
+        assert records[0] == (2.5, flight_recorder.INBOUND, bytes([25]) * 4)
+        assert len(records) == 2 * (FRAME_COUNT - 25)
+
+    def test_no_index(self, recording: pathlib.Path, local_logger: logger.Logger) -> None:
+        """
+        Without the index, seeking reads from the beginning but gives the same records.
+        """
+        # Setup
+        flight_recorder.get_index_path(recording).unlink()
+        replayer = create_replayer(recording, local_logger)
+
+        # Run
+        records = list(replayer.read(2.45))
+
+        # Test
+        assert records[0] == (2.5, flight_recorder.INBOUND, bytes([25]) * 4)
+
+    def test_truncated(self, recording: pathlib.Path, local_logger: logger.Logger) -> None:
+        """
+        A partly written last record is ignored.
+        """
+        # Setup
+        data = recording.read_bytes()
+        recording.write_bytes(data[:-2])
+        replayer = create_replayer(recording, local_logger)
+
+        # Run
+        records = list(replayer.read())
+
+        # Test
+        assert len(records) == 2 * FRAME_COUNT - 1
+
+    def test_not_recording(self, tmp_path: pathlib.Path, local_logger: logger.Logger) -> None:
+        """
+        Other files are rejected.
+        """
+        # Setup
+        path = tmp_path / "other.bin"
+        path.write_bytes(b"not a recording")
+
+        # Run
+        result, replayer = flight_replayer.FlightReplayer.create(path, local_logger)
+
+        # Test
+        assert not result
+        assert replayer is None
+
+
+class TestReplay:
+    """
+    Writing frames out.
+    """
+
+    def test_maximum_speed(self, recording: pathlib.Path, local_logger: logger.Logger) -> None:
+        """
+        All inbound frames at once.
+        """
+        # Setup
+        replayer = create_replayer(recording, local_logger)
+        writes = []
+
+        # Run
+        start_time = time.monotonic()
+        count = replayer.replay(writes.append, None)
+        elapsed = time.monotonic() - start_time
+
+        # Test
+        assert count == FRAME_COUNT
+        assert b"".join(writes) == b"".join(bytes([i]) * 4 for i in range(FRAME_COUNT))
+        assert elapsed < FRAME_COUNT * FRAME_PERIOD / 10.0
+
+    def test_speed(self, recording: pathlib.Path, local_logger: logger.Logger) -> None:
+        """
+        Recorded timing scaled by the speed.
+        """
+        # Setup
+        replayer = create_replayer(recording, local_logger)
+        writes = []
+        speed = 10.0
+
+        # Run
+        start_time = time.monotonic()
+        count = replayer.replay(writes.append, speed, flight_recorder.OUTBOUND, 4.0)
+        elapsed = time.monotonic() - start_time
+
+        # Test
+        assert count == 10
+        assert writes == [b"out"] * 10
+        assert elapsed == pytest.approx(0.9 / speed, abs=0.05)
@@ -0,0 +1,157 @@
+"""
+Test heartbeat loss detection.
+"""
+
+import time
+
+import pytest
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from modules.heartbeat import heartbeat_receiver
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+DISCONNECT_TIMEOUT = 0.2  # seconds
+CHECK_PERIOD = 0.05  # seconds
+
+
+class FakeConnection:
+    """
+    Returns a heartbeat at each scheduled time, waiting like a blocking receive.
+    """
+
+    def __init__(self, heartbeat_times: "list[float]") -> None:
+        start_time = time.monotonic()
+        self.heartbeat_times = [start_time + heartbeat_time for heartbeat_time in heartbeat_times]
+        self.waits = []
+        self.heartbeat = mavutil.mavlink.MAVLink_heartbeat_message(0, 0, 0, 0, 0, 3)
+
+    def recv_match(  # pylint: disable=redefined-builtin,unused-argument
+        self,
+        type: "str | None" = None,
+        blocking: bool = False,
+        timeout: float | None = None,
+    ) -> "object | None":
+        """
+        Waits for the next heartbeat, at most the timeout.
+        """
+        self.waits.append(timeout)
+        end_time = time.monotonic() + timeout
+        if len(self.heartbeat_times) > 0 and self.heartbeat_times[0] <= end_time:
+            time.sleep(max(self.heartbeat_times.pop(0) - time.monotonic(), 0.0))
+            return self.heartbeat
+
+        time.sleep(timeout)
+        return None
+
+
+def create_receiver(
+    connection: FakeConnection, local_logger: logger.Logger
+) -> heartbeat_receiver.HeartbeatReceiver:
+    """
+    Creates a receiver with a short deadline.
+    """
+    result, receiver = heartbeat_receiver.HeartbeatReceiver.create(
+        DISCONNECT_TIMEOUT, CHECK_PERIOD, connection, local_logger
+    )
+    assert result
+    assert receiver is not None
+
+    return receiver
+
+
+def run_until(
+    receiver: heartbeat_receiver.HeartbeatReceiver, status: str, timeout: float
+) -> "float | None":
+    """
+    Runs the receiver until it reports the status.
+
+    Returns the time in seconds it took, None if it never did.
+    """
+    start_time = time.monotonic()
+    while time.monotonic() - start_time < timeout:
+        if receiver.run() == status:
+            return time.monotonic() - start_time
+
+    return None
+
+
+class TestHeartbeatReceiver:
+    """
+    Deadline based detection.
+    """
+
+    def test_invalid_timeout(self, test_logger: logger.Logger) -> None:
+        """
+        The deadline must be in the future.
+        """
+        # Run
+        result, receiver = heartbeat_receiver.HeartbeatReceiver.create(
+            0.0, CHECK_PERIOD, FakeConnection([]), test_logger
+        )
+
+        # Test
+        assert not result
+        assert receiver is None
+
+    def test_disconnect_at_deadline(self, test_logger: logger.Logger) -> None:
+        """
+        Disconnected as soon as the deadline passes, not at the end of a whole window.
+        """
+        # Setup
+        receiver = create_receiver(FakeConnection([]), test_logger)
+
+        # Run
+        elapsed = run_until(receiver, "Disconnected", 1.0)
+
+        # Test
+        assert elapsed is not None
+        assert elapsed == pytest.approx(DISCONNECT_TIMEOUT, abs=0.03)
+
+    def test_waits_bounded_by_check_period(self, test_logger: logger.Logger) -> None:
+        """
+        No receive waits longer than the check period.
+        """
+        # Setup
+        connection = FakeConnection([])
+        receiver = create_receiver(connection, test_logger)
+
+        # Run
+        run_until(receiver, "Disconnected", 1.0)
+        receiver.run()
+
+        # Test
+        assert max(connection.waits) <= CHECK_PERIOD
+
+    def test_heartbeats_keep_connected(self, test_logger: logger.Logger) -> None:
+        """
+        Heartbeats closer together than the deadline never disconnect.
+        """
+        # Setup
+        receiver = create_receiver(FakeConnection([0.1, 0.25, 0.4]), test_logger)
+
+        # Run
+        elapsed = run_until(receiver, "Disconnected", 0.5)
+
+        # Test
+        assert elapsed is None
+
+    def test_reconnect(self, test_logger: logger.Logger) -> None:
+        """
+        Connected again on the first heartbeat after a disconnect.
+        """
+        # Setup
+        receiver = create_receiver(FakeConnection([0.3]), test_logger)
+        assert run_until(receiver, "Disconnected", 1.0) is not None
+
+        # Run
+        elapsed = run_until(receiver, "Connected", 1.0)
+
+        # Test
+        assert elapsed is not None
+        assert elapsed < 0.3
@@ -0,0 +1,327 @@
+"""
+Test MAVLink router and endpoints.
+"""
+
+import socket
+import struct
+import time
+
+import pytest
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from modules.router import mavlink_endpoint
+from modules.router import mavlink_router
+from tests.unit import conftest
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+class StreamConnection:
+    """
+    Replays received bytes in chunks and records written frames.
+    """
+
+    def __init__(self, data: bytes, chunk_size: int = 65536) -> None:
+        self.data = data
+        self.chunk_size = chunk_size
+        self.written = []
+        self.mav = mavutil.mavlink.MAVLink(None)
+        self.mav.robust_parsing = True
+
+    def select(self, timeout: float) -> bool:  # pylint: disable=unused-argument
+        """
+        Returns whether there is data.
+        """
+        return len(self.data) > 0
+
+    def recv(self, size: int) -> bytes:
+        """
+        Returns the next chunk of data.
+        """
+        size = min(size, self.chunk_size)
+        chunk = self.data[:size]
+        self.data = self.data[size:]
+        return chunk
+
+    def write(self, buffer: bytes) -> None:
+        """
+        Records the frame.
+        """
+        self.written.append(buffer)
+
+
+def create_queue() -> queue_proxy_wrapper.QueueProxyWrapper:
+    """
+    Creates an inbound or outbound queue.
+    """
+    return queue_proxy_wrapper.QueueProxyWrapper(
+        None, 16, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+    )
+
+
+@pytest.fixture()
+def outbound_queue() -> queue_proxy_wrapper.QueueProxyWrapper:  # type: ignore
+    """
+    Outbound queue shared by all endpoints.
+    """
+    instance = create_queue()
+    yield instance  # type: ignore
+    instance.close()
+
+
+@pytest.fixture()
+def heartbeat_endpoint(
+    outbound_queue: queue_proxy_wrapper.QueueProxyWrapper,
+) -> mavlink_endpoint.MavlinkEndpoint:  # type: ignore
+    """
+    Endpoint subscribed to HEARTBEAT.
+    """
+    inbound_queue = create_queue()
+    instance = mavlink_endpoint.MavlinkEndpoint(
+        ["HEARTBEAT"], inbound_queue, outbound_queue, 255, 0
+    )
+    yield instance  # type: ignore
+    inbound_queue.close()
+
+
+@pytest.fixture()
+def telemetry_endpoint(
+    outbound_queue: queue_proxy_wrapper.QueueProxyWrapper,
+) -> mavlink_endpoint.MavlinkEndpoint:  # type: ignore
+    """
+    Endpoint subscribed to LOCAL_POSITION_NED and ATTITUDE.
+    """
+    inbound_queue = create_queue()
+    instance = mavlink_endpoint.MavlinkEndpoint(
+        ["LOCAL_POSITION_NED", "ATTITUDE"], inbound_queue, outbound_queue, 255, 0
+    )
+    yield instance  # type: ignore
+    inbound_queue.close()
+
+
+def create_router(
+    connection: StreamConnection,
+    endpoints: "list[mavlink_endpoint.MavlinkEndpoint]",
+    local_logger: logger.Logger,
+) -> mavlink_router.MavlinkRouter:
+    """
+    Creates a router.
+    """
+    result, router = mavlink_router.MavlinkRouter.create(connection, endpoints, local_logger)
+    assert result
+    assert router is not None
+
+    return router
+
+
+class TestReceive:
+    """
+    Fan out of received messages.
+    """
+
+    def test_messages_go_to_subscribers(
+        self,
+        heartbeat_endpoint: mavlink_endpoint.MavlinkEndpoint,
+        telemetry_endpoint: mavlink_endpoint.MavlinkEndpoint,
+        test_logger: logger.Logger,
+    ) -> None:
+        """
+        Every message reaches only the endpoints subscribed to its type.
+        """
+        # Setup
+        connection = StreamConnection(conftest.encode_frames("HAPH"))
+        router = create_router(connection, [heartbeat_endpoint, telemetry_endpoint], test_logger)
+
+        # Run
+        count = router.receive(0.0)
+
+        # Test
+        assert count == 4
+        assert router.receive_counts == {"HEARTBEAT": 2, "ATTITUDE": 1, "LOCAL_POSITION_NED": 1}
+        assert heartbeat_endpoint.recv_match(type="HEARTBEAT").get_type() == "HEARTBEAT"
+        assert heartbeat_endpoint.recv_match(type="HEARTBEAT").get_type() == "HEARTBEAT"
+        assert heartbeat_endpoint.recv_match(type="HEARTBEAT") is None
+        assert telemetry_endpoint.recv_match(type="HEARTBEAT") is None
+
+    def test_other_types_are_kept(
+        self,
+        telemetry_endpoint: mavlink_endpoint.MavlinkEndpoint,
+        test_logger: logger.Logger,
+    ) -> None:
+        """
+        Receiving one type does not throw away the other subscribed type.
+        """
+        # Setup
+        connection = StreamConnection(conftest.encode_frames("HAPH"))
+        router = create_router(connection, [telemetry_endpoint], test_logger)
+        router.receive(0.0)
+
+        # Run
+        position = telemetry_endpoint.recv_match(type="LOCAL_POSITION_NED")
+        attitude = telemetry_endpoint.recv_match(type="ATTITUDE")
+
+        # Test
+        assert position is not None
+        assert position.x == 2.0
+        assert attitude is not None
+        assert attitude.time_boot_ms == 1
+
+    def test_frame_split_across_reads(
+        self,
+        heartbeat_endpoint: mavlink_endpoint.MavlinkEndpoint,
+        telemetry_endpoint: mavlink_endpoint.MavlinkEndpoint,
+        test_logger: logger.Logger,
+    ) -> None:
+        """
+        Incomplete frames are finished by later reads.
+        """
+        # Setup
+        connection = StreamConnection(conftest.encode_frames("HAPH"), 7)
+        router = create_router(connection, [heartbeat_endpoint, telemetry_endpoint], test_logger)
+
+        # Run
+        count = 0
+        while connection.select(0.0):
+            count += router.receive(0.0)
+
+        # Test
+        assert count == 4
+        assert router.receive_counts == {"HEARTBEAT": 2, "ATTITUDE": 1, "LOCAL_POSITION_NED": 1}
+
+    def test_wake_subscribers(
+        self,
+        heartbeat_endpoint: mavlink_endpoint.MavlinkEndpoint,
+        test_logger: logger.Logger,
+    ) -> None:
+        """
+        Blocked receivers return immediately after being woken up.
+        """
+        # Setup
+        router = create_router(StreamConnection(b""), [heartbeat_endpoint], test_logger)
+        router.wake_subscribers()
+
+        # Run
+        start_time = time.monotonic()
+        message = heartbeat_endpoint.recv_match(type="HEARTBEAT", blocking=True, timeout=5.0)
+
+        # Test
+        assert message is None
+        assert time.monotonic() - start_time < 1.0
+
+
+class TestPending:
+    """
+    Messages kept while waiting for another type.
+    """
+
+    def test_overflow_counted(self, telemetry_endpoint: mavlink_endpoint.MavlinkEndpoint) -> None:
+        """
+        Messages pushed out of the pending messages are counted as inbound drops.
+        """
+        # Setup
+        message = conftest.encode_messages("P")[0]
+        inbound_queue = telemetry_endpoint.get_inbound_queue()
+        assert inbound_queue is not None
+
+        # Run
+        for _ in range(5):
+            inbound_queue.put_many([message] * 16)
+            actual = telemetry_endpoint.recv_match(type="ATTITUDE")
+
+        # Test
+        assert actual is None
+        assert inbound_queue.get_drop_count() == 5 * 16 - 64
+
+
+class TestDisconnect:
+    """
+    The peer closing or resetting a TCP connection.
+    """
+
+    @pytest.mark.parametrize("is_reset", [False, True])
+    def test_closed_by_peer(self, test_logger: logger.Logger, is_reset: bool) -> None:
+        """
+        Handled as end of file without raising, and not read again.
+        """
+        # Setup
+        listener = socket.create_server(("127.0.0.1", 0))
+        connection = mavutil.mavtcp(f"127.0.0.1:{listener.getsockname()[1]}")
+        peer, _ = listener.accept()
+        if is_reset:
+            # Close with a reset instead of end of file
+            peer.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        peer.close()
+        router = create_router(connection, [], test_logger)
+
+        # Run
+        count = router.receive(1.0)
+        start_time = time.monotonic()
+        later_count = router.receive(0.01)
+        elapsed_time = time.monotonic() - start_time
+        connection.close()
+        listener.close()
+
+        # Test
+        assert count == 0
+        assert not router.is_connected()
+        assert later_count == 0
+        assert elapsed_time >= 0.01
+
+
+class TestSend:
+    """
+    Sending through endpoints.
+    """
+
+    def test_frames_are_written(
+        self,
+        outbound_queue: queue_proxy_wrapper.QueueProxyWrapper,
+        heartbeat_endpoint: mavlink_endpoint.MavlinkEndpoint,
+        test_logger: logger.Logger,
+    ) -> None:
+        """
+        Frames encoded by endpoints are written by the router in order.
+        """
+        # Setup
+        connection = StreamConnection(b"")
+        router = create_router(connection, [heartbeat_endpoint], test_logger)
+        heartbeat_endpoint.mav.heartbeat_send(0, 0, 0, 0, 0)
+        heartbeat_endpoint.mav.command_long_send(1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+
+        # Run
+        router.send(outbound_queue.get_many(16) + [None])
+
+        # Test
+        messages = mavutil.mavlink.MAVLink(None).parse_buffer(b"".join(connection.written))
+        assert [message.get_type() for message in messages] == ["HEARTBEAT", "COMMAND_LONG"]
+        assert messages[0].get_srcSystem() == 255
+
+    def test_full_outbound_queue(
+        self,
+        outbound_queue: queue_proxy_wrapper.QueueProxyWrapper,
+        heartbeat_endpoint: mavlink_endpoint.MavlinkEndpoint,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """
+        Without a router taking frames, sends give up and are counted as drops.
+        """
+        # Setup
+        monkeypatch.setattr(
+            mavlink_endpoint.MavlinkEndpoint, "_MavlinkEndpoint__WRITE_TIMEOUT", 0.01
+        )
+        for _ in range(16):
+            heartbeat_endpoint.mav.heartbeat_send(0, 0, 0, 0, 0)
+
+        # Run
+        start_time = time.monotonic()
+        heartbeat_endpoint.mav.heartbeat_send(0, 0, 0, 0, 0)
+        elapsed_time = time.monotonic() - start_time
+
+        # Test
+        assert elapsed_time < 1.0
+        assert outbound_queue.get_drop_count() == 1
@@ -0,0 +1,96 @@
+"""
+Test periodic scheduler.
+"""
+
+import time
+
+import pytest
+
+from utilities.workers import periodic_scheduler
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+PERIOD = 0.02  # seconds
+CYCLE_COUNT = 25
+
+
+class TestPeriodicScheduler:
+    """
+    Absolute deadlines, jitter, and missed deadlines.
+    """
+
+    def test_no_drift(self) -> None:
+        """
+        Work in the loop body does not lengthen the period.
+        """
+        # Setup
+        start_time = time.monotonic()
+        scheduler = periodic_scheduler.PeriodicScheduler(PERIOD, start_time)
+
+        # Run
+        for _ in range(CYCLE_COUNT):
+            # Slow body, such as a stalled logger
+            time.sleep(PERIOD / 2.0)
+            scheduler.wait()
+
+        elapsed = time.monotonic() - start_time
+
+        # Test
+        assert elapsed == pytest.approx(CYCLE_COUNT * PERIOD, abs=PERIOD / 2.0)
+        statistics = scheduler.get_statistics()
+        assert statistics.cycle_count == CYCLE_COUNT
+        assert statistics.missed_count == 0
+
+    def test_missed_deadlines_skipped(self) -> None:
+        """
+        A stall longer than a period skips the missed deadlines and keeps the phase.
+        """
+        # Setup
+        start_time = time.monotonic()
+        scheduler = periodic_scheduler.PeriodicScheduler(PERIOD, start_time)
+
+        # Run
+        time.sleep(PERIOD * 3.5)
+        first_delay = scheduler.get_delay()
+        scheduler.record_wake()
+        second_delay = scheduler.get_delay()
+
+        # Test
+        assert first_delay == 0.0
+        assert scheduler.get_statistics().missed_count == 2
+        # Next deadline is back on the original grid
+        assert second_delay == pytest.approx(PERIOD / 2.0, abs=PERIOD / 4.0)
+
+    def test_jitter(self) -> None:
+        """
+        Lateness of each wake up is recorded.
+        """
+        # Setup
+        scheduler = periodic_scheduler.PeriodicScheduler(PERIOD)
+
+        # Run
+        scheduler.wait(lambda delay: time.sleep(delay + PERIOD / 4.0))
+
+        # Test
+        statistics = scheduler.get_statistics()
+        assert statistics.cycle_count == 1
+        assert statistics.max_jitter >= PERIOD / 4.0
+        assert statistics.mean_jitter == statistics.max_jitter
+
+    def test_early_wake_not_counted(self) -> None:
+        """
+        Waking up before the deadline, such as on exit, is not a cycle.
+        """
+        # Setup
+        scheduler = periodic_scheduler.PeriodicScheduler(PERIOD)
+
+        # Run
+        result = scheduler.wait(lambda delay: True)
+
+        # Test
+        assert result
+        assert scheduler.get_statistics().cycle_count == 0
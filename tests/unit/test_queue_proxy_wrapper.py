@@ -0,0 +1,247 @@
+"""
+Test queue proxy wrapper.
+"""
+
+import multiprocessing as mp
+import time
+
+import pytest
+
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+MAX_SIZE = 4
+
+
+@pytest.fixture(scope="module")
+def batch_manager() -> queue_proxy_wrapper.QueueManager:  # type: ignore
+    """
+    Manager providing queues with bulk operations.
+    """
+    manager = queue_proxy_wrapper.QueueManager()
+    # Shut down explicitly after the tests
+    # pylint: disable-next=consider-using-with
+    manager.start()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+@pytest.fixture(scope="module")
+def plain_manager() -> mp.managers.SyncManager:  # type: ignore
+    """
+    Standard manager.
+    """
+    manager = mp.Manager()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+class TestBulkOperations:
+    """
+    put_many() and get_many() on both kinds of manager queue.
+    """
+
+    def test_batch_queue(self, batch_manager: queue_proxy_wrapper.QueueManager) -> None:
+        """
+        Bulk operations stop at capacity and at `max_items` .
+        """
+        # Setup
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(batch_manager, MAX_SIZE)
+        items = list(range(MAX_SIZE + 1))
+
+        # Run
+        put_count = wrapper.put_many(items, timeout=0.01)
+        first = wrapper.get_many(3)
+        rest = wrapper.get_many(MAX_SIZE)
+        empty = wrapper.get_many(MAX_SIZE, timeout=0.01)
+
+        # Test
+        assert put_count == MAX_SIZE
+        assert first == [0, 1, 2]
+        assert rest == [3]
+        assert not empty
+
+    def test_plain_queue(self, plain_manager: mp.managers.SyncManager) -> None:
+        """
+        Falls back to one call per item with the same results.
+        """
+        # Setup
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(plain_manager, MAX_SIZE)
+        items = list(range(MAX_SIZE + 1))
+
+        # Run
+        put_count = wrapper.put_many(items, timeout=0.01)
+        first = wrapper.get_many(3)
+        rest = wrapper.get_many(MAX_SIZE)
+        empty = wrapper.get_many(MAX_SIZE, timeout=0.01)
+
+        # Test
+        assert put_count == MAX_SIZE
+        assert first == [0, 1, 2]
+        assert rest == [3]
+        assert not empty
+
+
+class TestInstrumentation:
+    """
+    Queue statistics.
+    """
+
+    def test_not_instrumented(self) -> None:
+        """
+        No statistics by default.
+        """
+        # Setup
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            None, MAX_SIZE, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+        )
+
+        # Run
+        actual = wrapper.get_statistics()
+        wrapper.close()
+
+        # Test
+        assert actual is None
+
+    def test_statistics(self) -> None:
+        """
+        Depth, high water mark, drops, and wait times.
+        """
+        # Setup
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            None,
+            MAX_SIZE,
+            queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+            instrumented=True,
+        )
+
+        # Run
+        put_count = wrapper.put_many(list(range(MAX_SIZE + 1)), timeout=0.01)
+        wrapper.record_drops(MAX_SIZE + 1 - put_count)
+        time.sleep(0.02)
+        result, item = wrapper.get(0.0)
+        actual = wrapper.get_statistics()
+        wrapper.close()
+
+        # Test
+        assert put_count == MAX_SIZE
+        assert result
+        assert item == 0
+        assert actual is not None
+        assert actual.depth == MAX_SIZE - 1
+        assert actual.high_water_mark == MAX_SIZE
+        assert actual.drop_count == 1
+        assert actual.max_wait_time >= 0.02
+        assert actual.max_blocked_put_time >= 0.01
+
+
+class TestOverflowPolicy:
+    """
+    Puts into a full queue.
+    """
+
+    @staticmethod
+    def make_wrapper(
+        policy: queue_proxy_wrapper.OverflowPolicy,
+    ) -> queue_proxy_wrapper.QueueProxyWrapper:
+        """
+        Shared memory queue with the policy.
+        """
+        return queue_proxy_wrapper.QueueProxyWrapper(
+            None,
+            MAX_SIZE,
+            queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+            overflow_policy=policy,
+            overflow_timeout=0.01,
+            keep_every_nth=3,
+        )
+
+    def test_block_timeout(self) -> None:
+        """
+        Gives up after the overflow timeout even if the caller would wait forever.
+        """
+        # Setup
+        wrapper = self.make_wrapper(queue_proxy_wrapper.OverflowPolicy.BLOCK_TIMEOUT)
+
+        # Run
+        put_count = wrapper.put_many(list(range(MAX_SIZE + 1)))
+        actual = wrapper.get_many(MAX_SIZE + 1)
+        wrapper.close()
+
+        # Test
+        assert put_count == MAX_SIZE
+        assert actual == list(range(MAX_SIZE))
+        # The caller decides whether to retry or give up
+        assert wrapper.get_drop_count() == 0
+
+    def test_record_drops(self) -> None:
+        """
+        A producer giving up on a blocking put counts the drop.
+        """
+        # Setup
+        wrapper = self.make_wrapper(queue_proxy_wrapper.OverflowPolicy.BLOCK)
+
+        # Run
+        put_count = wrapper.put_many(list(range(MAX_SIZE + 2)), 0.01)
+        wrapper.record_drops(MAX_SIZE + 2 - put_count)
+        wrapper.close()
+
+        # Test
+        assert put_count == MAX_SIZE
+        assert wrapper.get_drop_count() == 2
+
+    def test_drop_newest(self) -> None:
+        """
+        Keeps the first items.
+        """
+        # Setup
+        wrapper = self.make_wrapper(queue_proxy_wrapper.OverflowPolicy.DROP_NEWEST)
+
+        # Run
+        put_count = wrapper.put_many(list(range(MAX_SIZE + 2)))
+        actual = wrapper.get_many(MAX_SIZE + 2)
+        wrapper.close()
+
+        # Test
+        assert put_count == MAX_SIZE
+        assert actual == list(range(MAX_SIZE))
+        assert wrapper.get_drop_count() == 2
+
+    def test_drop_oldest(self) -> None:
+        """
+        Keeps the last items.
+        """
+        # Setup
+        wrapper = self.make_wrapper(queue_proxy_wrapper.OverflowPolicy.DROP_OLDEST)
+
+        # Run
+        for i in range(MAX_SIZE + 2):
+            wrapper.put(i)
+        actual = wrapper.get_many(MAX_SIZE + 2)
+        wrapper.close()
+
+        # Test
+        assert actual == list(range(2, MAX_SIZE + 2))
+        assert wrapper.get_drop_count() == 2
+
+    def test_keep_every_nth(self) -> None:
+        """
+        Every third overflowing item replaces the oldest one.
+        """
+        # Setup
+        wrapper = self.make_wrapper(queue_proxy_wrapper.OverflowPolicy.KEEP_EVERY_NTH)
+
+        # Run
+        put_count = wrapper.put_many(list(range(MAX_SIZE + 6)))
+        actual = wrapper.get_many(MAX_SIZE + 6)
+        wrapper.close()
+
+        # Test
+        assert put_count == MAX_SIZE + 2
+        assert actual == [2, 3, MAX_SIZE + 2, MAX_SIZE + 5]
+        assert wrapper.get_drop_count() == 6
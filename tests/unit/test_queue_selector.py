@@ -0,0 +1,111 @@
+"""
+Test queue selector.
+"""
+
+import threading
+import time
+
+import pytest
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_selector
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+MAX_SIZE = 4
+
+
+@pytest.fixture()
+def queues() -> "list[queue_proxy_wrapper.QueueProxyWrapper]":  # type: ignore
+    """
+    Two shared memory queues.
+    """
+    instances = [
+        queue_proxy_wrapper.QueueProxyWrapper(
+            None, MAX_SIZE, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+        )
+        for _ in range(2)
+    ]
+    yield instances  # type: ignore
+    for instance in instances:
+        instance.close()
+
+
+class TestQueueSelector:
+    """
+    Waiting on several queues.
+    """
+
+    def test_timeout(self, queues: "list[queue_proxy_wrapper.QueueProxyWrapper]") -> None:
+        """
+        Nothing arrives.
+        """
+        # Setup
+        selector = queue_selector.QueueSelector(queues)
+
+        # Run
+        actual = selector.select(0.05)
+        selector.close()
+
+        # Test
+        assert not actual
+
+    def test_wakes_on_any_queue(
+        self, queues: "list[queue_proxy_wrapper.QueueProxyWrapper]"
+    ) -> None:
+        """
+        An item on the second queue wakes the selector long before the timeout.
+        """
+        # Setup
+        selector = queue_selector.QueueSelector(queues)
+        threading.Timer(0.05, queues[1].queue.put, ("data",)).start()
+
+        # Run
+        start_time = time.monotonic()
+        actual = selector.select(5.0)
+        elapsed_time = time.monotonic() - start_time
+        selector.close()
+
+        # Test
+        assert len(actual) == 1
+        assert actual[0][0] is queues[1]
+        assert actual[0][1] == "data"
+        assert elapsed_time < 1.0
+
+    def test_exit_requested(self, queues: "list[queue_proxy_wrapper.QueueProxyWrapper]") -> None:
+        """
+        An exit request wakes the selector without any data.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        selector = queue_selector.QueueSelector(queues, controller)
+        controller.request_exit()
+
+        # Run
+        actual = selector.select(5.0)
+        selector.close()
+
+        # Test
+        assert not actual
+        assert selector.is_exit_requested()
+
+    def test_close_stops_relays(
+        self, queues: "list[queue_proxy_wrapper.QueueProxyWrapper]"
+    ) -> None:
+        """
+        No relay is still reading the queues once closed.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        selector = queue_selector.QueueSelector(queues, controller)
+
+        # Run
+        selector.close()
+
+        # Test
+        assert not any(thread.is_alive() for thread in selector._QueueSelector__threads)
@@ -0,0 +1,126 @@
+"""
+Test shared memory blackboard.
+"""
+
+import multiprocessing as mp
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+
+import pytest
+
+from utilities.workers import shared_memory_blackboard
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+RECORD_SIZE = 1024
+WRITE_COUNT = 2000
+
+
+@pytest.fixture()
+def blackboard() -> shared_memory_blackboard.SharedMemoryBlackboard:  # type: ignore
+    """
+    Creates an empty blackboard.
+    """
+    instance = shared_memory_blackboard.SharedMemoryBlackboard(RECORD_SIZE)
+    yield instance  # type: ignore
+    instance.close()
+
+
+def writer(output_blackboard: shared_memory_blackboard.SharedMemoryBlackboard) -> None:
+    """
+    Writes records where every byte is the same, from another process.
+    """
+    for i in range(WRITE_COUNT):
+        output_blackboard.write(bytes([i % 256]) * RECORD_SIZE)
+
+
+def attach_with_own_tracker(
+    input_blackboard: shared_memory_blackboard.SharedMemoryBlackboard,
+) -> None:
+    """
+    Attaches to the blackboard from a process with its own resource tracker, then stops the
+    tracker like the process exiting.
+    """
+    resource_tracker._resource_tracker._fd = None
+    resource_tracker._resource_tracker._pid = None
+    attached_blackboard = object.__new__(shared_memory_blackboard.SharedMemoryBlackboard)
+    attached_blackboard.__setstate__(input_blackboard.__getstate__())
+    attached_blackboard.close()
+    resource_tracker._resource_tracker._stop()
+
+
+class TestSharedMemoryBlackboard:
+    """
+    Versioned reads.
+    """
+
+    def test_empty(self, blackboard: shared_memory_blackboard.SharedMemoryBlackboard) -> None:
+        """
+        Nothing written yet.
+        """
+        # Run
+        version, data = blackboard.read()
+
+        # Test
+        assert version == 0
+        assert data is None
+
+    def test_latest(self, blackboard: shared_memory_blackboard.SharedMemoryBlackboard) -> None:
+        """
+        Only the latest write is visible and the version counts writes.
+        """
+        # Setup
+        expected = b"b" * RECORD_SIZE
+
+        # Run
+        blackboard.write(b"a" * RECORD_SIZE)
+        blackboard.write(expected)
+        version, actual = blackboard.read()
+
+        # Test
+        assert version == 2
+        assert actual == expected
+
+    def test_no_torn_reads(
+        self, blackboard: shared_memory_blackboard.SharedMemoryBlackboard
+    ) -> None:
+        """
+        Reads concurrent with a writer in another process are never a mix of two writes.
+        """
+        # Setup
+        process = mp.Process(target=writer, args=(blackboard,))
+
+        # Run
+        process.start()
+        last_version = 0
+        while process.is_alive() or last_version < WRITE_COUNT:
+            version, data = blackboard.read()
+            if data is None:
+                continue
+
+            # Test
+            assert version >= last_version
+            assert data.count(data[0]) == RECORD_SIZE
+            last_version = version
+
+        process.join()
+
+    def test_other_resource_tracker(
+        self, blackboard: shared_memory_blackboard.SharedMemoryBlackboard
+    ) -> None:
+        """
+        Memory is not destroyed by the resource tracker of a process attaching to it.
+        """
+        # Run
+        process = mp.Process(target=attach_with_own_tracker, args=(blackboard,))
+        process.start()
+        process.join()
+
+        # Test
+        assert process.exitcode == 0
+        memory = shared_memory.SharedMemory(name=blackboard._SharedMemoryBlackboard__memory.name)
+        memory.close()
@@ -0,0 +1,181 @@
+"""
+Test shared memory queue.
+"""
+
+import multiprocessing as mp
+import queue
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+
+import pytest
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import shared_memory_queue
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+MAX_SIZE = 4
+SLOT_SIZE = 256
+
+
+@pytest.fixture()
+def shared_queue() -> shared_memory_queue.SharedMemoryQueue:  # type: ignore
+    """
+    Creates an empty shared memory queue.
+    """
+    instance = shared_memory_queue.SharedMemoryQueue(MAX_SIZE, SLOT_SIZE)
+    yield instance  # type: ignore
+    instance.close()
+
+
+def producer(output_queue: shared_memory_queue.SharedMemoryQueue, count: int) -> None:
+    """
+    Puts `count` integers into the queue from another process.
+    """
+    for i in range(count):
+        output_queue.put(i)
+
+
+def attach_with_own_tracker(input_queue: shared_memory_queue.SharedMemoryQueue) -> None:
+    """
+    Attaches to the queue from a process with its own resource tracker, then stops the
+    tracker like the process exiting.
+    """
+    resource_tracker._resource_tracker._fd = None
+    resource_tracker._resource_tracker._pid = None
+    attached_queue = object.__new__(shared_memory_queue.SharedMemoryQueue)
+    attached_queue.__setstate__(input_queue.__getstate__())
+    attached_queue.close()
+    resource_tracker._resource_tracker._stop()
+
+
+class TestSharedMemoryQueue:
+    """
+    Queue semantics.
+    """
+
+    def test_fifo_order(self, shared_queue: shared_memory_queue.SharedMemoryQueue) -> None:
+        """
+        Items come out in the order they went in, across wrap around.
+        """
+        # Setup
+        expected = list(range(MAX_SIZE * 3))
+
+        # Run
+        actual = []
+        for item in expected:
+            shared_queue.put(item)
+            actual.append(shared_queue.get())
+
+        # Test
+        assert actual == expected
+        assert shared_queue.empty()
+
+    def test_full_and_empty(self, shared_queue: shared_memory_queue.SharedMemoryQueue) -> None:
+        """
+        Non-blocking calls raise the standard queue exceptions.
+        """
+        # Run
+        with pytest.raises(queue.Empty):
+            shared_queue.get_nowait()
+
+        for i in range(MAX_SIZE):
+            shared_queue.put_nowait(i)
+
+        # Test
+        assert shared_queue.full()
+        assert shared_queue.qsize() == MAX_SIZE
+        with pytest.raises(queue.Full):
+            shared_queue.put(MAX_SIZE, timeout=0.01)
+
+    def test_item_too_large(self, shared_queue: shared_memory_queue.SharedMemoryQueue) -> None:
+        """
+        Items larger than a slot are rejected without using a slot.
+        """
+        # Run
+        with pytest.raises(ValueError):
+            shared_queue.put(b"0" * SLOT_SIZE)
+
+        # Test
+        assert shared_queue.empty()
+
+    def test_other_process(self, shared_queue: shared_memory_queue.SharedMemoryQueue) -> None:
+        """
+        Producer in another process blocks on a full queue until the consumer catches up.
+        """
+        # Setup
+        count = MAX_SIZE * 5
+        expected = list(range(count))
+
+        # Run
+        process = mp.Process(target=producer, args=(shared_queue, count))
+        process.start()
+        actual = [shared_queue.get(timeout=5.0) for _ in range(count)]
+        process.join()
+
+        # Test
+        assert actual == expected
+
+    def test_other_resource_tracker(
+        self, shared_queue: shared_memory_queue.SharedMemoryQueue
+    ) -> None:
+        """
+        Memory is not destroyed by the resource tracker of a process attaching to it.
+        """
+        # Run
+        process = mp.Process(target=attach_with_own_tracker, args=(shared_queue,))
+        process.start()
+        process.join()
+
+        # Test
+        assert process.exitcode == 0
+        memory = shared_memory.SharedMemory(name=shared_queue._SharedMemoryQueue__memory.name)
+        memory.close()
+
+    def test_put_many_get_many(self, shared_queue: shared_memory_queue.SharedMemoryQueue) -> None:
+        """
+        Bulk operations stop at capacity and at `max_items` .
+        """
+        # Setup
+        items = list(range(MAX_SIZE + 2))
+
+        # Run
+        put_count = shared_queue.put_many(items, timeout=0.01)
+        first = shared_queue.get_many(2)
+        rest = shared_queue.get_many(MAX_SIZE * 2, timeout=0.01)
+        empty = shared_queue.get_many(MAX_SIZE, block=False)
+
+        # Test
+        assert put_count == MAX_SIZE
+        assert first == [0, 1]
+        assert rest == [2, 3]
+        assert not empty
+
+
+class TestQueueProxyWrapper:
+    """
+    Wrapper with the shared memory backend.
+    """
+
+    def test_fill_and_drain(self) -> None:
+        """
+        Fill and drain leaves the queue empty.
+        """
+        # Setup
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+            None,
+            MAX_SIZE,
+            queue_proxy_wrapper.QueueBackend.SHARED_MEMORY,
+        )
+        wrapper.queue.put("data")
+
+        # Run
+        wrapper.fill_and_drain_queue()
+
+        # Test
+        assert wrapper.queue.empty()
+        wrapper.close()
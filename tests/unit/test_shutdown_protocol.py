@@ -0,0 +1,149 @@
+"""
+Test shutdown protocol.
+"""
+
+import time
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import shutdown_protocol
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+DEADLINE = 1.0  # seconds
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+@pytest.fixture()
+def controller() -> worker_controller.WorkerController:  # type: ignore
+    """
+    Creates a controller with nothing requested.
+    """
+    instance = worker_controller.WorkerController()
+    yield instance  # type: ignore
+
+
+def consumer(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Waits on the input queue without a timeout, only a poison pill wakes it up.
+    """
+    while not controller.is_exit_requested():
+        _, item = input_queue.get()
+        if item is None:
+            break
+
+
+def producer(
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Puts into the output queue without a timeout, only draining wakes it up.
+    """
+    while not controller.is_exit_requested():
+        output_queue.put("data")
+
+
+def stuck(controller: worker_controller.WorkerController) -> None:
+    """
+    Ignores exit requests.
+    """
+    while True:
+        controller.check_pause()
+        time.sleep(0.01)
+
+
+def start_manager(
+    count: int,
+    target: "(...) -> object",  # type: ignore
+    input_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    controller: worker_controller.WorkerController,
+    local_logger: logger.Logger,
+) -> worker_manager.WorkerManager:
+    """
+    Creates and starts workers.
+    """
+    result, properties = worker_manager.WorkerProperties.create(
+        count, target, (), input_queues, output_queues, controller, local_logger
+    )
+    assert result
+    assert properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(properties, local_logger)
+    assert result
+    assert manager is not None
+
+    manager.start_workers()
+    return manager
+
+
+class TestShutdown:
+    """
+    Shutdown within the deadline.
+    """
+
+    def test_blocked_workers_exit(
+        self, controller: worker_controller.WorkerController, test_logger: logger.Logger
+    ) -> None:
+        """
+        Consumers blocked on empty queues and producers blocked on full queues all exit.
+        """
+        # Setup
+        input_queue = queue_proxy_wrapper.QueueProxyWrapper(
+            None, 1, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+        )
+        output_queue = queue_proxy_wrapper.QueueProxyWrapper(
+            None, 1, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+        )
+        managers = [
+            start_manager(2, consumer, [input_queue], [], controller, test_logger),
+            start_manager(2, producer, [], [output_queue], controller, test_logger),
+        ]
+        # Let the producers fill the output queue and block
+        time.sleep(0.2)
+
+        # Run
+        report = shutdown_protocol.shutdown(
+            controller, managers, [input_queue, output_queue], DEADLINE
+        )
+
+        # Test
+        assert report.is_clean()
+        assert len(report.stuck_queues) == 0
+        assert len(report.worker_times) == 4
+        assert all(worker_time.duration < DEADLINE for worker_time in report.worker_times)
+        for manager in managers:
+            for worker in manager.get_workers():
+                assert not worker.is_alive()
+
+        input_queue.close()
+        output_queue.close()
+
+    def test_stuck_worker_terminated(
+        self, controller: worker_controller.WorkerController, test_logger: logger.Logger
+    ) -> None:
+        """
+        Workers that ignore the exit request are terminated at the deadline.
+        """
+        # Setup
+        manager = start_manager(1, stuck, [], [], controller, test_logger)
+
+        # Run
+        report = shutdown_protocol.shutdown(controller, [manager], [], 0.1)
+
+        # Test
+        assert not report.is_clean()
+        assert len(report.worker_times) == 1
+        assert report.worker_times[0].is_terminated
+        assert not manager.get_workers()[0].is_alive()
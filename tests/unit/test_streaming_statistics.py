@@ -0,0 +1,228 @@
+"""
+Test streaming statistics.
+"""
+
+import random
+import statistics
+
+import pytest
+
+from utilities.statistics import streaming_statistics
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+SAMPLE_COUNT = 10_000
+
+
+@pytest.fixture()
+def samples() -> "list[float]":  # type: ignore
+    """
+    Normally distributed samples.
+    """
+    generator = random.Random(0)
+
+    yield [generator.gauss(5.0, 2.0) for _ in range(SAMPLE_COUNT)]  # type: ignore
+
+
+class TestRunningStatistics:
+    """
+    Welford mean and variance.
+    """
+
+    def test_matches_exact(self, samples: "list[float]") -> None:
+        """
+        Same as computing from every sample.
+        """
+        # Setup
+        running = streaming_statistics.RunningStatistics()
+
+        # Run
+        for sample in samples:
+            running.update(sample)
+
+        # Test
+        assert running.count == SAMPLE_COUNT
+        assert running.mean == pytest.approx(statistics.fmean(samples))
+        assert running.get_variance() == pytest.approx(statistics.variance(samples))
+        assert running.min == min(samples)
+        assert running.max == max(samples)
+
+    def test_large_offset(self) -> None:
+        """
+        Variance of small changes around a large value is not lost to rounding.
+        """
+        # Setup
+        running = streaming_statistics.RunningStatistics()
+        values = [1e9 + offset for offset in (4.0, 7.0, 13.0, 16.0)]
+
+        # Run
+        for value in values:
+            running.update(value)
+
+        # Test
+        assert running.get_variance() == pytest.approx(30.0)
+
+    def test_empty(self) -> None:
+        """
+        No variance without samples.
+        """
+        running = streaming_statistics.RunningStatistics()
+
+        assert running.get_variance() == 0.0
+
+
+class TestExponentialAverage:
+    """
+    Following recent samples.
+    """
+
+    def test_follows_step(self) -> None:
+        """
+        Moves most of the way to a new level.
+        """
+        # Setup
+        average = streaming_statistics.ExponentialAverage(0.5)
+
+        # Run
+        average.update(0.0)
+        for _ in range(10):
+            average.update(10.0)
+
+        # Test
+        assert average.mean == pytest.approx(10.0, abs=0.01)
+        assert average.variance > 0.0
+
+    def test_first_sample(self) -> None:
+        """
+        Starts at the first sample instead of 0.
+        """
+        average = streaming_statistics.ExponentialAverage(0.1)
+
+        average.update(3.0)
+
+        assert average.mean == 3.0
+
+
+class TestSlidingWindow:
+    """
+    Mean of the latest samples.
+    """
+
+    def test_window_mean(self, samples: "list[float]") -> None:
+        """
+        Only the latest samples count, at every point.
+        """
+        # Setup
+        window = streaming_statistics.SlidingWindow(50)
+
+        # Run and test
+        for i, sample in enumerate(samples):
+            window.update(sample)
+            if i % 997 == 0:
+                latest = samples[max(i - 49, 0) : i + 1]
+                assert window.get_mean() == pytest.approx(statistics.fmean(latest))
+
+        assert window.count == 50
+
+    def test_no_drift(self) -> None:
+        """
+        Rounding error from large samples leaving the window does not accumulate.
+        """
+        # Setup
+        window = streaming_statistics.SlidingWindow(4)
+
+        # Run
+        for _ in range(1000):
+            window.update(1e16)
+            window.update(1.0)
+        for _ in range(4):
+            window.update(1.0)
+
+        # Test
+        assert window.get_mean() == 1.0
+
+    def test_long_stream(self, samples: "list[float]") -> None:
+        """
+        Still exact to rounding after many passes over the window.
+        """
+        # Setup
+        window = streaming_statistics.SlidingWindow(7)
+        offset_samples = [sample + 1e6 for sample in samples * 10]
+
+        # Run
+        for sample in offset_samples:
+            window.update(sample)
+
+        # Test
+        assert window.get_mean() == pytest.approx(statistics.fmean(offset_samples[-7:]), abs=1e-9)
+
+
+class TestP2Quantile:
+    """
+    Approximate quantiles.
+    """
+
+    @pytest.mark.parametrize("quantile", [0.05, 0.5, 0.95])
+    def test_close_to_exact(self, samples: "list[float]", quantile: float) -> None:
+        """
+        Within a small fraction of the spread of the exact quantile.
+        """
+        # Setup
+        estimator = streaming_statistics.P2Quantile(quantile)
+
+        # Run
+        for sample in samples:
+            estimator.update(sample)
+
+        # Test
+        exact = sorted(samples)[int(quantile * SAMPLE_COUNT)]
+        assert estimator.get_value() == pytest.approx(exact, abs=0.1)
+
+    def test_few_samples(self) -> None:
+        """
+        Exact before the markers are set up.
+        """
+        estimator = streaming_statistics.P2Quantile(0.5)
+
+        for value in [3.0, 1.0, 2.0]:
+            estimator.update(value)
+
+        assert estimator.get_value() == 2.0
+
+
+class TestStreamingStatistics:
+    """
+    Summary of one stream.
+    """
+
+    def test_summary(self, samples: "list[float]") -> None:
+        """
+        Summary has every statistic.
+        """
+        # Setup
+        stream = streaming_statistics.StreamingStatistics(0.1, 50, [0.5, 0.95])
+
+        # Run
+        for sample in samples:
+            stream.update(sample)
+        summary = stream.get_summary()
+
+        # Test
+        assert summary.count == SAMPLE_COUNT
+        assert summary.mean == pytest.approx(5.0, abs=0.1)
+        assert summary.standard_deviation == pytest.approx(2.0, abs=0.1)
+        assert summary.window_mean == pytest.approx(statistics.fmean(samples[-50:]))
+        assert list(summary.quantiles) == [0.5, 0.95]
+        assert "p95" in str(summary)
+
+    def test_empty_summary(self) -> None:
+        """
+        Nothing to summarize.
+        """
+        stream = streaming_statistics.StreamingStatistics(0.1, 50, [0.5])
+
+        assert str(stream.get_summary()) == "count: 0"
@@ -0,0 +1,103 @@
+"""
+Test TelemetryData binary layout.
+"""
+
+import pickle
+
+import pytest
+
+from modules.telemetry import telemetry
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+@pytest.fixture()
+def full_record() -> telemetry.TelemetryData:  # type: ignore
+    """
+    Record with every field set.
+    """
+    record = telemetry.TelemetryData(
+        time_since_boot=123456,
+        x=1.5,
+        y=-2.5,
+        z=30.0,
+        x_velocity=0.25,
+        y_velocity=-0.5,
+        z_velocity=1.0,
+        roll=0.01,
+        pitch=-0.02,
+        yaw=3.1,
+        roll_speed=0.1,
+        pitch_speed=0.2,
+        yaw_speed=-0.3,
+    )
+    yield record  # type: ignore
+
+
+def assert_same(actual: telemetry.TelemetryData, expected: telemetry.TelemetryData) -> None:
+    """
+    Field by field comparison.
+    """
+    for name in telemetry.TelemetryData.__slots__:
+        assert getattr(actual, name) == getattr(expected, name), name
+
+
+class TestCodec:
+    """
+    Encoding and decoding.
+    """
+
+    def test_round_trip(self, full_record: telemetry.TelemetryData) -> None:
+        """
+        Decoding an encoded record gives back the same fields.
+        """
+        # Run
+        data = full_record.to_bytes()
+        actual = telemetry.TelemetryData.from_bytes(data)
+
+        # Test
+        assert len(data) == telemetry.TelemetryData.PACKED_SIZE
+        assert_same(actual, full_record)
+
+    def test_none_fields(self) -> None:
+        """
+        Fields that are None stay None, and zero stays zero.
+        """
+        # Setup
+        expected = telemetry.TelemetryData(x=0.0, yaw=1.0)
+
+        # Run
+        actual = telemetry.TelemetryData.from_bytes(expected.to_bytes())
+
+        # Test
+        assert_same(actual, expected)
+        assert actual.x == 0.0
+        assert actual.y is None
+
+    def test_bulk(self, full_record: telemetry.TelemetryData) -> None:
+        """
+        Bulk pack and unpack of several records.
+        """
+        # Setup
+        expected = [full_record, telemetry.TelemetryData(), full_record]
+
+        # Run
+        actual = telemetry.TelemetryData.unpack_many(telemetry.TelemetryData.pack_many(expected))
+
+        # Test
+        assert len(actual) == len(expected)
+        for actual_record, expected_record in zip(actual, expected):
+            assert_same(actual_record, expected_record)
+
+    def test_pickle(self, full_record: telemetry.TelemetryData) -> None:
+        """
+        Pickling keeps every field.
+        """
+        # Run
+        actual = pickle.loads(pickle.dumps(full_record))
+
+        # Test
+        assert_same(actual, full_record)
@@ -0,0 +1,193 @@
+"""
+Test telemetry fusion.
+"""
+
+import array
+import math
+
+import pytest
+
+from modules.telemetry import telemetry_fusion
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+class Message:
+    """
+    Stands in for a parsed MAVLink message.
+    """
+
+    def __init__(self, message_type: str, **fields: float) -> None:
+        self.message_type = message_type
+        self.__dict__.update(fields)
+
+    def get_type(self) -> str:
+        """
+        Returns the message type.
+        """
+        return self.message_type
+
+
+def position(time_boot_ms: int, x: float, vx: float) -> Message:
+    """
+    LOCAL_POSITION_NED moving along x.
+    """
+    return Message(
+        "LOCAL_POSITION_NED", time_boot_ms=time_boot_ms, x=x, y=0.0, z=0.0, vx=vx, vy=0.0, vz=0.0
+    )
+
+
+def attitude(time_boot_ms: int, yaw: float, yawspeed: float) -> Message:
+    """
+    ATTITUDE turning in yaw.
+    """
+    return Message(
+        "ATTITUDE",
+        time_boot_ms=time_boot_ms,
+        roll=0.0,
+        pitch=0.0,
+        yaw=yaw,
+        rollspeed=0.0,
+        pitchspeed=0.0,
+        yawspeed=yawspeed,
+    )
+
+
+def create_fusion(capacity: int, max_extrapolation: float) -> telemetry_fusion.TelemetryFusion:
+    """
+    Creates fusion buffers.
+    """
+    result, fusion = telemetry_fusion.TelemetryFusion.create(capacity, max_extrapolation)
+    assert result
+    assert fusion is not None
+
+    return fusion
+
+
+class TestSampleBuffer:
+    """
+    Ring buffer sampling.
+    """
+
+    def test_interpolate_yaw_wrap(self) -> None:
+        """
+        Angles are interpolated the short way around.
+        """
+        # Setup
+        buffer = telemetry_fusion.SampleBuffer(4, 1, (0,), (-1,))
+        buffer.append(0.0, (math.pi - 0.1,))
+        buffer.append(100.0, (-math.pi + 0.1,))
+        output = array.array("d", [0.0])
+
+        # Run
+        result = buffer.sample(50.0, 0.0, output, 0)
+
+        # Test
+        assert result
+        assert abs(abs(output[0]) - math.pi) < 1e-9
+
+    def test_bounded(self) -> None:
+        """
+        Only the most recent samples are kept.
+        """
+        # Setup
+        buffer = telemetry_fusion.SampleBuffer(2, 1, (), (-1,))
+        output = array.array("d", [0.0])
+
+        # Run
+        for i in range(5):
+            assert buffer.append(i * 10.0, (float(i),))
+
+        # Test
+        assert buffer.sample(35.0, 0.0, output, 0)
+        assert output[0] == pytest.approx(3.5)
+        assert not buffer.sample(25.0, 0.0, output, 0)
+
+    def test_older_sample_ignored(self) -> None:
+        """
+        Samples must arrive in time order.
+        """
+        # Setup
+        buffer = telemetry_fusion.SampleBuffer(2, 1, (), (-1,))
+        buffer.append(10.0, (1.0,))
+
+        # Run
+        result = buffer.append(5.0, (2.0,))
+
+        # Test
+        assert not result
+        assert buffer.newest_time() == 10.0
+
+
+class TestTelemetryFusion:
+    """
+    Alignment of position and attitude.
+    """
+
+    def test_interpolate_only(self) -> None:
+        """
+        Without extrapolation the newer type is interpolated to the older type's time.
+        """
+        # Setup
+        fusion = create_fusion(8, 0.0)
+        fusion.add(position(0, 0.0, 0.0))
+        fusion.add(position(100, 10.0, 20.0))
+        fusion.add(attitude(40, 1.0, 0.0))
+
+        # Run
+        result, fused_time, values = fusion.fuse()
+
+        # Test
+        assert result
+        assert fused_time == 40.0
+        # x and vx
+        assert values[0] == pytest.approx(4.0)
+        assert values[3] == pytest.approx(8.0)
+        # yaw
+        assert values[8] == pytest.approx(1.0)
+
+    def test_extrapolate(self) -> None:
+        """
+        The older type is extrapolated with its rates, up to the limit.
+        """
+        # Setup
+        fusion = create_fusion(8, 0.1)
+        fusion.add(attitude(0, math.pi - 0.1, 2.0))
+        fusion.add(position(50, 1.0, 0.0))
+
+        # Run
+        result, fused_time, values = fusion.fuse()
+
+        # Test
+        assert result
+        assert fused_time == 50.0
+        # yaw turned 0.1 rad past pi
+        assert values[8] == pytest.approx(-math.pi)
+
+    def test_needs_both_types(self) -> None:
+        """
+        Nothing is fused until both types have a sample.
+        """
+        # Setup
+        fusion = create_fusion(8, 0.1)
+        fusion.add(position(0, 0.0, 0.0))
+
+        # Run
+        result, fused_time, values = fusion.fuse()
+
+        # Test
+        assert not result
+        assert fused_time is None
+        assert values is None
+
+    def test_create_invalid(self) -> None:
+        """
+        Capacity must hold at least two samples.
+        """
+        result, fusion = telemetry_fusion.TelemetryFusion.create(1, 0.1)
+
+        assert not result
+        assert fusion is None
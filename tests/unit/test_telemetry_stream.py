@@ -0,0 +1,99 @@
+"""
+Test streaming telemetry.
+"""
+
+import time
+
+import pytest
+
+from modules.common.modules.logger import logger
+from modules.telemetry import telemetry
+from tests.unit import conftest
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+def create_telemetry(
+    connection: conftest.FakeConnection, local_logger: logger.Logger
+) -> telemetry.Telemetry:
+    """
+    Creates telemetry with a short timeout.
+    """
+    result, telem = telemetry.Telemetry.create(0.01, connection, local_logger)
+    assert result
+    assert telem is not None
+
+    return telem
+
+
+class TestStream:
+    """
+    Streaming mode.
+    """
+
+    def test_every_message_after_the_first_pair(self, test_logger: logger.Logger) -> None:
+        """
+        A sample is produced for every message once both types have been seen.
+        """
+        # Setup
+        telem = create_telemetry(
+            conftest.FakeConnection(conftest.encode_messages("PPAAP")), test_logger
+        )
+        samples = telem.stream()
+
+        # Run
+        results = [next(samples) for _ in range(4)]
+
+        # Test
+        assert [result for result, _ in results] == [True, True, True, False]
+        assert [(data.x, data.roll) for _, data in results[:3]] == [
+            (1.0, 2.0),
+            (1.0, 3.0),
+            (4.0, 3.0),
+        ]
+
+    def test_stale_message(self, test_logger: logger.Logger) -> None:
+        """
+        No sample is produced while the other message is older than the maximum age.
+        """
+        # Setup
+        connection = conftest.FakeConnection(conftest.encode_messages("PA"))
+        telem = create_telemetry(connection, test_logger)
+        samples = telem.stream(0.05)
+        result, _ = next(samples)
+        assert result
+
+        # Run
+        time.sleep(0.1)
+        connection.messages = conftest.encode_messages("P")
+        result, telemetry_data = next(samples)
+
+        # Test
+        assert not result
+        assert telemetry_data is None
+
+    def test_timeouts_logged_once(
+        self, test_logger: logger.Logger, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """
+        Only the first timeout in a row is logged, then their number.
+        """
+        # Setup
+        logged = []
+        monkeypatch.setattr(test_logger, "warning", lambda message, _: logged.append(message))
+        monkeypatch.setattr(test_logger, "info", lambda message, _: logged.append(message))
+        connection = conftest.FakeConnection([])
+        telem = create_telemetry(connection, test_logger)
+        samples = telem.stream()
+
+        # Run
+        results = [next(samples) for _ in range(3)]
+        connection.messages = conftest.encode_messages("PA")
+        results.append(next(samples))
+
+        # Test
+        assert [result for result, _ in results] == [False, False, False, True]
+        assert logged == ["Timeout: No message within 0.01 seconds", "Received after 3 timeouts"]
@@ -0,0 +1,121 @@
+"""
+Test worker controller.
+"""
+
+import multiprocessing as mp
+import threading
+import time
+
+import pytest
+
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+@pytest.fixture()
+def controller() -> worker_controller.WorkerController:  # type: ignore
+    """
+    Creates a controller with nothing requested.
+    """
+    instance = worker_controller.WorkerController()
+    yield instance  # type: ignore
+
+
+def request_exit_later(input_controller: worker_controller.WorkerController) -> None:
+    """
+    Requests exit from another process after a short delay.
+    """
+    time.sleep(0.05)
+    input_controller.request_exit()
+
+
+class TestExit:
+    """
+    Exit requests.
+    """
+
+    def test_request_and_clear(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Requesting and clearing exit, twice each.
+        """
+        # Run and test
+        assert not controller.is_exit_requested()
+
+        controller.request_exit()
+        controller.request_exit()
+        assert controller.is_exit_requested()
+
+        controller.clear_exit()
+        controller.clear_exit()
+        assert not controller.is_exit_requested()
+
+    def test_wait_for_exit_timeout(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Waiting gives up when exit is not requested.
+        """
+        # Run
+        actual = controller.wait_for_exit(0.01)
+
+        # Test
+        assert not actual
+
+    def test_wait_for_exit_other_process(
+        self, controller: worker_controller.WorkerController
+    ) -> None:
+        """
+        Waiting wakes up as soon as another process requests exit.
+        """
+        # Setup
+        process = mp.Process(target=request_exit_later, args=(controller,))
+
+        # Run
+        process.start()
+        start_time = time.monotonic()
+        actual = controller.wait_for_exit(5.0)
+        elapsed_time = time.monotonic() - start_time
+        process.join()
+
+        # Test
+        assert actual
+        assert controller.is_exit_requested()
+        assert elapsed_time < 1.0
+
+
+class TestPause:
+    """
+    Pause requests.
+    """
+
+    def test_check_pause_not_paused(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Does not block and leaves the semaphore available.
+        """
+        # Run
+        controller.check_pause()
+
+        # Test
+        assert controller.get_pause_generation() == 0
+        assert controller._WorkerController__pause.acquire(False)  # type: ignore
+
+    def test_pause_and_resume(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Generation is odd while paused, and a paused worker continues after resume.
+        """
+        # Setup
+        controller.request_pause()
+        paused_generation = controller.get_pause_generation()
+
+        # Run
+        threading.Timer(0.05, controller.request_resume).start()
+        start_time = time.monotonic()
+        controller.check_pause()
+        elapsed_time = time.monotonic() - start_time
+
+        # Test
+        assert paused_generation == 1
+        assert controller.get_pause_generation() == 2
+        assert elapsed_time >= 0.04
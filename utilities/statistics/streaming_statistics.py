@@ -0,0 +1,323 @@
+"""
+Statistics of a stream of samples, updated in constant time and memory per sample.
+"""
+
+import array
+import math
+
+
+class RunningStatistics:
+    """
+    Count, mean, variance, minimum and maximum of every sample, with Welford's method.
+    Unlike a sum of squares, the variance stays accurate when the mean is large.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        # Sum of squared differences from the mean
+        self.__m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, value: float) -> None:
+        """
+        Adds a sample.
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.__m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def get_variance(self) -> float:
+        """
+        Returns the sample variance, 0 with fewer than 2 samples.
+        """
+        if self.count < 2:
+            return 0.0
+
+        return self.__m2 / (self.count - 1)
+
+    def get_standard_deviation(self) -> float:
+        """
+        Returns the sample standard deviation, 0 with fewer than 2 samples.
+        """
+        return math.sqrt(self.get_variance())
+
+
+class ExponentialAverage:
+    """
+    Exponentially weighted moving average and variance, following recent samples.
+    """
+
+    def __init__(self, alpha: float) -> None:
+        """
+        alpha: Weight of each new sample, between 0 and 1. Higher follows faster.
+        """
+        assert 0.0 < alpha <= 1.0, "Alpha must be in (0, 1]"
+
+        self.__alpha = alpha
+        self.count = 0
+        self.mean = 0.0
+        self.variance = 0.0
+
+    def update(self, value: float) -> None:
+        """
+        Adds a sample. The first sample is the initial average.
+        """
+        self.count += 1
+        if self.count == 1:
+            self.mean = value
+            return
+
+        delta = value - self.mean
+        increment = self.__alpha * delta
+        self.mean += increment
+        self.variance = (1.0 - self.__alpha) * (self.variance + delta * increment)
+
+
+class SlidingWindow:
+    """
+    Mean of the latest samples, kept in a ring buffer allocated once.
+
+    The total is updated by adding the new sample and subtracting the oldest, with
+    Neumaier's compensated summation so that rounding error does not build up.
+    """
+
+    def __init__(self, size: int) -> None:
+        """
+        size: Number of latest samples in the window.
+        """
+        assert size > 0, "Size must be greater than 0"
+
+        self.__samples = array.array("d", bytes(8 * size))
+        self.__index = 0
+        self.count = 0
+        self.__total = 0.0
+        # Rounding error lost from the total
+        self.__compensation = 0.0
+
+    def update(self, value: float) -> None:
+        """
+        Adds a sample, replacing the oldest once the window is full.
+        """
+        size = len(self.__samples)
+        if self.count < size:
+            self.count += 1
+        else:
+            self.__add(-self.__samples[self.__index])
+
+        self.__samples[self.__index] = value
+        self.__add(value)
+        self.__index += 1
+        if self.__index == size:
+            self.__index = 0
+
+    def __add(self, value: float) -> None:
+        total = self.__total + value
+        # The low order digits of the smaller operand are lost from the total
+        if abs(self.__total) >= abs(value):
+            self.__compensation += (self.__total - total) + value
+        else:
+            self.__compensation += (value - total) + self.__total
+
+        self.__total = total
+
+    def get_mean(self) -> float:
+        """
+        Returns the mean of the samples in the window, 0 if there are none.
+        """
+        if self.count == 0:
+            return 0.0
+
+        return (self.__total + self.__compensation) / self.count
+
+
+class P2Quantile:
+    """
+    Approximate quantile with the P² algorithm (Jain and Chlamtac), which keeps 5 markers
+    instead of the samples. Exact until 5 samples.
+    """
+
+    def __init__(self, quantile: float) -> None:
+        """
+        quantile: Fraction of samples below the estimate, between 0 and 1.
+        """
+        assert 0.0 < quantile < 1.0, "Quantile must be in (0, 1)"
+
+        self.__quantile = quantile
+        self.count = 0
+        # Marker heights
+        self.__heights = [0.0] * 5
+        # Marker positions, and their desired positions and increments
+        self.__positions = [0, 1, 2, 3, 4]
+        self.__desired = [0.0, 2.0 * quantile, 4.0 * quantile, 2.0 + 2.0 * quantile, 4.0]
+        self.__increments = [0.0, quantile / 2.0, quantile, (1.0 + quantile) / 2.0, 1.0]
+
+    def update(self, value: float) -> None:
+        """
+        Adds a sample.
+        """
+        heights = self.__heights
+        positions = self.__positions
+        if self.count < 5:
+            heights[self.count] = value
+            self.count += 1
+            if self.count == 5:
+                heights.sort()
+            return
+
+        self.count += 1
+
+        # Cell of the sample, extending the extremes
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.__desired[i] += self.__increments[i]
+
+        # Move the middle markers towards their desired positions
+        for i in range(1, 4):
+            offset = self.__desired[i] - positions[i]
+            if (offset >= 1.0 and positions[i + 1] - positions[i] > 1) or (
+                offset <= -1.0 and positions[i - 1] - positions[i] < -1
+            ):
+                step = 1 if offset > 0.0 else -1
+                height = self.__parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (
+                        positions[i + step] - positions[i]
+                    )
+
+                heights[i] = height
+                positions[i] += step
+
+    def __parabolic(self, i: int, step: int) -> float:
+        """
+        Piecewise parabolic prediction of marker i moved by step.
+        """
+        heights = self.__heights
+        positions = self.__positions
+        return heights[i] + step / (positions[i + 1] - positions[i - 1]) * (
+            (positions[i] - positions[i - 1] + step)
+            * (heights[i + 1] - heights[i])
+            / (positions[i + 1] - positions[i])
+            + (positions[i + 1] - positions[i] - step)
+            * (heights[i] - heights[i - 1])
+            / (positions[i] - positions[i - 1])
+        )
+
+    def get_value(self) -> float:
+        """
+        Returns the estimate, 0 if there are no samples.
+        """
+        if self.count == 0:
+            return 0.0
+
+        if self.count < 5:
+            # Nearest rank of the samples so far
+            samples = sorted(self.__heights[: self.count])
+            return samples[min(int(self.__quantile * self.count), self.count - 1)]
+
+        return self.__heights[2]
+
+
+class StatisticsSummary:  # pylint: disable=too-many-instance-attributes
+    """
+    Snapshot of streaming statistics.
+    """
+
+    def __init__(
+        self,
+        count: int,
+        mean: float,
+        standard_deviation: float,
+        minimum: float,
+        maximum: float,
+        exponential_mean: float,
+        window_mean: float,
+        quantiles: "dict[float, float]",
+    ) -> None:
+        self.count = count
+        self.mean = mean
+        self.standard_deviation = standard_deviation
+        self.min = minimum
+        self.max = maximum
+        # Average following recent samples
+        self.exponential_mean = exponential_mean
+        # Average of the latest samples only
+        self.window_mean = window_mean
+        # Approximate value by quantile
+        self.quantiles = quantiles
+
+    def __str__(self) -> str:
+        if self.count == 0:
+            return "count: 0"
+
+        quantiles = ", ".join(
+            f"p{quantile * 100.0:g}: {value:.3f}" for quantile, value in self.quantiles.items()
+        )
+        return (
+            f"count: {self.count}, mean: {self.mean:.3f}, std: {self.standard_deviation:.3f}, "
+            f"min/max: {self.min:.3f}/{self.max:.3f}, "
+            f"ewma: {self.exponential_mean:.3f}, window mean: {self.window_mean:.3f}, "
+            f"{quantiles}"
+        )
+
+
+class StreamingStatistics:
+    """
+    All of the statistics above for one stream of samples.
+    """
+
+    def __init__(self, alpha: float, window_size: int, quantiles: "list[float]") -> None:
+        """
+        alpha: Weight of each new sample in the exponential average.
+        window_size: Number of latest samples in the window mean.
+        quantiles: Fractions to estimate quantiles of, such as 0.5 for the median.
+        """
+        self.__running = RunningStatistics()
+        self.__exponential = ExponentialAverage(alpha)
+        self.__window = SlidingWindow(window_size)
+        self.__quantiles = [P2Quantile(quantile) for quantile in quantiles]
+        self.__quantile_fractions = list(quantiles)
+
+    def update(self, value: float) -> None:
+        """
+        Adds a sample.
+        """
+        self.__running.update(value)
+        self.__exponential.update(value)
+        self.__window.update(value)
+        for quantile in self.__quantiles:
+            quantile.update(value)
+
+    def get_summary(self) -> StatisticsSummary:
+        """
+        Returns a snapshot of the statistics.
+        """
+        return StatisticsSummary(
+            self.__running.count,
+            self.__running.mean,
+            self.__running.get_standard_deviation(),
+            self.__running.min,
+            self.__running.max,
+            self.__exponential.mean,
+            self.__window.get_mean(),
+            {
+                fraction: quantile.get_value()
+                for fraction, quantile in zip(self.__quantile_fractions, self.__quantiles)
+            },
+        )
@@ -0,0 +1,110 @@
+"""
+Fixed rate loops.
+"""
+
+import time
+
+
+class SchedulerStatistics:
+    """
+    Snapshot of scheduler instrumentation. Times are in seconds.
+    """
+
+    def __init__(
+        self,
+        cycle_count: int,
+        missed_count: int,
+        total_jitter: float,
+        max_jitter: float,
+    ) -> None:
+        self.cycle_count = cycle_count
+        # Deadlines skipped because the loop was more than a period late
+        self.missed_count = missed_count
+        # Time between a deadline and the loop waking up for it
+        self.mean_jitter = total_jitter / cycle_count if cycle_count > 0 else 0.0
+        self.max_jitter = max_jitter
+
+    def __str__(self) -> str:
+        return (
+            f"cycles: {self.cycle_count}, missed: {self.missed_count}, "
+            f"jitter mean/max: {self.mean_jitter * 1000.0:.2f}/{self.max_jitter * 1000.0:.2f} ms"
+        )
+
+
+class PeriodicScheduler:
+    """
+    Wakes a loop on absolute deadlines of the monotonic clock, one period apart.
+
+    Time spent in the loop body or oversleeping is not added to the next wait, so the
+    period does not drift. A loop more than a period late skips the deadlines it missed
+    instead of running several times back to back.
+    """
+
+    def __init__(self, period: float, start_time: float | None = None) -> None:
+        """
+        period: Time in seconds between deadlines.
+        start_time: Monotonic time of the first cycle, None for now. The first deadline
+        is one period later.
+        """
+        assert period > 0.0, "Period must be greater than 0"
+
+        self.__period = period
+        self.__deadline = time.monotonic() if start_time is None else start_time
+        self.__cycle_count = 0
+        self.__missed_count = 0
+        self.__total_jitter = 0.0
+        self.__max_jitter = 0.0
+
+    def get_delay(self) -> float:
+        """
+        Advances to the next deadline, skipping any already more than a period in the past.
+
+        Returns the time in seconds until it, 0 if it has passed.
+        """
+        self.__deadline += self.__period
+
+        current_time = time.monotonic()
+        late_time = current_time - self.__deadline
+        if late_time >= self.__period:
+            missed = int(late_time // self.__period)
+            self.__deadline += missed * self.__period
+            self.__missed_count += missed
+
+        return max(self.__deadline - current_time, 0.0)
+
+    def record_wake(self) -> None:
+        """
+        Records the jitter of the current deadline. Call when the loop wakes up for it.
+        Early wake ups, such as for an exit request, are not counted.
+        """
+        jitter = time.monotonic() - self.__deadline
+        if jitter < 0.0:
+            return
+
+        self.__cycle_count += 1
+        self.__total_jitter += jitter
+        self.__max_jitter = max(self.__max_jitter, jitter)
+
+    def wait(self, sleep: "(float) -> object" = time.sleep) -> object:  # type: ignore
+        """
+        Waits until the next deadline.
+
+        sleep: Waits for the given number of seconds, for example
+        `WorkerController.wait_for_exit` to wake up early on exit.
+
+        Returns what sleep returned.
+        """
+        result = sleep(self.get_delay())
+        self.record_wake()
+        return result
+
+    def get_statistics(self) -> SchedulerStatistics:
+        """
+        Returns the instrumentation so far.
+        """
+        return SchedulerStatistics(
+            self.__cycle_count,
+            self.__missed_count,
+            self.__total_jitter,
+            self.__max_jitter,
+        )
@@ -2,24 +2,365 @@
 Queue.
 """
 
+import ctypes
+import enum
+import multiprocessing as mp
 import multiprocessing.managers
 import queue
 import time
 
+from . import queue_statistics
+from . import shared_memory_queue
 
-class QueueProxyWrapper:
+
+class QueueBackend(enum.Enum):
+    """
+    Implementation of the underlying queue.
+    """
+
+    # Proxy to a queue in the manager server process, every call is a round trip
+    MANAGER = 0
+    # Ring buffer in shared memory, requires `maxsize > 0`
+    SHARED_MEMORY = 1
+
+
+class OverflowPolicy(enum.Enum):
+    """
+    What a put does when the queue is full.
+    """
+
+    # Wait for space, for as long as the caller allows
+    BLOCK = 0
+    # Wait for space, but no longer than the overflow timeout
+    BLOCK_TIMEOUT = 1
+    # Remove the oldest items to make space, never waits
+    DROP_OLDEST = 2
+    # Discard the new items, never waits
+    DROP_NEWEST = 3
+    # Keep every Nth overflowing item by removing the oldest, discard the others, never waits
+    KEEP_EVERY_NTH = 4
+
+
+class BatchQueue(queue.Queue):
+    """
+    Queue with bulk operations. Lives in the manager server process,
+    so each bulk operation is a single round trip through the proxy.
+    """
+
+    def put_many(
+        self, items: "list[object]", block: bool = True, timeout: float | None = None
+    ) -> int:
+        """
+        Put items into the queue in order.
+
+        Returns the number of items put, which is less than the number of items
+        if the queue did not have space in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        count = 0
+        with self.not_full:
+            for item in items:
+                while 0 < self.maxsize <= self._qsize():
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if not block or (remaining is not None and remaining <= 0.0):
+                        return count
+
+                    self.not_full.wait(remaining)
+
+                self._put(item)
+                self.unfinished_tasks += 1
+                self.not_empty.notify()
+                count += 1
+
+        return count
+
+    def get_many(
+        self, max_items: int, block: bool = True, timeout: float | None = None
+    ) -> "list[object]":
+        """
+        Remove and return all available items up to `max_items` .
+        Only waits for the first item.
+
+        Returns the items, empty if none became available in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self.not_empty:
+            while self._qsize() == 0:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if not block or (remaining is not None and remaining <= 0.0):
+                    return []
+
+                self.not_empty.wait(remaining)
+
+            items = []
+            while self._qsize() > 0 and len(items) < max_items:
+                items.append(self._get())
+
+            self.not_full.notify(len(items))
+
+        return items
+
+
+class QueueManager(multiprocessing.managers.SyncManager):
+    """
+    Manager that can also create queues with bulk operations.
+    """
+
+
+QueueManager.register("BatchQueue", BatchQueue)
+
+
+class QueueProxyWrapper:  # pylint: disable=too-many-instance-attributes
     """
     Wrapper for an underlying queue proxy which also stores `maxsize`.
 
     `maxsize <= 0` means infinite size.
+
+    The overflow policy only applies to the wrapper methods. When instrumented, items are
+    stored with the time they were put, so producers and consumers must use the wrapper
+    methods instead of `queue` directly.
     """
 
     __QUEUE_TIMEOUT = 0.1  # seconds
     __QUEUE_DELAY = 0.1  # seconds
 
-    def __init__(self, mp_manager: multiprocessing.managers.SyncManager, maxsize: int = 0) -> None:
-        self.queue = mp_manager.Queue(maxsize)
+    DEFAULT_SLOT_SIZE = 4096  # bytes
+
+    def __init__(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager | None,
+        maxsize: int = 0,
+        backend: QueueBackend = QueueBackend.MANAGER,
+        slot_size: int = DEFAULT_SLOT_SIZE,
+        instrumented: bool = False,
+        overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        overflow_timeout: float = __QUEUE_TIMEOUT,
+        keep_every_nth: int = 2,
+    ) -> None:
+        """
+        mp_manager: Manager that owns the queue, only used by the manager backend.
+        maxsize: Maximum number of items.
+        backend: Implementation of the underlying queue.
+        slot_size: Maximum size in bytes of a pickled item, only used by the shared memory backend.
+        instrumented: Record depth, wait times, blocked put time, and drops.
+        overflow_policy: What a put does when the queue is full.
+        overflow_timeout: Time waiting in seconds for space with BLOCK_TIMEOUT .
+        keep_every_nth: N for KEEP_EVERY_NTH, counted separately by each producer process.
+        """
+        assert isinstance(overflow_policy, OverflowPolicy), "Unknown overflow policy"
+        assert keep_every_nth > 0, "N must be greater than 0"
+
+        if backend == QueueBackend.SHARED_MEMORY:
+            self.queue = shared_memory_queue.SharedMemoryQueue(maxsize, slot_size)
+        else:
+            assert mp_manager is not None, "Manager backend requires a manager"
+            if isinstance(mp_manager, QueueManager):
+                self.queue = mp_manager.BatchQueue(maxsize)
+            else:
+                self.queue = mp_manager.Queue(maxsize)
+
         self.maxsize = maxsize
+        self.backend = backend
+
+        self.__overflow_policy = overflow_policy
+        self.__overflow_timeout = overflow_timeout
+        self.__keep_every_nth = keep_every_nth
+        self.__overflow_count = 0
+        self.__drop_count = mp.Value(ctypes.c_uint64, 0)
+
+        self.__instrumentation = None
+        if instrumented:
+            self.__instrumentation = queue_statistics.QueueInstrumentation()
+
+    def put(self, item: object, timeout: float | None = None) -> bool:
+        """
+        Put an item into the queue.
+
+        timeout: Time waiting in seconds for space before giving up, None waits forever.
+
+        Returns whether the item was put.
+        """
+        return self.put_many([item], timeout) == 1
+
+    def get(self, timeout: float | None = None) -> "tuple[True, object] | tuple[False, None]":
+        """
+        Get an item from the queue.
+
+        timeout: Time waiting in seconds for an item before giving up, 0 does not wait,
+        None waits forever.
+
+        Returns whether an item was available and the item.
+        """
+        items = self.get_many(1, timeout)
+        if len(items) == 0:
+            return False, None
+
+        return True, items[0]
+
+    def put_many(self, items: "list[object]", timeout: float | None = None) -> int:
+        """
+        Put items into the queue in one call when the backend supports it,
+        following the overflow policy when it is full.
+
+        timeout: Time waiting in seconds for space before giving up, None waits forever.
+        Only used by the blocking policies.
+
+        Returns the number of items put. With a blocking policy, the items not put are
+        not counted as dropped, the caller either retries or calls `record_drops()`.
+        """
+        start_time = time.monotonic()
+        if self.__instrumentation is not None:
+            items = [(start_time, item) for item in items]
+
+        if self.__overflow_policy == OverflowPolicy.BLOCK:
+            count = self.__put_many_raw(items, timeout)
+            evicted_count = 0
+            drop_count = 0
+        elif self.__overflow_policy == OverflowPolicy.BLOCK_TIMEOUT:
+            if timeout is None or timeout > self.__overflow_timeout:
+                timeout = self.__overflow_timeout
+            count = self.__put_many_raw(items, timeout)
+            evicted_count = 0
+            drop_count = 0
+        else:
+            if self.__overflow_policy == OverflowPolicy.DROP_OLDEST:
+                count, evicted_count = self.__put_many_drop_oldest(items)
+            elif self.__overflow_policy == OverflowPolicy.DROP_NEWEST:
+                count = self.__put_many_raw(items, 0.0)
+                evicted_count = 0
+            else:
+                count, evicted_count = self.__put_many_keep_every_nth(items)
+
+            drop_count = len(items) - count + evicted_count
+
+        self.__add_drop_count(drop_count)
+
+        if self.__instrumentation is not None:
+            self.__instrumentation.record_put(
+                count, evicted_count, drop_count, time.monotonic() - start_time
+            )
+
+        return count
+
+    def get_many(self, max_items: int, timeout: float | None = 0.0) -> "list[object]":
+        """
+        Get all available items up to `max_items` in one call when the backend supports it.
+
+        timeout: Time waiting in seconds for the first item, 0 does not wait,
+        None waits forever.
+
+        Returns the items, empty if none became available in time.
+        """
+        if self.__instrumentation is None:
+            return self.__get_many_raw(max_items, timeout)
+
+        entries = self.__get_many_raw(max_items, timeout)
+        now = time.monotonic()
+        self.__instrumentation.record_get([now - put_time for put_time, _ in entries])
+
+        return [item for _, item in entries]
+
+    def record_drops(self, count: int) -> None:
+        """
+        Counts items lost outside of the overflow policy, such as items a producer gave up
+        putting with a blocking policy.
+        """
+        self.__add_drop_count(count)
+        if self.__instrumentation is not None:
+            self.__instrumentation.record_put(0, 0, count, 0.0)
+
+    def get_drop_count(self) -> int:
+        """
+        Returns the number of items dropped by all producers, either given up on
+        or removed by the overflow policy.
+        """
+        return self.__drop_count.value
+
+    def get_statistics(self) -> "queue_statistics.QueueStatistics | None":
+        """
+        Returns a snapshot of the instrumentation, None if not instrumented.
+        """
+        if self.__instrumentation is None:
+            return None
+
+        return self.__instrumentation.get_statistics()
+
+    def __add_drop_count(self, count: int) -> None:
+        if count > 0:
+            with self.__drop_count.get_lock():
+                self.__drop_count.value += count
+
+    def __put_many_raw(self, items: "list[object]", timeout: float | None) -> int:
+        block = timeout is None or timeout > 0.0
+
+        if hasattr(self.queue, "put_many"):
+            return self.queue.put_many(items, block, timeout)
+
+        # Plain manager queue, one round trip per item
+        count = 0
+        try:
+            for item in items:
+                self.queue.put(item, block, timeout)
+                count += 1
+        except queue.Full:
+            pass
+
+        return count
+
+    def __put_many_drop_oldest(self, items: "list[object]") -> "tuple[int, int]":
+        """
+        Returns the number of items put and the number of old items removed.
+        """
+        count = 0
+        evicted_count = 0
+        # Other processes can take or put items in between, so give up eventually
+        for _ in range(2 * len(items) + 2):
+            count += self.__put_many_raw(items[count:], 0.0)
+            if count == len(items):
+                break
+
+            evicted_count += len(self.__get_many_raw(len(items) - count, 0.0))
+
+        return count, evicted_count
+
+    def __put_many_keep_every_nth(self, items: "list[object]") -> "tuple[int, int]":
+        """
+        Returns the number of items put and the number of old items removed.
+        """
+        count = 0
+        evicted_count = 0
+        for item in items:
+            if self.__put_many_raw([item], 0.0) == 1:
+                count += 1
+                continue
+
+            self.__overflow_count += 1
+            if self.__overflow_count % self.__keep_every_nth != 0:
+                continue
+
+            evicted_count += len(self.__get_many_raw(1, 0.0))
+            count += self.__put_many_raw([item], 0.0)
+
+        return count, evicted_count
+
+    def __get_many_raw(self, max_items: int, timeout: float | None) -> "list[object]":
+        block = timeout is None or timeout > 0.0
+
+        if hasattr(self.queue, "get_many"):
+            return self.queue.get_many(max_items, block, timeout)
+
+        # Plain manager queue, one round trip per item
+        items = []
+        try:
+            items.append(self.queue.get(block, timeout))
+            while len(items) < max_items:
+                items.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        return items
 
     def fill_queue_with_sentinel(self, timeout: float = 0.0) -> None:
         """
@@ -30,11 +371,9 @@ class QueueProxyWrapper:
         if timeout <= 0.0:
             timeout = self.__QUEUE_TIMEOUT
 
-        try:
-            for _ in range(self.maxsize):
-                self.queue.put(None, timeout=timeout)
-        except queue.Full:
-            return
+        for _ in range(self.maxsize):
+            if not self.put(None, timeout):
+                return
 
     def drain_queue(self, timeout: float = 0.0) -> None:
         """
@@ -45,11 +384,10 @@ class QueueProxyWrapper:
         if timeout <= 0.0:
             timeout = self.__QUEUE_TIMEOUT
 
-        try:
-            for _ in range(self.maxsize):
-                self.queue.get(timeout=timeout)
-        except queue.Empty:
-            return
+        for _ in range(self.maxsize):
+            result, _ = self.get(timeout)
+            if not result:
+                return
 
     def fill_and_drain_queue(self) -> None:
         """
@@ -58,3 +396,11 @@ class QueueProxyWrapper:
         self.fill_queue_with_sentinel()
         time.sleep(self.__QUEUE_DELAY)
         self.drain_queue()
+
+    def close(self) -> None:
+        """
+        Releases resources held by the queue.
+        Call from main after all workers using the queue have been joined.
+        """
+        if self.backend == QueueBackend.SHARED_MEMORY:
+            self.queue.close()
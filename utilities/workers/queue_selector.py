@@ -0,0 +1,111 @@
+"""
+Waiting on several queues at once.
+"""
+
+import queue
+import threading
+
+from . import queue_proxy_wrapper
+from . import worker_controller
+
+
+class QueueSelector:
+    """
+    Blocks until any of several queues has data, like select() on file descriptors.
+
+    A daemon relay thread per queue waits on that queue and forwards its items to a local
+    queue, so the caller wakes as soon as any item arrives instead of polling each queue
+    in turn. Items taken by a relay are owned by the selector: only one selector should
+    be reading a queue, and nothing else should read it while the selector is open.
+    """
+
+    # How often idle relays check whether they should stop, which bounds how long closing takes
+    __RELAY_TIMEOUT = 0.1  # seconds
+
+    # Marks that exit was requested
+    __EXIT = object()
+
+    def __init__(
+        self,
+        queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+        controller: worker_controller.WorkerController | None = None,
+        batch_size: int = 16,
+    ) -> None:
+        """
+        Constructor starts the relay threads.
+
+        queues: Queues to wait on.
+        controller: Also wake up when exit is requested, None to ignore.
+        batch_size: Maximum number of items a relay takes from its queue at once.
+        """
+        self.__ready = queue.Queue()
+        self.__stop = threading.Event()
+        self.__is_exit_requested = False
+
+        self.__threads = [
+            threading.Thread(target=self.__relay, args=(source, batch_size), daemon=True)
+            for source in queues
+        ]
+        if controller is not None:
+            self.__threads.append(
+                threading.Thread(target=self.__watch_exit, args=(controller,), daemon=True)
+            )
+
+        for thread in self.__threads:
+            thread.start()
+
+    def select(
+        self, timeout: float | None = None
+    ) -> "list[tuple[queue_proxy_wrapper.QueueProxyWrapper, object]]":
+        """
+        Waits until at least one item is available or exit is requested.
+
+        timeout: Time waiting in seconds before giving up, None waits forever.
+
+        Returns the available items in arrival order, each paired with the queue
+        it came from. Empty on timeout or exit.
+        """
+        events = []
+        try:
+            events.append(self.__ready.get(timeout=timeout))
+            while True:
+                events.append(self.__ready.get_nowait())
+        except queue.Empty:
+            pass
+
+        ready = []
+        for source, item in events:
+            if item is self.__EXIT:
+                self.__is_exit_requested = True
+                continue
+
+            ready.append((source, item))
+
+        return ready
+
+    def is_exit_requested(self) -> bool:
+        """
+        Returns whether `select()` has seen an exit request from the controller.
+        """
+        return self.__is_exit_requested
+
+    def close(self) -> None:
+        """
+        Stops the relay threads and waits for them, which takes up to the relay timeout.
+        Anything they take from the queues after the last select is discarded.
+        Afterwards the queues are no longer in use by the selector and can be closed.
+        """
+        self.__stop.set()
+        for thread in self.__threads:
+            thread.join()
+
+    def __relay(self, source: queue_proxy_wrapper.QueueProxyWrapper, batch_size: int) -> None:
+        while not self.__stop.is_set():
+            for item in source.get_many(batch_size, self.__RELAY_TIMEOUT):
+                self.__ready.put((source, item))
+
+    def __watch_exit(self, controller: worker_controller.WorkerController) -> None:
+        while not self.__stop.is_set():
+            if controller.wait_for_exit(self.__RELAY_TIMEOUT):
+                self.__ready.put((None, self.__EXIT))
+                return
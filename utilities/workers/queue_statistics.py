@@ -0,0 +1,135 @@
+"""
+Queue instrumentation.
+"""
+
+import ctypes
+import multiprocessing as mp
+
+
+class QueueStatistics:  # pylint: disable=too-many-instance-attributes
+    """
+    Snapshot of queue instrumentation. Times are in seconds.
+    """
+
+    def __init__(
+        self,
+        put_count: int,
+        get_count: int,
+        evicted_count: int,
+        drop_count: int,
+        high_water_mark: int,
+        total_wait_time: float,
+        max_wait_time: float,
+        total_blocked_put_time: float,
+        max_blocked_put_time: float,
+    ) -> None:
+        self.put_count = put_count
+        self.get_count = get_count
+        # Items removed by the overflow policy to make space
+        self.evicted_count = evicted_count
+        # Items not put or evicted
+        self.drop_count = drop_count
+        # Items currently in the queue
+        self.depth = put_count - get_count - evicted_count
+        self.high_water_mark = high_water_mark
+        # Time between an item being put and being taken out
+        self.mean_wait_time = total_wait_time / get_count if get_count > 0 else 0.0
+        self.max_wait_time = max_wait_time
+        # Time producers spent waiting for space
+        self.total_blocked_put_time = total_blocked_put_time
+        self.max_blocked_put_time = max_blocked_put_time
+
+    def __str__(self) -> str:
+        return (
+            f"depth: {self.depth}, high water mark: {self.high_water_mark}, "
+            f"puts: {self.put_count}, gets: {self.get_count}, "
+            f"evicted: {self.evicted_count}, drops: {self.drop_count}, "
+            f"wait mean/max: {self.mean_wait_time * 1000.0:.2f}/{self.max_wait_time * 1000.0:.2f} ms, "
+            f"blocked put total/max: {self.total_blocked_put_time * 1000.0:.2f}/"
+            f"{self.max_blocked_put_time * 1000.0:.2f} ms"
+        )
+
+
+class QueueInstrumentation:
+    """
+    Counters shared by every process using a queue.
+    """
+
+    # Indices into the shared counters
+    __PUT_COUNT = 0
+    __GET_COUNT = 1
+    __EVICTED_COUNT = 2
+    __DROP_COUNT = 3
+    __HIGH_WATER_MARK = 4
+    __TOTAL_WAIT_TIME = 5
+    __MAX_WAIT_TIME = 6
+    __TOTAL_BLOCKED_PUT_TIME = 7
+    __MAX_BLOCKED_PUT_TIME = 8
+    __COUNTER_COUNT = 9
+
+    def __init__(self) -> None:
+        """
+        Constructor creates the shared counters.
+        """
+        self.__counters = mp.Array(ctypes.c_double, self.__COUNTER_COUNT)
+
+    def record_put(
+        self, put_count: int, evicted_count: int, drop_count: int, blocked_time: float
+    ) -> None:
+        """
+        Records a call that put items.
+
+        put_count: Number of items put.
+        evicted_count: Number of items removed to make space.
+        drop_count: Number of items that were not put or evicted.
+        blocked_time: Time spent in the call.
+        """
+        with self.__counters.get_lock():
+            counters = self.__counters.get_obj()
+            counters[self.__PUT_COUNT] += put_count
+            counters[self.__EVICTED_COUNT] += evicted_count
+            counters[self.__DROP_COUNT] += drop_count
+            counters[self.__TOTAL_BLOCKED_PUT_TIME] += blocked_time
+            counters[self.__MAX_BLOCKED_PUT_TIME] = max(
+                counters[self.__MAX_BLOCKED_PUT_TIME], blocked_time
+            )
+            counters[self.__HIGH_WATER_MARK] = max(
+                counters[self.__HIGH_WATER_MARK],
+                counters[self.__PUT_COUNT]
+                - counters[self.__GET_COUNT]
+                - counters[self.__EVICTED_COUNT],
+            )
+
+    def record_get(self, wait_times: "list[float]") -> None:
+        """
+        Records a call that got items.
+
+        wait_times: Time each item spent in the queue.
+        """
+        if len(wait_times) == 0:
+            return
+
+        with self.__counters.get_lock():
+            counters = self.__counters.get_obj()
+            counters[self.__GET_COUNT] += len(wait_times)
+            counters[self.__TOTAL_WAIT_TIME] += sum(wait_times)
+            counters[self.__MAX_WAIT_TIME] = max(counters[self.__MAX_WAIT_TIME], *wait_times)
+
+    def get_statistics(self) -> QueueStatistics:
+        """
+        Returns a consistent snapshot of the counters.
+        """
+        with self.__counters.get_lock():
+            counters = list(self.__counters.get_obj())
+
+        return QueueStatistics(
+            int(counters[self.__PUT_COUNT]),
+            int(counters[self.__GET_COUNT]),
+            int(counters[self.__EVICTED_COUNT]),
+            int(counters[self.__DROP_COUNT]),
+            int(counters[self.__HIGH_WATER_MARK]),
+            counters[self.__TOTAL_WAIT_TIME],
+            counters[self.__MAX_WAIT_TIME],
+            counters[self.__TOTAL_BLOCKED_PUT_TIME],
+            counters[self.__MAX_BLOCKED_PUT_TIME],
+        )
@@ -0,0 +1,118 @@
+"""
+Latest value store in shared memory.
+"""
+
+import os
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+
+
+class SharedMemoryBlackboard:
+    """
+    Holds the most recent fixed size record written by a single writer process.
+
+    Reads are versioned with a sequence lock instead of a mutex: the writer makes the
+    sequence number odd while writing and even when done, and readers retry if the
+    sequence number was odd or changed while they were copying. Any number of processes
+    can read without blocking the writer or each other.
+    """
+
+    __SEQUENCE = struct.Struct("=Q")
+    __READ_ATTEMPTS_BEFORE_YIELD = 100
+
+    def __init__(self, record_size: int) -> None:
+        """
+        Constructor allocates the shared memory.
+
+        record_size: Size in bytes of every record.
+        """
+        assert record_size > 0, "Record size must be greater than 0"
+
+        self.__record_size = record_size
+        self.__memory = shared_memory.SharedMemory(
+            create=True,
+            size=self.__SEQUENCE.size + record_size,
+        )
+        self.__SEQUENCE.pack_into(self.__memory.buf, 0, 0)
+        self.__owner_process_id = os.getpid()
+
+    def __getstate__(self) -> dict:
+        """
+        Shared memory is reattached by name when the blackboard is sent to a spawned process.
+        """
+        state = self.__dict__.copy()
+        state["_SharedMemoryBlackboard__memory"] = self.__memory.name
+        return state
+
+    def __setstate__(self, state: dict) -> None:  # pylint: disable=protected-access
+        name = state["_SharedMemoryBlackboard__memory"]
+        self.__dict__.update(state)
+        if os.getpid() == self.__owner_process_id:
+            self.__memory = shared_memory.SharedMemory(name=name)
+            return
+
+        if sys.version_info >= (3, 13):
+            self.__memory = shared_memory.SharedMemory(  # pylint: disable=unexpected-keyword-arg
+                name=name, track=False
+            )
+            return
+
+        # Processes started by multiprocessing share the resource tracker of the owner.
+        # A tracker started by attaching would destroy the memory when this process exits
+        has_tracker = resource_tracker._resource_tracker._fd is not None
+        self.__memory = shared_memory.SharedMemory(name=name)
+        if not has_tracker:
+            resource_tracker.unregister(self.__memory._name, "shared_memory")
+
+    def write(self, data: bytes) -> None:
+        """
+        Replaces the record. Only one process may write.
+
+        data: Exactly `record_size` bytes.
+        """
+        assert len(data) == self.__record_size, "Data must be exactly the record size"
+
+        buffer = self.__memory.buf
+        (sequence,) = self.__SEQUENCE.unpack_from(buffer, 0)
+        self.__SEQUENCE.pack_into(buffer, 0, sequence + 1)
+        start = self.__SEQUENCE.size
+        buffer[start : start + self.__record_size] = data
+        self.__SEQUENCE.pack_into(buffer, 0, sequence + 2)
+
+    def read(self) -> "tuple[int, bytes | None]":
+        """
+        Copies the latest record without blocking the writer.
+
+        Returns the version, which increases with every write, and the record.
+        Version 0 means nothing has been written yet and the record is None.
+        """
+        buffer = self.__memory.buf
+        start = self.__SEQUENCE.size
+        attempts = 0
+        while True:
+            (sequence_before,) = self.__SEQUENCE.unpack_from(buffer, 0)
+            if sequence_before == 0:
+                return 0, None
+
+            if sequence_before % 2 == 0:
+                data = bytes(buffer[start : start + self.__record_size])
+                (sequence_after,) = self.__SEQUENCE.unpack_from(buffer, 0)
+                if sequence_after == sequence_before:
+                    return sequence_before // 2, data
+
+            # Writer is in the middle of a write, let it finish
+            attempts += 1
+            if attempts % self.__READ_ATTEMPTS_BEFORE_YIELD == 0:
+                time.sleep(0)
+
+    def close(self) -> None:
+        """
+        Releases the shared memory. The owner process also destroys it.
+        Call after all other processes are done with the blackboard.
+        """
+        self.__memory.close()
+        if os.getpid() == self.__owner_process_id:
+            self.__memory.unlink()
@@ -0,0 +1,255 @@
+"""
+Queue backed by a ring buffer in shared memory.
+"""
+
+import multiprocessing as mp
+import os
+import pickle
+import queue
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+
+
+class SharedMemoryQueue:  # pylint: disable=too-many-instance-attributes
+    """
+    Bounded FIFO queue of fixed size slots in shared memory.
+
+    Items are pickled directly into a slot, so unlike a manager queue there is no server
+    process on the data path. Semaphores count free and used slots so that blocked
+    producers and consumers are woken up by the kernel instead of polling.
+
+    Provides the subset of the `queue.Queue` interface used by the workers:
+    `put()`, `put_nowait()`, `get()`, `get_nowait()`, `qsize()`, `empty()`, `full()` ,
+    as well as the bulk operations `put_many()` and `get_many()` .
+    """
+
+    # Head and tail are monotonically increasing item counters, slot is counter % maxsize
+    __HEADER = struct.Struct("=QQ")
+    __SLOT_LENGTH = struct.Struct("=I")
+
+    def __init__(self, maxsize: int, slot_size: int) -> None:
+        """
+        Constructor allocates the shared memory and synchronization primitives.
+
+        maxsize: Number of slots, must be greater than 0 .
+        slot_size: Maximum size in bytes of a pickled item.
+        """
+        assert maxsize > 0, "Shared memory queue must be bounded"
+        assert slot_size > 0, "Slot size must be greater than 0"
+
+        self.__maxsize = maxsize
+        self.__slot_size = slot_size
+        self.__slot_stride = self.__SLOT_LENGTH.size + slot_size
+
+        self.__memory = shared_memory.SharedMemory(
+            create=True,
+            size=self.__HEADER.size + maxsize * self.__slot_stride,
+        )
+        self.__HEADER.pack_into(self.__memory.buf, 0, 0, 0)
+        self.__owner_process_id = os.getpid()
+
+        self.__lock = mp.Lock()
+        self.__free_slots = mp.Semaphore(maxsize)
+        self.__used_slots = mp.Semaphore(0)
+
+    def __getstate__(self) -> dict:
+        """
+        Shared memory is reattached by name when the queue is sent to a spawned process.
+        """
+        state = self.__dict__.copy()
+        state["_SharedMemoryQueue__memory"] = self.__memory.name
+        return state
+
+    def __setstate__(self, state: dict) -> None:  # pylint: disable=protected-access
+        name = state["_SharedMemoryQueue__memory"]
+        self.__dict__.update(state)
+        if os.getpid() == self.__owner_process_id:
+            self.__memory = shared_memory.SharedMemory(name=name)
+            return
+
+        if sys.version_info >= (3, 13):
+            self.__memory = shared_memory.SharedMemory(  # pylint: disable=unexpected-keyword-arg
+                name=name, track=False
+            )
+            return
+
+        # Processes started by multiprocessing share the resource tracker of the owner.
+        # A tracker started by attaching would destroy the memory when this process exits
+        has_tracker = resource_tracker._resource_tracker._fd is not None
+        self.__memory = shared_memory.SharedMemory(name=name)
+        if not has_tracker:
+            resource_tracker.unregister(self.__memory._name, "shared_memory")
+
+    def put(self, item: object, block: bool = True, timeout: float | None = None) -> None:
+        """
+        Put an item into the queue.
+
+        Raises queue.Full if no slot became available, and ValueError if the pickled
+        item does not fit in a slot.
+        """
+        data = pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.__slot_size:
+            raise ValueError(f"Item of {len(data)} bytes exceeds slot size {self.__slot_size}")
+
+        if not self.__free_slots.acquire(block, timeout):
+            raise queue.Full
+
+        buffer = self.__memory.buf
+        with self.__lock:
+            head, tail = self.__HEADER.unpack_from(buffer, 0)
+            offset = self.__slot_offset(tail)
+            self.__SLOT_LENGTH.pack_into(buffer, offset, len(data))
+            start = offset + self.__SLOT_LENGTH.size
+            buffer[start : start + len(data)] = data
+            self.__HEADER.pack_into(buffer, 0, head, tail + 1)
+
+        self.__used_slots.release()
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Equivalent to `put(item, False)` .
+        """
+        self.put(item, False)
+
+    def get(self, block: bool = True, timeout: float | None = None) -> object:
+        """
+        Remove and return an item from the queue.
+
+        Raises queue.Empty if no item became available.
+        """
+        if not self.__used_slots.acquire(block, timeout):
+            raise queue.Empty
+
+        buffer = self.__memory.buf
+        with self.__lock:
+            head, tail = self.__HEADER.unpack_from(buffer, 0)
+            offset = self.__slot_offset(head)
+            (length,) = self.__SLOT_LENGTH.unpack_from(buffer, offset)
+            start = offset + self.__SLOT_LENGTH.size
+            data = bytes(buffer[start : start + length])
+            self.__HEADER.pack_into(buffer, 0, head + 1, tail)
+
+        self.__free_slots.release()
+
+        return pickle.loads(data)
+
+    def put_many(
+        self, items: "list[object]", block: bool = True, timeout: float | None = None
+    ) -> int:
+        """
+        Put items into the queue in order, writing as many as there are free slots
+        for under a single lock acquisition.
+
+        Returns the number of items put, which is less than the number of items
+        if the queue did not have space in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        all_data = [pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL) for item in items]
+        for data in all_data:
+            if len(data) > self.__slot_size:
+                raise ValueError(f"Item of {len(data)} bytes exceeds slot size {self.__slot_size}")
+
+        count = 0
+        while count < len(all_data):
+            # Wait for the first free slot, then take any others without blocking
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            if not self.__free_slots.acquire(block, remaining):
+                break
+
+            reserved = 1
+            while count + reserved < len(all_data) and self.__free_slots.acquire(False):
+                reserved += 1
+
+            buffer = self.__memory.buf
+            with self.__lock:
+                head, tail = self.__HEADER.unpack_from(buffer, 0)
+                for data in all_data[count : count + reserved]:
+                    offset = self.__slot_offset(tail)
+                    self.__SLOT_LENGTH.pack_into(buffer, offset, len(data))
+                    start = offset + self.__SLOT_LENGTH.size
+                    buffer[start : start + len(data)] = data
+                    tail += 1
+
+                self.__HEADER.pack_into(buffer, 0, head, tail)
+
+            for _ in range(reserved):
+                self.__used_slots.release()
+
+            count += reserved
+
+        return count
+
+    def get_many(
+        self, max_items: int, block: bool = True, timeout: float | None = None
+    ) -> "list[object]":
+        """
+        Remove and return all available items up to `max_items` under a single
+        lock acquisition. Only waits for the first item.
+
+        Returns the items, empty if none became available in time.
+        """
+        if max_items <= 0 or not self.__used_slots.acquire(block, timeout):
+            return []
+
+        reserved = 1
+        while reserved < max_items and self.__used_slots.acquire(False):
+            reserved += 1
+
+        all_data = []
+        buffer = self.__memory.buf
+        with self.__lock:
+            head, tail = self.__HEADER.unpack_from(buffer, 0)
+            for _ in range(reserved):
+                offset = self.__slot_offset(head)
+                (length,) = self.__SLOT_LENGTH.unpack_from(buffer, offset)
+                start = offset + self.__SLOT_LENGTH.size
+                all_data.append(bytes(buffer[start : start + length]))
+                head += 1
+
+            self.__HEADER.pack_into(buffer, 0, head, tail)
+
+        for _ in range(reserved):
+            self.__free_slots.release()
+
+        return [pickle.loads(data) for data in all_data]
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to `get(False)` .
+        """
+        return self.get(False)
+
+    def qsize(self) -> int:
+        """
+        Returns the approximate number of items in the queue.
+        """
+        head, tail = self.__HEADER.unpack_from(self.__memory.buf, 0)
+        return tail - head
+
+    def empty(self) -> bool:
+        """
+        Returns whether the queue is (approximately) empty.
+        """
+        return self.qsize() <= 0
+
+    def full(self) -> bool:
+        """
+        Returns whether the queue is (approximately) full.
+        """
+        return self.qsize() >= self.__maxsize
+
+    def close(self) -> None:
+        """
+        Releases the shared memory. The owner process also destroys it.
+        Call after all other processes are done with the queue.
+        """
+        self.__memory.close()
+        if os.getpid() == self.__owner_process_id:
+            self.__memory.unlink()
+
+    def __slot_offset(self, counter: int) -> int:
+        return self.__HEADER.size + (counter % self.__maxsize) * self.__slot_stride
@@ -0,0 +1,188 @@
+"""
+Deadline bounded shutdown of workers.
+"""
+
+import multiprocessing.connection
+import threading
+import time
+
+from . import queue_proxy_wrapper
+from . import worker_controller
+from . import worker_manager
+
+
+class WorkerShutdownTime:
+    """
+    How long a single worker took to exit.
+    """
+
+    def __init__(self, name: str, duration: float, is_terminated: bool) -> None:
+        """
+        name: Target and process name.
+        duration: Seconds from the exit request until the worker exited.
+        is_terminated: Whether the worker missed the deadline and was terminated.
+        """
+        self.name = name
+        self.duration = duration
+        self.is_terminated = is_terminated
+
+
+class ShutdownReport:
+    """
+    Timings of each shutdown phase and each worker.
+    """
+
+    def __init__(self) -> None:
+        # Seconds from the start of shutdown until the end of each phase
+        self.phase_times: "dict[str, float]" = {}
+        self.worker_times: "list[WorkerShutdownTime]" = []
+        # Queues with a drain that did not stop in time, still in use so not safe to close
+        self.stuck_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]" = []
+
+    def is_clean(self) -> bool:
+        """
+        Returns whether every worker exited on its own before the deadline.
+        """
+        return not any(worker_time.is_terminated for worker_time in self.worker_times)
+
+    def __str__(self) -> str:
+        phases = ", ".join(
+            f"{phase}: {phase_time * 1000.0:.1f} ms"
+            for phase, phase_time in self.phase_times.items()
+        )
+        workers = ", ".join(
+            f"{worker_time.name}: {worker_time.duration * 1000.0:.1f} ms"
+            + (" (terminated)" if worker_time.is_terminated else "")
+            for worker_time in self.worker_times
+        )
+        return f"phases [{phases}] workers [{workers}]"
+
+
+# How long to wait for a terminated worker
+TERMINATE_TIMEOUT = 0.1  # seconds
+# How long a drain waits for items before checking whether to stop
+DRAIN_TIMEOUT = 0.005  # seconds
+DRAIN_BATCH_SIZE = 64
+# How long to wait for all drains to stop after the workers
+DRAIN_JOIN_TIMEOUT = 1.0  # seconds
+
+
+def shutdown(
+    controller: worker_controller.WorkerController,
+    worker_managers: "list[worker_manager.WorkerManager]",
+    queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    deadline: float,
+) -> ShutdownReport:
+    """
+    Stops all workers within a deadline. Replaces requesting exit, filling and draining
+    each queue in turn, and joining each worker in turn.
+
+    1. Request exit.
+    2. For all queues in parallel, put a poison pill (None) for every worker consuming it
+       to wake up consumers waiting on an empty queue, then drain it once all of its
+       consumers have exited to wake up producers waiting on a full queue.
+    3. Wait for all workers in parallel, terminating any still alive at the deadline.
+    4. Stop the drains and wait for them, so that the queues can be closed afterwards
+       except for the stuck queues in the report.
+
+    controller: Controller of all the workers.
+    worker_managers: Managers of all the workers.
+    queues: Every queue used by the workers.
+    deadline: Seconds from now until workers are terminated.
+
+    Returns the report.
+    """
+    report = ShutdownReport()
+    start_time = time.monotonic()
+    end_time = start_time + deadline
+
+    controller.request_exit()
+    report.phase_times["request exit"] = time.monotonic() - start_time
+
+    # Consumers of each queue, main consumes the queues that are not worker inputs
+    consumers: "dict[int, list[multiprocessing.Process]]" = {id(queue): [] for queue in queues}
+    for manager in worker_managers:
+        for input_queue in manager.get_worker_properties().get_input_queues():
+            consumers.setdefault(id(input_queue), []).extend(manager.get_workers())
+
+    stop_draining = threading.Event()
+    drain_threads = [
+        threading.Thread(
+            target=_stop_queue,
+            args=(queue, consumers[id(queue)], stop_draining),
+            daemon=True,
+        )
+        for queue in queues
+    ]
+    for thread in drain_threads:
+        thread.start()
+
+    # Wait for workers in parallel, recording when each one exits
+    remaining_workers = {
+        worker.sentinel: (
+            f"{manager.get_worker_properties().get_target_name()} {worker.name}",
+            worker,
+        )
+        for manager in worker_managers
+        for worker in manager.get_workers()
+    }
+    while len(remaining_workers) > 0:
+        timeout = end_time - time.monotonic()
+        if timeout <= 0.0:
+            break
+
+        for sentinel in multiprocessing.connection.wait(list(remaining_workers), timeout):
+            name, worker = remaining_workers.pop(sentinel)
+            worker.join()
+            report.worker_times.append(
+                WorkerShutdownTime(name, time.monotonic() - start_time, False)
+            )
+
+    # Deadline passed
+    for name, worker in remaining_workers.values():
+        worker.terminate()
+        worker.join(TERMINATE_TIMEOUT)
+        report.worker_times.append(WorkerShutdownTime(name, time.monotonic() - start_time, True))
+
+    report.phase_times["join"] = time.monotonic() - start_time
+
+    # A drain checks whether to stop between waits, but a terminated worker may have left its
+    # queue locked, so only wait for a bounded time
+    stop_draining.set()
+    join_end_time = time.monotonic() + DRAIN_JOIN_TIMEOUT
+    for queue, thread in zip(queues, drain_threads):
+        thread.join(max(join_end_time - time.monotonic(), 0.0))
+        if thread.is_alive():
+            report.stuck_queues.append(queue)
+
+    report.phase_times["stop draining"] = time.monotonic() - start_time
+
+    return report
+
+
+def _stop_queue(
+    queue: queue_proxy_wrapper.QueueProxyWrapper,
+    consumers: "list[multiprocessing.Process]",
+    stop: threading.Event,
+) -> None:
+    """
+    Puts a poison pill for each consumer, then drains the queue once all of its consumers
+    have exited, until stopped.
+    """
+    sentinels = [consumer.sentinel for consumer in consumers]
+    pill_count = len(consumers)
+    while len(sentinels) > 0 and not stop.is_set():
+        # A full queue wakes up its consumers anyway, keep trying in case there are more
+        # consumers than space
+        if pill_count > 0:
+            if queue.put(None, DRAIN_TIMEOUT):
+                pill_count -= 1
+            timeout = 0.0
+        else:
+            timeout = DRAIN_TIMEOUT
+
+        for sentinel in multiprocessing.connection.wait(sentinels, timeout):
+            sentinels.remove(sentinel)
+
+    while not stop.is_set():
+        queue.get_many(DRAIN_BATCH_SIZE, DRAIN_TIMEOUT)
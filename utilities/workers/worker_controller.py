@@ -2,8 +2,8 @@
 For controlling workers.
 """
 
+import ctypes
 import multiprocessing as mp
-import time
 
 
 class WorkerController:
@@ -12,15 +12,19 @@ class WorkerController:
     Contains exit and pause requests.
     """
 
-    __QUEUE_DELAY = 0.1  # seconds
-
     def __init__(self) -> None:
         """
-        Constructor creates internal queue and semaphore.
+        Constructor creates internal flag, event, and semaphore.
         """
         self.__pause = mp.BoundedSemaphore(1)
         self.__is_paused = False
-        self.__exit_queue = mp.Queue(1)
+        # Odd while paused, incremented on every pause and resume
+        # Checking it is a single read, the semaphore is only used while paused
+        self.__pause_generation = mp.RawValue(ctypes.c_uint64, 0)
+        # Shared memory flag, checking it is a single read without locking
+        self.__is_exit_requested = mp.RawValue(ctypes.c_bool, False)
+        # For workers blocking until exit is requested
+        self.__exit_event = mp.Event()
 
     def request_pause(self) -> None:
         """
@@ -28,6 +32,7 @@ class WorkerController:
         """
         if not self.__is_paused:
             self.__pause.acquire()
+            self.__pause_generation.value += 1
             self.__is_paused = True
 
     def request_resume(self) -> None:
@@ -35,6 +40,7 @@ class WorkerController:
         Requests worker processes to resume.
         """
         if self.__is_paused:
+            self.__pause_generation.value += 1
             self.__pause.release()
             self.__is_paused = False
 
@@ -42,26 +48,33 @@ class WorkerController:
         """
         Blocks worker if main has requested it to pause, otherwise continues.
         """
+        if self.__pause_generation.value % 2 == 0:
+            return
+
         self.__pause.acquire()
         self.__pause.release()
 
+    def get_pause_generation(self) -> int:
+        """
+        Returns the number of pause and resume requests so far, odd while paused.
+        """
+        return self.__pause_generation.value
+
     def request_exit(self) -> None:
         """
         Requests worker processes to exit.
         Does nothing if already requested.
         """
-        time.sleep(self.__QUEUE_DELAY)
-        if self.__exit_queue.empty():
-            self.__exit_queue.put(None)
+        self.__is_exit_requested.value = True
+        self.__exit_event.set()
 
     def clear_exit(self) -> None:
         """
         Clears the exit request condition.
         Does nothing if already cleared.
         """
-        time.sleep(self.__QUEUE_DELAY)
-        if not self.__exit_queue.empty():
-            _ = self.__exit_queue.get()
+        self.__exit_event.clear()
+        self.__is_exit_requested.value = False
 
     def is_exit_requested(self) -> bool:
         """
@@ -69,4 +82,14 @@ class WorkerController:
         There is a race condition, but it's fine because the worker process
         will do at most 1 additional loop.
         """
-        return not self.__exit_queue.empty()
+        return self.__is_exit_requested.value
+
+    def wait_for_exit(self, timeout: float | None = None) -> bool:
+        """
+        Blocks worker until main has requested it to exit.
+
+        timeout: Time waiting in seconds before giving up, None waits forever.
+
+        Returns whether exit was requested.
+        """
+        return self.__exit_event.wait(timeout)
@@ -110,6 +110,12 @@ class WorkerProperties:
         """
         return self.__input_queues
 
+    def get_output_queues(self) -> "list[queue_proxy_wrapper.QueueProxyWrapper]":
+        """
+        Returns the output queues.
+        """
+        return self.__output_queues
+
     def get_target_name(self) -> str:
         """
         Returns the name of the target.
@@ -196,6 +202,18 @@ class WorkerManager:
 
         return True, worker
 
+    def get_worker_properties(self) -> WorkerProperties:
+        """
+        Returns the worker properties.
+        """
+        return self.__worker_properties
+
+    def get_workers(self) -> "list[mp.Process]":
+        """
+        Returns the worker processes.
+        """
+        return self.__workers
+
     def start_workers(self) -> None:
         """
         Start workers.